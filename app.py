@@ -1,22 +1,33 @@
+import click
 from flask import Flask, redirect, url_for
 from flask_wtf.csrf import CSRFProtect
 from config import Config
-from models import db, User, Cluster
+from models import db, User, Cluster, ClusterTotal, ensure_indexes, install_sqlite_pragmas, read_sqlite_pragmas
+from utils.assets import BUILD_DIR, MANIFEST_NAME, build_assets, init_assets, load_manifest
+from utils.compression import init_compression
+from utils.cooperative import is_cooperative
+from utils.metrics import init_metrics
+from utils.warmup import init_template_cache
 from utils.decorators import login_required
 import os
 
-def create_app():
-    app = Flask(__name__)
+def create_app(instance_path=None):
+    # instance_path (absolute) moves the default SQLite database and the
+    # template cache, e.g. into a test's temporary directory
+    app = Flask(__name__, instance_path=instance_path)
     app.config.from_object(Config)
     
     # Initialize CSRF protection
     csrf = CSRFProtect(app)
     
     # Ensure instance folder exists
-    os.makedirs('instance', exist_ok=True)
+    os.makedirs(app.instance_path, exist_ok=True)
     
-    # Initialize database
+    # Set up the database engine; tables and default data come from `flask init-db`
+    configure_engine_options(app)
     db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
     
     # Register blueprints
     from routes.auth import auth_bp
@@ -24,12 +35,23 @@ def create_app():
     from routes.events import events_bp
     from routes.overview import overview_bp
     from routes.logs import logs_bp
+    from routes.api import api_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(events_bp)
     app.register_blueprint(overview_bp)
     app.register_blueprint(logs_bp)
+    app.register_blueprint(api_bp)
+    
+    # Compiled templates shared on disk by every worker
+    init_template_cache(app)
+    
+    # Fingerprinted static files, when `flask build-assets` has been run
+    init_assets(app)
+    # Metrics first, so their after-request hook runs last and times the others
+    init_metrics(app)
+    init_compression(app)
     
     # Error handlers
     @app.errorhandler(403)
@@ -60,16 +82,127 @@ def create_app():
     def manage():
         return redirect(url_for('overview.manage_overview'))
     
-    # Initialize database
-    with app.app_context():
-        db.create_all()
-        init_database()
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create the tables, indexes and default data of a new or upgraded database"""
+        bootstrap_database()
+        report_sqlite_pragmas(app)
+        click.echo("✓ Database ready")
+    
+    @app.cli.command('rebuild-totals')
+    @click.option('--check', is_flag=True, help='Only report drift, do not rewrite the totals.')
+    def rebuild_totals_command(check):
+        """Recompute cluster totals from participants and report any drift"""
+        drift = ClusterTotal.find_drift() if check else ClusterTotal.rebuild()
+        clusters = {cluster.id: cluster.name for cluster in Cluster.query.all()}
+        if not drift:
+            click.echo("✓ Cluster totals match participant points")
+            return
+        for cluster_id, (stored, actual) in sorted(drift.items()):
+            name = clusters.get(cluster_id, f'#{cluster_id}')
+            click.echo(f"⚠ {name}: stored={stored} actual={actual}")
+        if check:
+            raise SystemExit(1)
+        click.echo(f"✓ Rebuilt totals for {len(clusters)} clusters")
+    
+    @app.cli.command('ensure-indexes')
+    def ensure_indexes_command():
+        """Add indexes missing from an existing database"""
+        created = ensure_indexes()
+        for name in created:
+            click.echo(f"✓ Created index {name}")
+        if not created:
+            click.echo("✓ All indexes present")
+    
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Fingerprint and precompress static files into static/build/"""
+        from models import EventResult
+        from utils.cache import invalidate_public_pages
+        
+        files = build_assets(app.static_folder)
+        # Stored event results embed logo URLs, so rebuild them against the new build
+        app.extensions['assets'] = load_manifest(os.path.join(app.static_folder, BUILD_DIR, MANIFEST_NAME))
+        db.session.execute(db.delete(EventResult))
+        EventResult.fill_missing()
+        invalidate_public_pages()
+        db.session.commit()
+        click.echo(f"✓ Built {len(files)} static assets into {os.path.join(app.static_folder, 'build')}")
+        click.echo("Restart the app to serve them")
+    
+    @app.cli.command('import-results')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--user', 'username', default='admin', help='Username recorded as the events\' creator.')
+    @click.option('--format', 'file_format', type=click.Choice(['csv', 'ndjson', 'json']), help='Defaults to the file extension.')
+    @click.option('--dry-run', is_flag=True, help='Validate only, write nothing.')
+    def import_results_command(path, username, file_format, dry_run):
+        """Bulk import events and participants from a results file"""
+        from utils.importer import detect_format, import_results, iter_rows
+        
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"Unknown user: {username}")
+        file_format = detect_format(path, requested=file_format)
+        if file_format is None:
+            raise click.ClickException("Cannot tell the file format; pass --format")
+        
+        with open(path, 'rb') as stream:
+            report = import_results(iter_rows(stream, file_format), user.id, dry_run=dry_run)
+        
+        for row_number, message in report.errors:
+            click.echo(f"⚠ Row {row_number}: {message}")
+        verb = "Would create" if dry_run else "Created"
+        click.echo(f"✓ Read {report.rows_read} rows. {verb} {report.events_created} events "
+                   f"and {report.participants_created} participants ({len(report.errors)} rows rejected)")
     
     return app
 
+def configure_engine_options(app):
+    """
+    Size the per-worker connection pool for file-backed SQLite databases
+    
+    Under gevent the pool's locks are cooperative, so a greenlet waiting for
+    a connection lets the others run, and the overflow is raised to cover
+    the many requests one worker has in flight.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not uri.startswith('sqlite') or ':memory:' in uri or uri.rstrip('/') == 'sqlite:':
+        return
+    overflow = 'SQLITE_GEVENT_POOL_OVERFLOW' if is_cooperative() else 'SQLITE_POOL_OVERFLOW'
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    options.setdefault('pool_size', app.config['SQLITE_POOL_SIZE'])
+    options.setdefault('max_overflow', app.config[overflow])
+    options.setdefault('pool_timeout', app.config['SQLITE_POOL_TIMEOUT'])
+
+def report_sqlite_pragmas(app):
+    """Print the pragmas actually in effect, which may differ from the profile"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    actual = read_sqlite_pragmas(db.engine, pragmas.keys())
+    if actual:
+        print("✓ SQLite pragmas: " + ", ".join(f"{name}={value}" for name, value in actual.items()))
+
+def bootstrap_database():
+    """
+    Create missing tables and indexes, then the default data
+    
+    Safe to run on every deploy: existing tables, rows and indexes are left
+    alone. Runs inside an app context, once per database rather than in
+    every process that builds the app.
+    """
+    db.create_all()
+    for name in ensure_indexes():
+        print(f"✓ Created index {name}")
+    init_database()
+    
+    # Winner-list rows for events written by older versions
+    from models import EventResult
+    built = EventResult.fill_missing()
+    if built:
+        print(f"✓ Built stored results for {built} events")
+
 def init_database():
     """Initialize database with default data"""
-    from models import User, Cluster, Event, Participant
+    from models import User, Cluster, ClusterTotal, Event, Participant
     
     # Check if clusters already exist
     if Cluster.query.count() == 0:
@@ -121,16 +254,34 @@ def init_database():
                 for participant in participants:
                     db.session.add(participant)
                 
+                points_delta = {}
+                for participant in participants:
+                    points_delta[participant.cluster_id] = points_delta.get(participant.cluster_id, 0) + participant.points
+                ClusterTotal.apply_deltas(points_delta)
                 db.session.commit()
                 print("✓ Created sample test event with participants")
+    
+    # Backfill materialized totals for databases created before cluster_totals existed
+    if ClusterTotal.query.count() < Cluster.query.count():
+        ClusterTotal.rebuild()
+        print("✓ Rebuilt cluster totals from participant points")
 
-# Create the app instance for Gunicorn
-app = create_app()
-
-# Alternative name for some deployment platforms
-application = app
+def __getattr__(name):
+    # Build the app instance for Gunicorn (`app:app`), and the alternative
+    # name some deployment platforms use, on first access rather than at
+    # import, so importing create_app or a helper builds nothing
+    if name in ('app', 'application'):
+        global app, application
+        app = application = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
+    app = create_app()
+    # The development server sets up its own database on first run
+    with app.app_context():
+        bootstrap_database()
+    
     print("\n" + "="*50)
     print("Event Scoring System")
     print("="*50)
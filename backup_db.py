@@ -3,35 +3,271 @@
 Database Backup Script for Event Scoring System
 
 This script creates a timestamped backup of the SQLite database.
+
+Backups are taken with SQLite's online backup API, a few pages at a time
+with a short pause between steps, so the live database stays available to
+writers while a backup runs. Each copy is checked with PRAGMA
+integrity_check, gzip-compressed, and old backups are pruned according to
+the retention settings below.
 """
 
+import gzip
+import json
 import os
 import shutil
-from datetime import datetime
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+DB_PATH = 'instance/event_scoring.db'
+BACKUP_DIR = 'instance/backups'
+BACKUP_PREFIX = 'event_scoring_backup_'
+# Written beside each backup with the id of its newest change_journal entry
+JOURNAL_ID_SUFFIX = '.json'
+
+# Pages copied per backup step and pause between steps
+BACKUP_PAGES_PER_STEP = int(os.environ.get('BACKUP_PAGES_PER_STEP', 256))
+BACKUP_STEP_SLEEP_MS = int(os.environ.get('BACKUP_STEP_SLEEP_MS', 10))
+# Give up on stepping after this many restarts caused by concurrent writes
+# and copy the rest in a single step
+BACKUP_MAX_RESTARTS = int(os.environ.get('BACKUP_MAX_RESTARTS', 3))
+
+# Retention: keep the newest BACKUP_KEEP backups, and drop any older than
+# BACKUP_MAX_AGE_DAYS (0 keeps them regardless of age)
+BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', 14))
+BACKUP_MAX_AGE_DAYS = int(os.environ.get('BACKUP_MAX_AGE_DAYS', 0))
+
+BACKUP_COMPRESS = os.environ.get('BACKUP_COMPRESS', 'true').lower() == 'true'
+
+
+class BackupRestarted(Exception):
+    """Raised from the progress callback to abandon an incremental backup"""
+
+
+def _is_backup_file(filename):
+    return filename.startswith(BACKUP_PREFIX) and filename.endswith(('.db', '.db.gz'))
+
+
+def copy_database(source_path, dest_path, pages=BACKUP_PAGES_PER_STEP,
+                  step_sleep=BACKUP_STEP_SLEEP_MS / 1000, max_restarts=BACKUP_MAX_RESTARTS,
+                  standalone=True):
+    """
+    Copy a live SQLite database with the online backup API
+    
+    Each step holds the source read lock only while copying `pages` pages,
+    then sleeps for `step_sleep` seconds. A write from another connection
+    restarts an incremental backup; after `max_restarts` restarts the rest
+    is copied in one step so a busy database still gets backed up.
+    
+    Args:
+        source_path: Path of the live database
+        dest_path: Path of the copy to create (overwritten)
+        standalone: Switch the copy out of WAL mode so it is a single file
+    """
+    source = sqlite3.connect(source_path, timeout=30)
+    dest = sqlite3.connect(dest_path)
+    try:
+        restarts = 0
+        last_remaining = None
+        
+        def progress(status, remaining, total):
+            nonlocal restarts, last_remaining
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > max_restarts:
+                    raise BackupRestarted()
+            last_remaining = remaining
+            if remaining and step_sleep:
+                time.sleep(step_sleep)
+        
+        try:
+            source.backup(dest, pages=pages, progress=progress)
+        except BackupRestarted:
+            source.backup(dest, pages=-1)
+        
+        if standalone:
+            dest.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        dest.close()
+        source.close()
+
+
+def _extract_backup(backup_path, work_path):
+    """Write the plain database for a (possibly compressed) backup to work_path"""
+    if backup_path.endswith('.gz'):
+        with gzip.open(backup_path, 'rb') as source, open(work_path, 'wb') as dest:
+            shutil.copyfileobj(source, dest)
+    else:
+        shutil.copyfile(backup_path, work_path)
+
+
+def verify_database(path):
+    """Return True if PRAGMA integrity_check passes for the database at path"""
+    connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        result = connection.execute('PRAGMA integrity_check').fetchall()
+    finally:
+        connection.close()
+    return result == [('ok',)]
 
-def backup_database():
-    """Create a backup of the SQLite database with timestamp"""
+
+def prune_backups(backup_dir=BACKUP_DIR, keep=BACKUP_KEEP, max_age_days=BACKUP_MAX_AGE_DAYS):
+    """
+    Delete backups outside the retention policy
+    
+    The newest backup is always kept.
+    
+    Returns:
+        List of filenames that were removed
+    """
+    if not os.path.exists(backup_dir):
+        return []
     
-    # Database paths
-    db_path = 'instance/event_scoring.db'
-    backup_dir = 'instance/backups'
+    # Names embed the timestamp, so they sort oldest first
+    backups = sorted(f for f in os.listdir(backup_dir) if _is_backup_file(f))
+    expired = set(backups[:-keep] if keep > 0 else [])
+    if max_age_days > 0:
+        cutoff = time.time() - timedelta(days=max_age_days).total_seconds()
+        for backup in backups[:-1]:
+            if os.path.getmtime(os.path.join(backup_dir, backup)) < cutoff:
+                expired.add(backup)
+    
+    removed = []
+    for backup in sorted(expired):
+        os.remove(os.path.join(backup_dir, backup))
+        if os.path.exists(os.path.join(backup_dir, backup + JOURNAL_ID_SUFFIX)):
+            os.remove(os.path.join(backup_dir, backup + JOURNAL_ID_SUFFIX))
+        removed.append(backup)
+    return removed
+
+
+def _database_journal_id(path):
+    """Return the id of the newest journal entry in the database at path (0 if empty), or None without a journal"""
+    connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        tail = _journal_tail(connection)
+    finally:
+        connection.close()
+    return None if tail is None else tail[0]
+
+
+def _write_journal_id(backup_path, journal_id):
+    """Record a backup's journal tail next to it, so it can be read without decompressing"""
+    with open(backup_path + JOURNAL_ID_SUFFIX, 'w') as f:
+        json.dump({'journal_id': journal_id}, f)
+
+
+def _backup_journal_id(backup_dir, backup):
+    """
+    Return the journal tail recorded for a backup, or None if it predates the journal
+    
+    Backups taken before tails were recorded are read once and get their
+    record written then.
+    """
+    backup_path = os.path.join(backup_dir, backup)
+    try:
+        with open(backup_path + JOURNAL_ID_SUFFIX) as f:
+            return json.load(f)['journal_id']
+    except (OSError, ValueError, KeyError):
+        pass
+    fd, work_path = tempfile.mkstemp(prefix='.trim_', suffix='.db', dir=backup_dir)
+    os.close(fd)
+    try:
+        _extract_backup(backup_path, work_path)
+        journal_id = _database_journal_id(work_path)
+    finally:
+        os.remove(work_path)
+    _write_journal_id(backup_path, journal_id)
+    return journal_id
+
+
+def trim_journal(db_path=DB_PATH, backup_dir=BACKUP_DIR):
+    """
+    Delete change_journal entries that no kept backup needs for recovery
+    
+    Recovery replays the entries after a backup's journal tail, so entries
+    below the lowest tail among the kept backups are never used again. Each
+    tail entry itself stays: recovery matches it against the live journal
+    to check the backup shares its history, and keeping the newest entry
+    stops SQLite from reusing ids. Nothing is trimmed while any kept backup
+    predates the journal, or when there are no backups. Tails come from
+    the record written beside each backup when it was taken.
+    
+    Returns:
+        Number of journal entries deleted
+    """
+    if not os.path.exists(db_path) or not os.path.exists(backup_dir):
+        return 0
+    backups = [f for f in os.listdir(backup_dir) if _is_backup_file(f)]
+    if not backups:
+        return 0
+    
+    lowest = None
+    for backup in backups:
+        journal_id = _backup_journal_id(backup_dir, backup)
+        if journal_id is None:
+            return 0
+        lowest = journal_id if lowest is None else min(lowest, journal_id)
+    
+    connection = sqlite3.connect(db_path, timeout=30)
+    try:
+        if _journal_tail(connection) is None:
+            return 0
+        with connection:
+            return connection.execute('DELETE FROM change_journal WHERE id < ?', (lowest,)).rowcount
+    finally:
+        connection.close()
+
+
+def backup_database(db_path=DB_PATH, backup_dir=BACKUP_DIR, compress=BACKUP_COMPRESS,
+                    keep=BACKUP_KEEP, max_age_days=BACKUP_MAX_AGE_DAYS):
+    """
+    Create a verified, timestamped backup of the SQLite database
+    
+    Returns:
+        Path of the new backup, or None if it failed
+    """
     
     # Check if database exists
     if not os.path.exists(db_path):
         print(f"❌ Error: Database file not found at {db_path}")
-        return False
+        return None
     
     # Create backup directory if it doesn't exist
     os.makedirs(backup_dir, exist_ok=True)
     
     # Generate timestamp
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_filename = f'event_scoring_backup_{timestamp}.db'
-    backup_path = os.path.join(backup_dir, backup_filename)
+    extension = '.db.gz' if compress else '.db'
+    backup_path = os.path.join(backup_dir, f'{BACKUP_PREFIX}{timestamp}{extension}')
+    suffix = 1
+    while os.path.exists(backup_path):
+        backup_path = os.path.join(backup_dir, f'{BACKUP_PREFIX}{timestamp}_{suffix}{extension}')
+        suffix += 1
+    
+    # Work in a hidden file so a failed run never looks like a backup
+    fd, work_path = tempfile.mkstemp(prefix='.backup_', suffix='.db', dir=backup_dir)
+    os.close(fd)
     
     try:
-        # Copy database file
-        shutil.copy2(db_path, backup_path)
+        started = time.monotonic()
+        copy_database(db_path, work_path)
+        
+        if not verify_database(work_path):
+            print(f"❌ Error: Backup failed integrity check, discarded")
+            return None
+        
+        journal_id = _database_journal_id(work_path)
+        
+        if compress:
+            with open(work_path, 'rb') as source, gzip.open(work_path + '.gz', 'wb') as dest:
+                shutil.copyfileobj(source, dest)
+            os.replace(work_path + '.gz', backup_path)
+        else:
+            os.replace(work_path, backup_path)
+        _write_journal_id(backup_path, journal_id)
         
         # Get file size
         file_size = os.path.getsize(backup_path)
@@ -40,30 +276,38 @@ def backup_database():
         print(f"✓ Database backup created successfully!")
         print(f"  Location: {backup_path}")
         print(f"  Size: {file_size_kb:.2f} KB")
+        print(f"  Duration: {time.monotonic() - started:.2f}s")
         print(f"  Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
+        removed = prune_backups(backup_dir, keep, max_age_days)
+        for backup in removed:
+            print(f"  Removed old backup: {backup}")
+        trimmed = trim_journal(db_path, backup_dir)
+        if trimmed:
+            print(f"  Trimmed {trimmed} change journal entries")
+        
         # List all backups
-        backups = sorted([f for f in os.listdir(backup_dir) if f.endswith('.db')])
+        backups = [f for f in os.listdir(backup_dir) if _is_backup_file(f)]
         print(f"\n📁 Total backups: {len(backups)}")
         
-        if len(backups) > 5:
-            print(f"⚠️  You have {len(backups)} backups. Consider cleaning up old backups.")
-        
-        return True
-        
+        return backup_path
+    
     except Exception as e:
         print(f"❌ Error creating backup: {str(e)}")
-        return False
+        return None
+    finally:
+        for path in (work_path, work_path + '.gz'):
+            if os.path.exists(path):
+                os.remove(path)
 
-def list_backups():
+def list_backups(backup_dir=BACKUP_DIR):
     """List all available backups"""
-    backup_dir = 'instance/backups'
     
     if not os.path.exists(backup_dir):
         print("No backups found.")
         return
     
-    backups = sorted([f for f in os.listdir(backup_dir) if f.endswith('.db')])
+    backups = sorted([f for f in os.listdir(backup_dir) if _is_backup_file(f)])
     
     if not backups:
         print("No backups found.")
@@ -78,29 +322,339 @@ def list_backups():
         print(f"    Size: {file_size:.2f} KB")
         print(f"    Created: {mod_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
 
-def restore_backup(backup_filename):
-    """Restore database from a backup"""
-    db_path = 'instance/event_scoring.db'
-    backup_path = os.path.join('instance/backups', backup_filename)
+def restore_backup(backup_filename, db_path=DB_PATH, backup_dir=BACKUP_DIR):
+    """
+    Restore database from a backup
+    
+    The backup is verified first and then copied into the live database
+    with the backup API, which takes SQLite's locks, so a running app sees
+    either the old or the restored data, never a half-written file.
+    """
+    backup_path = os.path.join(backup_dir, backup_filename)
     
     if not os.path.exists(backup_path):
         print(f"❌ Error: Backup file not found: {backup_filename}")
         return False
     
-    # Create a backup of current database before restoring
-    if os.path.exists(db_path):
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        temp_backup = f'instance/event_scoring_before_restore_{timestamp}.db'
-        shutil.copy2(db_path, temp_backup)
-        print(f"✓ Current database backed up to: {temp_backup}")
+    fd, work_path = tempfile.mkstemp(prefix='.restore_', suffix='.db', dir=backup_dir)
+    os.close(fd)
     
     try:
-        shutil.copy2(backup_path, db_path)
+        _extract_backup(backup_path, work_path)
+        
+        if not verify_database(work_path):
+            print(f"❌ Error: Backup failed integrity check: {backup_filename}")
+            return False
+        
+        # Create a backup of current database before restoring
+        if os.path.exists(db_path):
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            temp_backup = os.path.join(os.path.dirname(db_path), f'event_scoring_before_restore_{timestamp}.db')
+            copy_database(db_path, temp_backup)
+            print(f"✓ Current database backed up to: {temp_backup}")
+            
+            # Workers must drop pages cached from the data being replaced
+            connection = sqlite3.connect(work_path)
+            try:
+                connection.execute('ATTACH DATABASE ? AS live', (db_path,))
+                _advance_cache_generation(connection)
+                connection.commit()
+                connection.execute('DETACH DATABASE live')
+            finally:
+                connection.close()
+        
+        # The app's pragma profile puts the live database back in WAL mode
+        copy_database(work_path, db_path, pages=-1, standalone=False)
         print(f"✓ Database restored successfully from: {backup_filename}")
         return True
     except Exception as e:
         print(f"❌ Error restoring backup: {str(e)}")
         return False
+    finally:
+        if os.path.exists(work_path):
+            os.remove(work_path)
+
+
+def _advance_cache_generation(connection):
+    """
+    Move the cache generation of the main database past the one attached as live
+    
+    Workers have cached pages and issued ETags for every generation up to
+    the live one. Continuing from the older generation of a backup would
+    make later writes reuse those numbers and revive stale pages.
+    """
+    tables = {schema: bool(connection.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = 'cache_generation'"
+    ).fetchone()) for schema in ('main', 'live')}
+    if not tables['main']:
+        return
+    generations = ['SELECT generation FROM main.cache_generation']
+    if tables['live']:
+        generations.append('SELECT generation FROM live.cache_generation')
+    newest = connection.execute(
+        f"SELECT COALESCE(MAX(generation), 0) FROM ({' UNION ALL '.join(generations)})"
+    ).fetchone()[0]
+    connection.execute('DELETE FROM main.cache_generation')
+    connection.execute(
+        'INSERT INTO main.cache_generation (id, generation, updated_at) VALUES (1, ?, ?)',
+        (newest + 1, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f'))
+    )
+
+
+def _journal_tail(connection, schema='main'):
+    """Return (id, timestamp, data) of the newest journal entry, (0, None, None) if empty, or None without a journal"""
+    if not connection.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = 'change_journal'"
+    ).fetchone():
+        return None
+    row = connection.execute(
+        f"SELECT id, timestamp, data FROM {schema}.change_journal ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+    return row or (0, None, None)
+
+
+def _apply_journal_entry(connection, columns, table_name, operation, row_id, data):
+    """Apply one change_journal entry to the main database of connection"""
+    if operation == 'delete':
+        connection.execute(f'DELETE FROM {table_name} WHERE id = ?', (row_id,))
+        return
+    # Columns the snapshot does not know about are dropped
+    values = {name: value for name, value in json.loads(data).items() if name in columns[table_name]}
+    names = ', '.join(values)
+    if operation == 'insert':
+        placeholders = ', '.join('?' for _ in values)
+        connection.execute(f'INSERT OR REPLACE INTO {table_name} ({names}) VALUES ({placeholders})',
+                           list(values.values()))
+    else:
+        assignments = ', '.join(f'{name} = ?' for name in values)
+        connection.execute(f'UPDATE {table_name} SET {assignments} WHERE id = ?',
+                           list(values.values()) + [row_id])
+
+
+def recover_database(target, db_path=DB_PATH, backup_dir=BACKUP_DIR):
+    """
+    Rebuild the database as it was at `target` (naive UTC datetime)
+    
+    Starts from the newest backup that holds no changes after target and
+    replays the live database's change_journal onto it up to target. Cluster
+    totals are recomputed, activity logs written since the backup are kept,
+    and the cache generation is advanced so every worker drops cached pages.
+    The current database is saved next to it before being replaced.
+    
+    Returns:
+        Number of journal entries replayed, or None if recovery failed
+    """
+    if not os.path.exists(db_path):
+        print(f"❌ Error: Database file not found at {db_path}")
+        return None
+    
+    target_text = target.strftime('%Y-%m-%d %H:%M:%S.%f')
+    backups = sorted((f for f in os.listdir(backup_dir) if _is_backup_file(f)), reverse=True) \
+        if os.path.exists(backup_dir) else []
+    
+    fd, work_path = tempfile.mkstemp(prefix='.recover_', suffix='.db', dir=os.path.dirname(db_path) or '.')
+    os.close(fd)
+    
+    try:
+        connection = None
+        snapshot = None
+        for backup in backups:
+            _extract_backup(os.path.join(backup_dir, backup), work_path)
+            connection = sqlite3.connect(work_path)
+            connection.execute('ATTACH DATABASE ? AS live', (db_path,))
+            tail = _journal_tail(connection)
+            if tail is None:
+                # Taken before the journal existed; older backups will not have it either
+                connection.close()
+                break
+            snapshot_id, snapshot_time, snapshot_data = tail
+            live_entry = connection.execute(
+                'SELECT timestamp, data FROM live.change_journal WHERE id = ?', (snapshot_id,)
+            ).fetchone() if snapshot_id else None
+            # The backup must predate the target and share the live database's
+            # history (a backup from before an earlier recovery may not)
+            if (snapshot_time is None or snapshot_time <= target_text) and \
+                    (not snapshot_id or live_entry == (snapshot_time, snapshot_data)):
+                snapshot = backup
+                break
+            connection.close()
+            connection = None
+        
+        if snapshot is None:
+            print(f"❌ Error: No backup with a change journal from before {target_text} UTC")
+            return None
+        
+        # Tables and indexes added since the backup was taken
+        missing = connection.execute(
+            "SELECT sql FROM live.sqlite_master WHERE type IN ('table', 'index') AND sql IS NOT NULL "
+            "AND name NOT IN (SELECT name FROM main.sqlite_master) ORDER BY type DESC"
+        ).fetchall()
+        for (sql,) in missing:
+            connection.execute(sql)
+        
+        # Replayed rows are copied into the journal verbatim, so the
+        # triggers must not add entries of their own
+        triggers = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'journal_%'"
+        ).fetchall()
+        for (name,) in triggers:
+            connection.execute(f'DROP TRIGGER "{name}"')
+        
+        # Columns of every journaled table the backup has; entries for
+        # tables it predates are skipped
+        columns = {}
+        for (table_name,) in connection.execute('SELECT DISTINCT table_name FROM live.change_journal'):
+            table_columns = {row[0] for row in connection.execute(
+                'SELECT name FROM main.pragma_table_info(?)', (table_name,)
+            )}
+            if table_columns:
+                columns[table_name] = table_columns
+        
+        replayed = 0
+        entries = connection.execute(
+            'SELECT id, timestamp, table_name, operation, row_id, data FROM live.change_journal '
+            'WHERE id > ? ORDER BY id', (snapshot_id,)
+        ).fetchall()
+        for entry in entries:
+            entry_id, timestamp, table_name, operation, row_id, data = entry
+            if timestamp > target_text:
+                break
+            if table_name not in columns:
+                continue
+            _apply_journal_entry(connection, columns, table_name, operation, row_id, data)
+            connection.execute(
+                'INSERT INTO change_journal (id, timestamp, table_name, operation, row_id, data) '
+                'VALUES (?, ?, ?, ?, ?, ?)', entry
+            )
+            replayed += 1
+        
+        # Triggers as the live database has them, including any for tables
+        # added since the backup
+        for (sql,) in connection.execute(
+            "SELECT sql FROM live.sqlite_master WHERE type = 'trigger' AND name LIKE 'journal_%'"
+        ).fetchall():
+            connection.execute(sql)
+        
+        # Keep the audit trail, including the writes being undone. Users the
+        # kept logs or the replayed events refer to but the target point
+        # lacks (created later, or before users were journaled) come along.
+        carried_logs = ('SELECT id, user_id, action, details, timestamp FROM live.activity_logs '
+                        'WHERE id > (SELECT COALESCE(MAX(id), 0) FROM activity_logs)')
+        user_columns = ', '.join(row[0] for row in connection.execute(
+            'SELECT name FROM main.pragma_table_info(?) '
+            'WHERE name IN (SELECT name FROM live.pragma_table_info(?))', ('users', 'users')
+        ))
+        connection.execute(
+            f'INSERT OR IGNORE INTO users ({user_columns}) SELECT {user_columns} FROM live.users '
+            f'WHERE id NOT IN (SELECT id FROM users) AND (id IN (SELECT user_id FROM ({carried_logs})) '
+            f'OR id IN (SELECT created_by FROM events))'
+        )
+        connection.execute(
+            f'INSERT INTO activity_logs (id, user_id, action, details, timestamp) {carried_logs}'
+        )
+        
+        # Derived tables; event results are rebuilt afterwards by rebuild_event_results()
+        if connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'event_results'").fetchone():
+            connection.execute('DELETE FROM event_results')
+        connection.execute('DELETE FROM cluster_totals')
+        connection.execute(
+            'INSERT INTO cluster_totals (cluster_id, total_points) '
+            'SELECT clusters.id, COALESCE(SUM(participants.points), 0) FROM clusters '
+            'LEFT JOIN participants ON participants.cluster_id = clusters.id GROUP BY clusters.id'
+        )
+        _advance_cache_generation(connection)
+        connection.commit()
+        connection.execute('DETACH DATABASE live')
+        connection.close()
+        
+        if not verify_database(work_path):
+            print(f"❌ Error: Recovered database failed integrity check, live database untouched")
+            return None
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        temp_backup = os.path.join(os.path.dirname(db_path), f'event_scoring_before_recover_{timestamp}.db')
+        copy_database(db_path, temp_backup)
+        print(f"✓ Current database backed up to: {temp_backup}")
+        
+        copy_database(work_path, db_path, pages=-1, standalone=False)
+        print(f"✓ Database recovered to {target_text} UTC")
+        print(f"  Snapshot: {snapshot}")
+        print(f"  Changes replayed: {replayed}")
+        return replayed
+    except Exception as e:
+        print(f"❌ Error recovering database: {str(e)}")
+        return None
+    finally:
+        if os.path.exists(work_path):
+            os.remove(work_path)
+
+
+def rebuild_event_results():
+    """
+    Build the winner-list rows a recovery cleared, with the app's own code
+    
+    Public pages only read stored results, so this runs right after a
+    recovery and refreshes cached pages once the rows are back.
+    """
+    from app import app
+    from models import EventResult, db
+    from utils.cache import invalidate_public_pages
+    with app.app_context():
+        built = EventResult.fill_missing()
+        invalidate_public_pages()
+        db.session.commit()
+    print(f"✓ Rebuilt stored results for {built} events")
+    return built
+
+
+def parse_recovery_time(text):
+    """
+    Parse a recovery target into a naive UTC datetime
+    
+    Accepts a relative time such as '2m', '90s', '1h' or '1d' (before now),
+    or an ISO date/time in local time such as '2024-03-01 14:05'.
+    """
+    units = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}
+    text = text.strip()
+    if text[:-1].isdigit() and text[-1:] in units:
+        return datetime.utcnow() - timedelta(**{units[text[-1]]: int(text[:-1])})
+    local = datetime.fromisoformat(text)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class BackupScheduler:
+    """
+    Background thread that takes a backup every `interval` seconds
+    
+    Meant to run once per deployment in its own process, `python
+    backup_db.py schedule <hours>` (gunicorn.conf.py starts one). Never
+    start it in a process that forks, such as the gunicorn master: a child
+    forked while a backup holds a SQLite, gzip or stdout lock inherits the
+    lock and can deadlock.
+    """
+    
+    def __init__(self, interval, db_path=DB_PATH, backup_dir=BACKUP_DIR):
+        self.interval = interval
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='backup-scheduler', daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self, timeout=None):
+        self._stopping.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+    
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                backup_database(self.db_path, self.backup_dir)
+            except Exception as e:
+                print(f"❌ Scheduled backup failed: {str(e)}")
 
 if __name__ == '__main__':
     import sys
@@ -113,10 +667,32 @@ if __name__ == '__main__':
         elif command == 'restore' and len(sys.argv) > 2:
             backup_filename = sys.argv[2]
             restore_backup(backup_filename)
+        elif command == 'prune':
+            for backup in prune_backups():
+                print(f"✓ Removed {backup}")
+            print(f"✓ Trimmed {trim_journal()} change journal entries")
+        elif command == 'recover' and len(sys.argv) > 2:
+            recovered = recover_database(parse_recovery_time(' '.join(sys.argv[2:])))
+            if recovered is not None:
+                rebuild_event_results()
+            sys.exit(0 if recovered is not None else 1)
+        elif command == 'schedule' and len(sys.argv) > 2:
+            hours = float(sys.argv[2])
+            print(f"✓ Backing up every {hours:g} hours (Ctrl+C to stop)")
+            backup_database()
+            scheduler = BackupScheduler(hours * 3600).start()
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                scheduler.stop()
         else:
             print("Usage:")
             print("  python backup_db.py           - Create a new backup")
             print("  python backup_db.py list      - List all backups")
             print("  python backup_db.py restore <filename> - Restore from backup")
+            print("  python backup_db.py prune     - Delete backups outside the retention policy and trim the change journal")
+            print("  python backup_db.py recover <when> - Rewind to a time, e.g. '2m' ago or '2024-03-01 14:05'")
+            print("  python backup_db.py schedule <hours> - Back up every <hours> hours")
     else:
-        backup_database()
+        sys.exit(0 if backup_database() else 1)
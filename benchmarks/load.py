@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+"""
+Load test for the public and management pages
+
+Seeds a fresh SQLite database with a reproducible set of events, then
+drives the leaderboard, winner list, event management list and the event
+create/edit forms through the Flask test client and, with --gunicorn,
+through a real local gunicorn server. Reports p50/p95/p99 latency,
+requests per second and SQL statements per request (test client only),
+and exits non-zero when a result regresses past the stored baseline.
+
+With --viewers, that many live leaderboard streams are held open against
+gunicorn for the whole run, as browser tabs left on the leaderboard would,
+so sync and gevent workers can be compared under concurrent viewers.
+
+    python -m benchmarks.load                      # test client
+    python -m benchmarks.load --gunicorn           # test client and gunicorn
+    python -m benchmarks.load --update-baseline    # store these results
+    python -m benchmarks.load --gunicorn --worker-class gevent --viewers 200
+"""
+
+from urllib.error import HTTPError, URLError
+from collections import namedtuple
+import argparse
+import gzip
+import http.cookiejar
+import json
+import math
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+SCENARIOS = ('leaderboard', 'events', 'manage_events', 'create_event', 'edit_event')
+# Scenarios that run as the logged-in benchmark user
+MANAGER_SCENARIOS = ('manage_events', 'create_event', 'edit_event')
+
+# p95 growth smaller than this is scheduling noise, whatever the ratio
+MIN_P95_GROWTH_MS = 5
+
+WORKER_CLASSES = ('sync', 'gevent')
+
+CSRF_TOKEN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+Reply = namedtuple('Reply', 'status body location')
+
+
+class ClientSession:
+    """One browser's worth of requests through the Flask test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data, headers={'Accept-Encoding': 'gzip'})
+        body = response.get_data()
+        if response.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return Reply(response.status_code, body.decode('utf-8', 'replace'), response.headers.get('Location'))
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Time the POST itself, not the page it redirects to
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """One browser's worth of requests over HTTP, with its own cookie jar"""
+
+    timeout = 30  # gunicorn's own worker timeout
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect)
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data, doseq=True).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method,
+                                         headers={'Accept-Encoding': 'gzip'})
+        try:
+            response = self.opener.open(request, timeout=self.timeout)
+        except HTTPError as e:
+            response = e
+        except (URLError, OSError):
+            # No answer in time, e.g. every worker is held by a stream
+            return Reply(None, '', None)
+        with response:
+            try:
+                body = response.read()
+            except OSError:
+                return Reply(None, '', None)
+            if response.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            return Reply(response.status, body.decode('utf-8', 'replace'), response.headers.get('Location'))
+
+
+class ClientTarget:
+    """
+    The app in this process, counting SQL statements issued while serving
+
+    Requests run on the thread that created the target; statements from
+    background threads (the activity log writer) are not counted, since
+    their batching makes the count vary from run to run.
+    """
+
+    name = 'client'
+    viewers = None  # Streams never end in-process, so no background viewers
+
+    def __init__(self, app):
+        from sqlalchemy import event as sa_event
+        from models import db
+
+        self.app = app
+        self.statements = 0
+        self.thread_id = threading.get_ident()
+        with app.app_context():
+            self.engine = db.engine
+        sa_event.listen(self.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        if threading.get_ident() == self.thread_id:
+            self.statements += 1
+
+    def session(self):
+        return ClientSession(self.app)
+
+    def close(self):
+        from sqlalchemy import event as sa_event
+        sa_event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+class StreamViewers:
+    """
+    Live leaderboard streams held open in the background
+
+    Each viewer is a thread that keeps /leaderboard/stream open and
+    reconnects whenever the server ends the stream, like a browser tab left
+    on the leaderboard. `streaming` counts the viewers whose stream is
+    currently being answered. A viewer whose stream is refused (sync
+    workers answer 204) stops, as EventSource does, and counts in `refused`.
+    """
+
+    def __init__(self, host, port, count):
+        self.address = (host, port)
+        self.count = count
+        self.streaming = 0
+        self.refused = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = [threading.Thread(target=self._watch, daemon=True) for _ in range(count)]
+        for thread in self._threads:
+            thread.start()
+
+    def _watch(self):
+        request = (f'GET /leaderboard/stream HTTP/1.1\r\nHost: {self.address[0]}\r\n'
+                   'Accept: text/event-stream\r\n\r\n').encode()
+        while not self._stopping.is_set():
+            answered = False
+            try:
+                with socket.create_connection(self.address, timeout=5) as sock:
+                    sock.sendall(request)
+                    sock.settimeout(0.5)
+                    while not self._stopping.is_set():
+                        try:
+                            data = sock.recv(65536)
+                        except socket.timeout:
+                            continue
+                        if not data:
+                            break
+                        if not answered:
+                            if not data.startswith(b'HTTP/1.1 200'):
+                                with self._lock:
+                                    self.refused += 1
+                                return
+                            answered = True
+                            with self._lock:
+                                self.streaming += 1
+            except OSError:
+                self._stopping.wait(0.5)
+            finally:
+                if answered:
+                    with self._lock:
+                        self.streaming -= 1
+
+    def wait(self, timeout=10):
+        """Wait until every viewer is streaming or refused, or timeout seconds pass"""
+        deadline = time.monotonic() + timeout
+        while self.streaming + self.refused < self.count and time.monotonic() < deadline:
+            time.sleep(0.1)
+        return self.streaming
+
+    def close(self):
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(5)
+
+
+class GunicornTarget:
+    """
+    A local gunicorn server on its own copy of the seeded database
+
+    Args:
+        database_path: SQLite file the server uses
+        workers: Worker processes
+        worker_class: 'sync' or 'gevent', passed as GUNICORN_WORKER_CLASS
+        viewers: Live leaderboard streams to hold open while it is measured
+    """
+
+    name = 'gunicorn'
+    statements = None  # Not observable from outside the workers
+
+    def __init__(self, database_path, workers=2, worker_class='sync', viewers=0, startup_timeout=60):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        self.base_url = f'http://127.0.0.1:{port}'
+        self.log_path = database_path + '.gunicorn.log'
+        self.viewers = None
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{database_path}', GUNICORN_WORKER_CLASS=worker_class)
+        with open(self.log_path, 'w') as log:
+            self.process = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+                 '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+                 '--pid', database_path + '.pid', 'app:app'],
+                cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                urllib.request.urlopen(self.base_url + '/leaderboard', timeout=5).close()
+                break
+            except (URLError, ConnectionError, OSError):
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError(f'gunicorn did not start; see {self.log_path}')
+                time.sleep(0.2)
+
+        if viewers:
+            self.viewers = StreamViewers('127.0.0.1', port, viewers)
+            self.viewers.wait()
+
+    def session(self):
+        return HttpSession(self.base_url)
+
+    def close(self):
+        if self.viewers is not None:
+            self.viewers.close()
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+def login(session, username, password):
+    """Log a session in and return a CSRF token for its form posts"""
+    token = CSRF_TOKEN.search(session.request('GET', '/login').body).group(1)
+    reply = session.request('POST', '/login', {'csrf_token': token, 'username': username, 'password': password})
+    if reply.status != 302 or '/login' in (reply.location or ''):
+        raise RuntimeError(f'Could not log in as {username}')
+    # Logging in starts a new session, so take the token from a form page
+    return CSRF_TOKEN.search(session.request('GET', '/manage/events/create').body).group(1)
+
+
+class Scenario:
+    """
+    One kind of request, issued from its own set of sessions
+
+    Args:
+        name: One of SCENARIOS
+        fixtures: Data prepared by prepare_fixtures()
+    """
+
+    def __init__(self, name, fixtures):
+        self.name = name
+        self.fixtures = fixtures
+
+    def start(self, session, index):
+        """Return per-session state for the index-th session of this scenario"""
+        state = {'session': session, 'count': 0}
+        if self.name in MANAGER_SCENARIOS:
+            state['token'] = login(session, self.fixtures['username'], self.fixtures['password'])
+        if self.name == 'edit_event':
+            state['event'] = self.fixtures['edit_events'][index % len(self.fixtures['edit_events'])]
+        return state
+
+    def run(self, state):
+        """Issue one request and return True if it succeeded"""
+        session = state['session']
+        state['count'] += 1
+        if self.name == 'leaderboard':
+            return session.request('GET', '/leaderboard').status == 200
+        if self.name == 'events':
+            return session.request('GET', '/events').status == 200
+        if self.name == 'manage_events':
+            return session.request('GET', '/manage/events/').status == 200
+        if self.name == 'create_event':
+            clusters = self.fixtures['cluster_ids']
+            reply = session.request('POST', '/manage/events/create', {
+                'csrf_token': state['token'],
+                'event_name': f'Load Event {id(state)}-{state["count"]}',
+                'cluster_id[]': clusters,
+                'participant_name[]': [f'Runner {i}' for i in range(len(clusters))],
+                'position[]': list(range(1, len(clusters) + 1)),
+                'points[]': [10 * (len(clusters) - i) for i in range(len(clusters))]
+            })
+            return reply.status == 302 and not (reply.location or '').endswith('/create')
+        if self.name == 'edit_event':
+            event = state['event']
+            # Alternate the winner's points so every edit writes
+            bonus = state['count'] % 2
+            rows = event['participants']
+            reply = session.request('POST', f'/manage/events/{event["id"]}/edit', {
+                'csrf_token': state['token'],
+                'event_name': event['name'],
+                'participant_id[]': [row['id'] for row in rows],
+                'cluster_id[]': [row['cluster_id'] for row in rows],
+                'participant_name[]': [row['name'] for row in rows],
+                'position[]': [row['position'] for row in rows],
+                'points[]': [row['points'] + (bonus if i == 0 else 0) for i, row in enumerate(rows)]
+            })
+            return reply.status == 302 and not (reply.location or '').endswith('/edit')
+        raise ValueError(f'Unknown scenario: {self.name}')
+
+
+def prepare_fixtures(app, username, password, edit_events=8):
+    """Read the IDs the scenarios need from the seeded database"""
+    from models import Cluster, Event, db
+
+    with app.app_context():
+        cluster_ids = db.session.execute(db.select(Cluster.id).order_by(Cluster.id)).scalars().all()
+        events = []
+        for event in Event.query.order_by(Event.id).limit(edit_events):
+            events.append({
+                'id': event.id,
+                'name': event.name,
+                'participants': [
+                    {'id': p.id, 'cluster_id': p.cluster_id, 'name': p.name,
+                     'position': p.position, 'points': p.points}
+                    for p in sorted(event.participants, key=lambda p: p.id)
+                ]
+            })
+    return {'username': username, 'password': password, 'cluster_ids': cluster_ids, 'edit_events': events}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_scenario(target, scenario, requests=200, warmup=20, concurrency=1):
+    """
+    Run one scenario against a target
+
+    Requests are split evenly across `concurrency` sessions, each on its
+    own thread. Warm-up requests are not measured.
+
+    Returns:
+        Dict of requests, errors, p50_ms, p95_ms, p99_ms, rps,
+        sql_per_request (None when the target cannot count statements) and
+        streams, the live streams being answered when the run ended (None
+        without background viewers)
+    """
+    states = [scenario.start(target.session(), index) for index in range(concurrency)]
+    for number in range(warmup):
+        scenario.run(states[number % concurrency])
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def drive(state, count):
+        for _ in range(count):
+            started = time.perf_counter()
+            ok = scenario.run(state)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors[0] += 1
+
+    shares = [requests // concurrency + (1 if index < requests % concurrency else 0) for index in range(concurrency)]
+    statements_before = target.statements
+    started = time.perf_counter()
+    if concurrency == 1:
+        drive(states[0], shares[0])
+    else:
+        threads = [threading.Thread(target=drive, args=(state, share)) for state, share in zip(states, shares)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    sql_per_request = None
+    if target.statements is not None and latencies:
+        sql_per_request = round((target.statements - statements_before) / len(latencies), 2)
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'rps': round(len(latencies) / wall, 1) if wall else None,
+        'sql_per_request': sql_per_request,
+        'streams': target.viewers.streaming if target.viewers is not None else None
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    Compare results with a stored baseline
+
+    SQL statements per request are deterministic and must not grow at all.
+    Timings vary between runs, so p95 may grow and throughput may drop by
+    up to `tolerance` (a fraction) before it counts as a regression, and
+    p95 growth under MIN_P95_GROWTH_MS is always allowed.
+
+    Returns:
+        List of human-readable regression messages
+    """
+    regressions = []
+    for target_name, scenarios in results.items():
+        for name, result in scenarios.items():
+            expected = baseline.get(target_name, {}).get(name)
+            if not expected:
+                continue
+            label = f'{target_name}/{name}'
+            if result['sql_per_request'] is not None and expected.get('sql_per_request') is not None \
+                    and result['sql_per_request'] > expected['sql_per_request']:
+                regressions.append(f"{label}: {result['sql_per_request']} SQL/request, baseline {expected['sql_per_request']}")
+            if result['p95_ms'] > max(expected['p95_ms'] * (1 + tolerance), expected['p95_ms'] + MIN_P95_GROWTH_MS):
+                regressions.append(f"{label}: p95 {result['p95_ms']}ms, baseline {expected['p95_ms']}ms")
+            if expected.get('rps') and result['rps'] < expected['rps'] * (1 - tolerance):
+                regressions.append(f"{label}: {result['rps']} req/s, baseline {expected['rps']} req/s")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'target':<10} {'scenario':<15} {'requests':>8} {'errors':>6} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'SQL/req':>8} {'streams':>8}")
+    for target_name, scenarios in results.items():
+        for name, result in scenarios.items():
+            sql = '-' if result['sql_per_request'] is None else result['sql_per_request']
+            streams = '-' if result.get('streams') is None else result['streams']
+            print(f"{target_name:<10} {name:<15} {result['requests']:>8} {result['errors']:>6} "
+                  f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+                  f"{result['rps']:>8} {sql:>8} {streams:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the event scoring app.')
+    parser.add_argument('--events', type=int, default=300, help='Events to seed (default 300).')
+    parser.add_argument('--participants', type=int, default=15, help='Participants per event (default 15).')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the generated data.')
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario.')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per scenario.')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Run only these scenarios.')
+    parser.add_argument('--gunicorn', action='store_true', help='Also run against a local gunicorn.')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (default 2).')
+    parser.add_argument('--worker-class', choices=WORKER_CLASSES, default='sync',
+                        help='gunicorn worker class (default sync).')
+    parser.add_argument('--viewers', type=int, default=0,
+                        help='Live leaderboard streams to hold open against gunicorn (default 0).')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent sessions against gunicorn.')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline file to compare with.')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Allowed p95 growth and throughput drop, as a fraction (default 0.5).')
+    parser.add_argument('--update-baseline', action='store_true', help='Write these results as the baseline.')
+    parser.add_argument('--json', help='Also write the results to this file.')
+    args = parser.parse_args(argv)
+    if args.viewers and not args.gunicorn:
+        parser.error('--viewers needs --gunicorn')
+
+    workdir = tempfile.mkdtemp(prefix='event-scoring-bench-')
+    database_path = os.path.join(workdir, 'bench.db')
+    # Config reads DATABASE_URL when it is imported, so set it before the app loads
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    os.environ.setdefault('BACKUP_INTERVAL_HOURS', '0')
+    sys.path.insert(0, PROJECT_ROOT)
+
+    from app import app, bootstrap_database
+    from backup_db import copy_database
+    from benchmarks.seed import BENCH_PASSWORD, BENCH_USERNAME, seed_database
+
+    started = time.perf_counter()
+    with app.app_context():
+        bootstrap_database()
+        seed_database(args.events, args.participants, args.seed)
+    print(f"✓ Seeded {args.events} events x {args.participants} participants "
+          f"in {time.perf_counter() - started:.1f}s ({database_path})")
+    fixtures = prepare_fixtures(app, BENCH_USERNAME, BENCH_PASSWORD)
+    # gunicorn gets the database as seeded, before the test client writes to it
+    if args.gunicorn:
+        copy_database(database_path, os.path.join(workdir, 'gunicorn.db'), pages=-1)
+
+    settings = {'events': args.events, 'participants': args.participants, 'seed': args.seed,
+                'requests': args.requests, 'workers': args.workers, 'worker_class': args.worker_class,
+                'viewers': args.viewers, 'concurrency': args.concurrency}
+    scenarios = args.scenario or list(SCENARIOS)
+    results = {}
+
+    targets = [('client', lambda: ClientTarget(app), 1)]
+    if args.gunicorn:
+        targets.append(('gunicorn', lambda: GunicornTarget(os.path.join(workdir, 'gunicorn.db'), args.workers,
+                                                           args.worker_class, args.viewers),
+                        args.concurrency))
+    for target_name, make_target, concurrency in targets:
+        target = make_target()
+        try:
+            results[target_name] = {}
+            for name in scenarios:
+                results[target_name][name] = run_scenario(target, Scenario(name, fixtures),
+                                                          args.requests, args.warmup, concurrency)
+        finally:
+            target.close()
+
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': settings, **results}, f, indent=2)
+
+    failed = any(result['errors'] for scenarios in results.values() for result in scenarios.values())
+    if failed:
+        print("✗ Some requests failed")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'settings': settings, **results}, f, indent=2)
+            f.write('\n')
+        print(f"✓ Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != settings:
+            print("⚠ Baseline was recorded with different settings; not comparing")
+        else:
+            regressions = find_regressions(results, baseline, args.tolerance)
+            for message in regressions:
+                print(f"✗ Regression {message}")
+            if regressions:
+                failed = True
+            else:
+                print("✓ No regressions against the baseline")
+    if failed:
+        print(f"Database and gunicorn log kept in {workdir}")
+        return 1
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
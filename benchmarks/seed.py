@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from models import Cluster, ClusterTotal, Event, EventResult, Participant, User, db
+import random
+
+# Event manager the benchmark logs in as
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench-password'
+
+# Participants are inserted in chunks to bound the size of each executemany
+INSERT_CHUNK_SIZE = 5000
+
+
+def seed_database(events=300, participants=15, seed=1):
+    """
+    Insert a reproducible fest's worth of results
+
+    Run inside an app context after bootstrap_database() (`flask init-db`),
+    which creates the clusters. The same arguments always produce the same rows, so runs on
+    different machines or commits measure the same data.
+
+    Args:
+        events: Number of events to add
+        participants: Participants per event, spread over the clusters
+        seed: Seed for the random cluster assignment and points
+
+    Returns:
+        ID of the benchmark user
+    """
+    rng = random.Random(seed)
+    cluster_ids = db.session.execute(db.select(Cluster.id).order_by(Cluster.id)).scalars().all()
+    if not cluster_ids:
+        raise RuntimeError('No clusters; run bootstrap_database() first')
+
+    user = User.query.filter_by(username=BENCH_USERNAME).first()
+    if user is None:
+        user = User(username=BENCH_USERNAME, role='event_manager')
+        user.set_password(BENCH_PASSWORD)
+        db.session.add(user)
+        db.session.flush()
+
+    start = datetime(2024, 1, 1, 9, 0)
+    event_ids = db.session.execute(
+        db.insert(Event).returning(Event.id, sort_by_parameter_order=True),
+        [{'name': f'Bench Event {number}', 'created_by': user.id,
+          'created_at': start + timedelta(minutes=5 * number),
+          'updated_at': start + timedelta(minutes=5 * number)}
+         for number in range(1, events + 1)]
+    ).scalars().all()
+
+    chunk = []
+    for event_id in event_ids:
+        for position in range(1, participants + 1):
+            chunk.append({
+                'event_id': event_id,
+                'cluster_id': rng.choice(cluster_ids),
+                'name': f'Participant {position}',
+                'position': position,
+                'points': max(0, 10 - position) * rng.randint(1, 10)
+            })
+            if len(chunk) >= INSERT_CHUNK_SIZE:
+                db.session.execute(db.insert(Participant), chunk)
+                chunk = []
+    if chunk:
+        db.session.execute(db.insert(Participant), chunk)
+
+    ClusterTotal.rebuild()
+    EventResult.fill_missing()
+    db.session.commit()
+    return user.id
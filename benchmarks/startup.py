@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Cold-start time of the app
+
+Starts fresh interpreters that import the app module, build the app and
+serve /leaderboard requests through the test client, as a newly started
+worker would, and reports the median time of each step and of the first
+request against later ones. The database is initialized once beforehand,
+so the runs measure a restart against an existing database. With
+--warm-up, each run first warms the app as the gunicorn master does
+before forking workers.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --warm-up --runs 20
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in each fresh interpreter; prints its timings as JSON
+PROBE = """
+import json, statistics, sys, time
+started = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+app = module.app
+created = time.perf_counter()
+warmup_ms = None
+if '--warm-up' in sys.argv:
+    from models import db
+    from utils.warmup import warm_up
+    warmup_ms = warm_up(app) * 1000
+    # As gunicorn's post_fork hook does
+    with app.app_context():
+        db.engine.dispose(close=False)
+client = app.test_client()
+timings = []
+for _ in range(LATER_REQUESTS + 1):
+    before = time.perf_counter()
+    status = client.get('/leaderboard').status_code
+    timings.append((time.perf_counter() - before) * 1000)
+    if status != 200:
+        break
+print(json.dumps({'import_ms': (imported - started) * 1000, 'create_ms': (created - imported) * 1000,
+                  'warmup_ms': warmup_ms, 'first_request_ms': timings[0],
+                  'later_request_ms': statistics.median(timings[1:] or timings), 'status': status}))
+"""
+
+# Requests timed after the first, for the steady-state comparison
+LATER_REQUESTS = 20
+
+# Creates the schema and default data before the measured runs
+INIT = """
+from app import app, bootstrap_database
+with app.app_context():
+    bootstrap_database()
+"""
+
+
+def run_python(code, env, *args):
+    completed = subprocess.run([sys.executable, '-c', code, *args], cwd=PROJECT_ROOT, env=env,
+                               capture_output=True, text=True, check=True)
+    return completed.stdout
+
+
+def measure(runs=10, warm_up=False):
+    """
+    Time `runs` cold starts against a freshly initialized database
+
+    The first run fills the template cache in the temporary directory,
+    so later runs start the way a restarted server does.
+
+    Returns:
+        Dict of runs and the median import_ms, create_ms, warmup_ms (None
+        without warm_up), first_request_ms and later_request_ms
+    """
+    workdir = tempfile.mkdtemp(prefix='event-scoring-startup-')
+    try:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+                   METRICS_DIR=os.path.join(workdir, 'metrics'),
+                   JINJA_CACHE_DIR=os.path.join(workdir, 'jinja_cache'))
+        probe = PROBE.replace('LATER_REQUESTS', str(LATER_REQUESTS))
+        args = ['--warm-up'] if warm_up else []
+        run_python(INIT, env)
+        samples = []
+        for _ in range(runs):
+            # The probe prints JSON last, after any startup messages
+            sample = json.loads(run_python(probe, env, *args).strip().splitlines()[-1])
+            if sample['status'] != 200:
+                raise RuntimeError(f"First request answered {sample['status']}")
+            samples.append(sample)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    result = {'runs': runs, 'warmup_ms': None}
+    keys = ('import_ms', 'create_ms', 'first_request_ms', 'later_request_ms') + (('warmup_ms',) if warm_up else ())
+    for key in keys:
+        result[key] = round(statistics.median(sample[key] for sample in samples), 1)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the app\'s cold-start time.')
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters to time (default 10).')
+    parser.add_argument('--warm-up', action='store_true', help='Warm the app before the first request.')
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs, args.warm_up)
+    warmup = '' if result['warmup_ms'] is None else f", warm-up {result['warmup_ms']} ms"
+    print(f"✓ Median over {result['runs']} cold starts: import {result['import_ms']} ms, "
+          f"create_app {result['create_ms']} ms{warmup}")
+    print(f"  First request {result['first_request_ms']} ms, later requests {result['later_request_ms']} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
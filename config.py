@@ -5,6 +5,26 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///event_scoring.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Applied to every SQLite connection, in order. WAL lets readers run
+    # alongside the single writer; busy_timeout makes writers wait for the
+    # lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 16000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_BYTES', 256 * 1024 * 1024)),
+        'temp_store': 'MEMORY'
+    }
+    # Connection pool per worker process (file databases only)
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 5))
+    SQLITE_POOL_OVERFLOW = int(os.environ.get('SQLITE_POOL_OVERFLOW', 5))
+    SQLITE_POOL_TIMEOUT = int(os.environ.get('SQLITE_POOL_TIMEOUT', 10))
+    # A gevent worker serves many requests at once, and greenlets that wait
+    # while holding a connection (streamed exports, logins waiting on a hash)
+    # need more overflow than one sync request at a time ever does
+    SQLITE_GEVENT_POOL_OVERFLOW = int(os.environ.get('SQLITE_GEVENT_POOL_OVERFLOW', 45))
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
@@ -12,3 +32,66 @@ class Config:
     WTF_CSRF_ENABLED = True
     WTF_CSRF_TIME_LIMIT = None
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file upload
+    
+    # On gevent and gthread workers password hashing runs in a small
+    # per-worker pool, and logins beyond it get a 503. Sync workers hash
+    # inline, as the request could not do anything else while waiting. Hashes
+    # made with a different iteration count are upgraded on the next login.
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 600000))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+    # Failed logins allowed per username within the window (seconds); 0 disables
+    LOGIN_MAX_ATTEMPTS = int(os.environ.get('LOGIN_MAX_ATTEMPTS', 5))
+    LOGIN_ATTEMPT_WINDOW = int(os.environ.get('LOGIN_ATTEMPT_WINDOW', 300))
+    # Seconds a verified password is remembered so repeat logins skip PBKDF2; 0 disables
+    LOGIN_CACHE_TTL = int(os.environ.get('LOGIN_CACHE_TTL', 300))
+    
+    # Rows per page on the winner list, event management list and activity logs
+    EVENTS_PAGE_SIZE = int(os.environ.get('EVENTS_PAGE_SIZE', 20))
+    LOGS_PAGE_SIZE = int(os.environ.get('LOGS_PAGE_SIZE', 50))
+    
+    # Activity log entries are batched by a background writer in each worker;
+    # disabled automatically when TESTING is set
+    ACTIVITY_LOG_ASYNC = os.environ.get('ACTIVITY_LOG_ASYNC', 'true').lower() == 'true'
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.environ.get('ACTIVITY_LOG_QUEUE_SIZE', 1000))
+    ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', 50))
+    ACTIVITY_LOG_FLUSH_MS = int(os.environ.get('ACTIVITY_LOG_FLUSH_MS', 200))
+    
+    # Seconds CDNs and clients may reuse /api/v1 responses without revalidating
+    API_CACHE_MAX_AGE = int(os.environ.get('API_CACHE_MAX_AGE', 5))
+    # Most leaderboard snapshots returned by one history query
+    LEADERBOARD_HISTORY_LIMIT = int(os.environ.get('LEADERBOARD_HISTORY_LIMIT', 500))
+    
+    # Compress text responses for clients that accept gzip or brotli. Cached
+    # public pages keep their compressed bytes until the data changes.
+    COMPRESS_RESPONSES = os.environ.get('COMPRESS_RESPONSES', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+    
+    # Per-request SQL, template and password-hash timing, shown at
+    # /manage/admin/metrics and sent in Server-Timing headers. Workers share
+    # their counts through snapshot files in METRICS_DIR.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join('instance', 'metrics'))
+    METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 2))
+    # Bearer token that lets a Prometheus scraper read /manage/admin/metrics/prometheus
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Compiled templates are kept on disk, where every worker and later
+    # restarts reuse them. Unset means jinja_cache in the app's instance
+    # folder; an empty JINJA_CACHE_DIR turns the cache off
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR')
+    # Rendered in the gunicorn master before workers fork (preload_app), so
+    # new and recycled workers inherit compiled templates and cached pages
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', 'true').lower() == 'true'
+    WARMUP_PATHS = ('/leaderboard', '/events', '/leaderboard/history')
+    
+    # Live leaderboard stream (/leaderboard/stream)
+    LIVE_STREAM_POLL_SECONDS = float(os.environ.get('LIVE_STREAM_POLL_SECONDS', 2))
+    LIVE_STREAM_HEARTBEAT_SECONDS = float(os.environ.get('LIVE_STREAM_HEARTBEAT_SECONDS', 15))
+    # Streams are only served by servers that handle other requests while
+    # one is open (gevent, threaded); sync workers answer 204 instead
+    LIVE_STREAM_MAX_SECONDS = float(os.environ.get('LIVE_STREAM_MAX_SECONDS', 300))
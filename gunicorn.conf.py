@@ -2,17 +2,34 @@
 
 import multiprocessing
 import os
+import subprocess
+import sys
 
 # Server socket
 bind = "0.0.0.0:80"
 backlog = 2048
 
-# Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
-worker_connections = 1000
+# Worker processes. "sync" serves one request per process at a time, so a
+# slow client or an open live stream holds a whole worker. "gevent" serves
+# up to worker_connections requests per process cooperatively:
+#
+#   GUNICORN_WORKER_CLASS=gevent gunicorn --config gunicorn.conf.py app:app
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+if worker_class == "gevent":
+    # Patch before the app is preloaded, so the locks, queues and background
+    # threads it creates are cooperative in every worker
+    from gevent import monkey
+    monkey.patch_all()
+
+    # One process per core; concurrency comes from greenlets, not processes
+    workers = multiprocessing.cpu_count()
+    worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+    keepalive = 5
+else:
+    workers = multiprocessing.cpu_count() * 2 + 1
+    worker_connections = 1000
+    keepalive = 2
 timeout = 30
-keepalive = 2
 
 # Restart workers after this many requests, to help prevent memory leaks
 max_requests = 1000
@@ -35,6 +52,64 @@ user = None
 group = None
 tmp_upload_dir = None
 
+# Scheduled database backups (0 disables). They run in a separate
+# `python backup_db.py schedule` process started by the master: a backup
+# thread inside the master could hold a SQLite, gzip or stdout lock at the
+# moment a worker is forked, and the worker would deadlock on it.
+backup_interval_hours = float(os.environ.get('BACKUP_INTERVAL_HOURS', 0))
+backup_process = None
+
+# Server lifecycle hooks
+def on_starting(server):
+    """Start request metrics from zero for each server run"""
+    from config import Config
+    from utils.metrics import clear_metrics
+    if Config.METRICS_DIR:
+        clear_metrics(Config.METRICS_DIR)
+
+def when_ready(server):
+    """Warm the preloaded app, then start the backup process once for the whole server rather than per worker"""
+    global backup_process
+    if server.cfg.preload_app:
+        from utils.warmup import warm_up
+        app = server.app.wsgi()
+        if app.config['WARMUP_ENABLED']:
+            server.log.info("Warmed up templates and public pages in %.0f ms", warm_up(app) * 1000)
+    if backup_interval_hours > 0:
+        backup_process = subprocess.Popen([sys.executable, 'backup_db.py', 'schedule', f'{backup_interval_hours:g}'])
+        server.log.info("Database backups scheduled every %g hours (pid %s)", backup_interval_hours, backup_process.pid)
+
+def on_exit(server):
+    """Stop the backup process with the server"""
+    if backup_process is not None and backup_process.poll() is None:
+        backup_process.terminate()
+        try:
+            backup_process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            backup_process.kill()
+
+# Worker lifecycle hooks
+def post_fork(server, worker):
+    """Drop database connections inherited from the master; each worker opens its own"""
+    if server.cfg.preload_app:
+        from models import db
+        with worker.app.wsgi().app_context():
+            db.engine.dispose(close=False)
+
+def worker_exit(server, worker):
+    """Write out queued activity log entries and request metrics before the worker goes away"""
+    from utils.logger import flush_activity_log
+    from utils.metrics import flush_metrics
+    flush_activity_log()
+    flush_metrics()
+
+def child_exit(server, worker):
+    """Fold the exited worker's request metrics into the totals (runs in the master)"""
+    from config import Config
+    from utils.metrics import archive_worker_metrics
+    if Config.METRICS_DIR:
+        archive_worker_metrics(Config.METRICS_DIR, worker.pid)
+
 # SSL (if needed)
 # keyfile = "/path/to/keyfile"
 # certfile = "/path/to/certfile"
\ No newline at end of file
@@ -0,0 +1,43 @@
+# Gunicorn configuration for the live leaderboard stream (/leaderboard/stream)
+#
+# Server-Sent Events connections stay open for minutes, which would pin one
+# sync worker per viewer. Run this cooperative server next to the main one
+# and route only the stream path to it (see DEPLOYMENT.md):
+#
+#   gunicorn --config gunicorn_stream.conf.py app:app
+
+import os
+
+# Server socket
+bind = os.environ.get("STREAM_BIND", "127.0.0.1:8001")
+backlog = 2048
+
+# Worker processes - each gevent worker holds many idle streams
+workers = int(os.environ.get("STREAM_WORKERS", 2))
+worker_class = "gevent"
+worker_connections = 2000
+timeout = 30
+keepalive = 75
+
+# Streams may run much longer than a request on the sync server
+raw_env = ["LIVE_STREAM_MAX_SECONDS=600"]
+
+# Logging
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
+
+# Process naming
+proc_name = "event-scoring-stream"
+
+# Server mechanics
+preload_app = False
+daemon = False
+pidfile = "/tmp/gunicorn-stream.pid"
+
+
+# Worker lifecycle hooks
+def worker_exit(server, worker):
+    """Write out queued activity log entries before the worker goes away"""
+    from utils.logger import flush_activity_log
+    flush_activity_log()
@@ -4,10 +4,13 @@ Main entry point for the Event Scoring System
 Compatible with various deployment platforms
 """
 
-from app import app
+from app import app, bootstrap_database
 
 # For servers that expect 'application' variable
 application = app
 
 if __name__ == "__main__":
+    # Running directly sets up its own database, like `python app.py`
+    with app.app_context():
+        bootstrap_database()
     app.run(host='0.0.0.0', port=80)
\ No newline at end of file
@@ -1,10 +1,72 @@
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from utils.assets import asset_url
+from utils.metrics import timed
 import json
+import os
 
 db = SQLAlchemy()
 
+def install_sqlite_pragmas(engine, pragmas):
+    """
+    Apply a pragma profile to every new connection of a SQLite engine
+    
+    Args:
+        engine: SQLAlchemy engine; ignored unless it is SQLite
+        pragmas: Ordered dictionary of pragma name to value
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    for name in pragmas:
+        if not name.isidentifier():
+            raise ValueError(f"Invalid SQLite pragma name: {name}")
+    
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+def ensure_indexes():
+    """
+    Create any index declared on the models that the database is missing
+    
+    db.create_all() only adds indexes together with new tables, so databases
+    created by an earlier version need this to pick up new indexes. Safe to
+    run repeatedly.
+    
+    Returns:
+        List of index names that were created
+    """
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+    return created
+
+def read_sqlite_pragmas(engine, names):
+    """Return {name: value} for the pragmas actually in effect on a connection"""
+    if engine.dialect.name != 'sqlite':
+        return {}
+    values = {}
+    with engine.connect() as connection:
+        for name in names:
+            values[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return values
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -19,8 +81,12 @@ class User(db.Model):
     activity_logs = db.relationship('ActivityLog', backref='user', lazy=True)
     
     def set_password(self, password):
-        """Hash and store password"""
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        """Hash and store password with the configured hash-cost policy"""
+        method = 'pbkdf2:sha256'
+        if has_app_context() and 'PASSWORD_HASH_ITERATIONS' in current_app.config:
+            method = f"pbkdf2:sha256:{current_app.config['PASSWORD_HASH_ITERATIONS']}"
+        with timed('hash'):
+            self.password_hash = generate_password_hash(password, method=method)
     
     def check_password(self, password):
         """Verify password against hash"""
@@ -51,9 +117,268 @@ class Cluster(db.Model):
     
     def get_logo_url(self):
         """Return URL to logo image"""
-        if self.logo_filename:
-            return f'/static/images/clusters/{self.logo_filename}'
-        return f'/static/images/clusters/{self.name.lower()}.png'
+        return Cluster.logo_url_for(self.name, self.logo_filename)
+    
+    @staticmethod
+    def logo_url_for(name, logo_filename=None):
+        """
+        Return the logo URL for a cluster's name and logo filename without loading it
+        
+        Prefers the fingerprinted WebP variant from the asset build, then the
+        fingerprinted original, then the plain static path.
+        """
+        filename = f'images/clusters/{logo_filename or name.lower() + ".png"}'
+        return (asset_url(os.path.splitext(filename)[0] + '.webp')
+                or asset_url(filename)
+                or f'/static/{filename}')
+
+
+class ClusterTotal(db.Model):
+    """Materialized running total of participant points per cluster"""
+    __tablename__ = 'cluster_totals'
+    
+    cluster_id = db.Column(db.Integer, db.ForeignKey('clusters.id'), primary_key=True)
+    total_points = db.Column(db.Integer, nullable=False, default=0)
+    
+    @staticmethod
+    def apply_deltas(deltas):
+        """
+        Add per-cluster point deltas to the running totals
+        
+        Runs inside the caller's transaction so totals commit (or roll back)
+        together with the participant rows that produced them.
+        
+        Args:
+            deltas: Dictionary mapping cluster_id to a signed points delta
+        """
+        for cluster_id, delta in deltas.items():
+            if not delta:
+                continue
+            updated = db.session.execute(
+                db.update(ClusterTotal)
+                .where(ClusterTotal.cluster_id == cluster_id)
+                .values(total_points=ClusterTotal.total_points + delta)
+            ).rowcount
+            if updated == 0:
+                db.session.add(ClusterTotal(cluster_id=cluster_id, total_points=delta))
+    
+    @staticmethod
+    def event_points(event_id):
+        """
+        Return {cluster_id: points} of one event's participants as stored
+        
+        Read with SQL rather than from loaded objects, so once the caller's
+        transaction holds the write lock it includes every committed edit.
+        """
+        rows = db.session.execute(
+            db.select(Participant.cluster_id, db.func.sum(Participant.points))
+            .where(Participant.event_id == event_id)
+            .group_by(Participant.cluster_id)
+        ).all()
+        return {cluster_id: int(points) for cluster_id, points in rows}
+    
+    @staticmethod
+    def compute_from_participants():
+        """Return {cluster_id: total} recomputed from the participants table"""
+        rows = db.session.query(Cluster.id, db.func.coalesce(db.func.sum(Participant.points), 0))\
+            .outerjoin(Participant, Participant.cluster_id == Cluster.id)\
+            .group_by(Cluster.id)\
+            .all()
+        return {cluster_id: int(total) for cluster_id, total in rows}
+    
+    @staticmethod
+    def find_drift():
+        """Return {cluster_id: (stored, actual)} for every total that is out of date"""
+        actual = ClusterTotal.compute_from_participants()
+        stored = {row.cluster_id: row.total_points for row in ClusterTotal.query.all()}
+        drift = {}
+        for cluster_id, total in actual.items():
+            if stored.get(cluster_id) != total:
+                drift[cluster_id] = (stored.get(cluster_id), total)
+        for cluster_id in stored.keys() - actual.keys():
+            drift[cluster_id] = (stored[cluster_id], None)
+        return drift
+    
+    @staticmethod
+    def rebuild():
+        """Recompute every total from participants and return the drift that was fixed"""
+        drift = ClusterTotal.find_drift()
+        actual = ClusterTotal.compute_from_participants()
+        ClusterTotal.query.delete()
+        for cluster_id, total in actual.items():
+            db.session.add(ClusterTotal(cluster_id=cluster_id, total_points=total))
+        LeaderboardSnapshot.record('rebuild')
+        CacheGeneration.bump()
+        db.session.commit()
+        return drift
+
+
+class LeaderboardSnapshot(db.Model):
+    """
+    Append-only record of every cluster's total and rank after a scoring change
+    
+    Standings are stored as one flat JSON array of (cluster_id, points, rank)
+    triples in rank order, e.g. [3,40,1,1,35,2,2,12,3], which keeps each row
+    a few dozen bytes and lets history queries read only the snapshots in
+    their window.
+    """
+    __tablename__ = 'leaderboard_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # The event whose write produced the snapshot (not a foreign key, as
+    # snapshots outlive deleted events)
+    event_id = db.Column(db.Integer, nullable=True)
+    action = db.Column(db.String(20), nullable=False)
+    data = db.Column(db.Text, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_leaderboard_snapshots_created_at_id', created_at, id),
+    )
+    
+    @staticmethod
+    def encode(standings):
+        """Encode [(cluster_id, points, rank), ...] as a flat JSON array"""
+        return json.dumps([value for entry in standings for value in entry], separators=(',', ':'))
+    
+    @staticmethod
+    def decode(data):
+        """Return [(cluster_id, points, rank), ...] from an encoded snapshot"""
+        values = json.loads(data)
+        return [tuple(values[i:i + 3]) for i in range(0, len(values), 3)]
+    
+    @staticmethod
+    def current_standings():
+        """Return [(cluster_id, points, rank), ...] from the materialized totals"""
+        rows = db.session.execute(
+            db.select(Cluster.id, db.func.coalesce(ClusterTotal.total_points, 0))
+            .outerjoin(ClusterTotal, ClusterTotal.cluster_id == Cluster.id)
+            .order_by(Cluster.id)
+        ).all()
+        # Same order as the leaderboard page: points descending, ties by id
+        rows = sorted(rows, key=lambda row: -row[1])
+        return [(cluster_id, points, rank) for rank, (cluster_id, points) in enumerate(rows, start=1)]
+    
+    @staticmethod
+    def record(action, event_id=None):
+        """
+        Append the current standings inside the caller's transaction
+        
+        Nothing is written when the standings match the latest snapshot, so
+        renames and other writes that leave the totals alone add no rows.
+        
+        Returns:
+            True if a snapshot was added
+        """
+        db.session.flush()
+        data = LeaderboardSnapshot.encode(LeaderboardSnapshot.current_standings())
+        latest = db.session.execute(
+            db.select(LeaderboardSnapshot.data)
+            .order_by(LeaderboardSnapshot.created_at.desc(), LeaderboardSnapshot.id.desc())
+            .limit(1)
+        ).scalar()
+        if latest == data:
+            return False
+        db.session.add(LeaderboardSnapshot(action=action, event_id=event_id, data=data))
+        return True
+    
+    @staticmethod
+    def movement():
+        """Return {cluster_id: places gained} between the last two snapshots"""
+        rows = db.session.execute(
+            db.select(LeaderboardSnapshot.data)
+            .order_by(LeaderboardSnapshot.created_at.desc(), LeaderboardSnapshot.id.desc())
+            .limit(2)
+        ).scalars().all()
+        if len(rows) < 2:
+            return {}
+        current, previous = (LeaderboardSnapshot.decode(data) for data in rows)
+        previous_ranks = {cluster_id: rank for cluster_id, _, rank in previous}
+        return {
+            cluster_id: previous_ranks[cluster_id] - rank
+            for cluster_id, _, rank in current
+            if cluster_id in previous_ranks
+        }
+    
+    @staticmethod
+    def history(since=None, until=None, limit=None):
+        """
+        Return the points and rank series of every cluster over a window
+        
+        Args:
+            since: Only snapshots at or after this time
+            until: Only snapshots at or before this time
+            limit: Keep only the newest `limit` snapshots of the window
+        
+        Returns:
+            Dictionary with 'times' (one per snapshot, oldest first) and
+            'clusters' ({cluster_id: {'points': [...], 'ranks': [...]}}), where
+            each list is aligned with 'times' and holds None for snapshots
+            taken before the cluster existed
+        """
+        query = db.select(LeaderboardSnapshot.created_at, LeaderboardSnapshot.data)
+        if since is not None:
+            query = query.where(LeaderboardSnapshot.created_at >= since)
+        if until is not None:
+            query = query.where(LeaderboardSnapshot.created_at <= until)
+        query = query.order_by(LeaderboardSnapshot.created_at.desc(), LeaderboardSnapshot.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        rows = db.session.execute(query).all()
+        rows.reverse()
+        
+        times = []
+        clusters = {}
+        for index, (created_at, data) in enumerate(rows):
+            times.append(created_at)
+            for cluster_id, points, rank in LeaderboardSnapshot.decode(data):
+                series = clusters.get(cluster_id)
+                if series is None:
+                    series = clusters[cluster_id] = {'points': [None] * index, 'ranks': [None] * index}
+                series['points'].append(points)
+                series['ranks'].append(rank)
+            for series in clusters.values():
+                if len(series['points']) <= index:
+                    series['points'].append(None)
+                    series['ranks'].append(None)
+        return {'times': times, 'clusters': clusters}
+
+
+class CacheGeneration(db.Model):
+    """Single-row counter shared by all workers, bumped whenever public data changes"""
+    __tablename__ = 'cache_generation'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    
+    @staticmethod
+    def current():
+        """Return the current generation number"""
+        return CacheGeneration.current_with_timestamp()[0]
+    
+    @staticmethod
+    def current_with_timestamp():
+        """Return (generation, updated_at) for the current generation"""
+        row = db.session.execute(
+            db.select(CacheGeneration.generation, CacheGeneration.updated_at)
+            .where(CacheGeneration.id == 1)
+        ).first()
+        if row is None:
+            return 0, None
+        return row.generation, row.updated_at
+    
+    @staticmethod
+    def bump():
+        """Advance the generation inside the caller's transaction"""
+        now = datetime.utcnow()
+        updated = db.session.execute(
+            db.update(CacheGeneration)
+            .where(CacheGeneration.id == 1)
+            .values(generation=CacheGeneration.generation + 1, updated_at=now)
+        ).rowcount
+        if updated == 0:
+            db.session.add(CacheGeneration(id=1, generation=1, updated_at=now))
 
 
 class Event(db.Model):
@@ -65,6 +390,13 @@ class Event(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Newest-first ordering and keyset pagination
+        db.Index('ix_events_created_at_id', created_at.desc(), id.desc()),
+        # Events by creator (user deletes, per-manager lookups)
+        db.Index('ix_events_created_by', created_by),
+    )
+    
     # Relationships
     participants = db.relationship('Participant', backref='event', lazy=True, cascade='all, delete-orphan')
     
@@ -83,7 +415,147 @@ class Event(db.Model):
     
     def get_creator(self):
         """Return User object who created event"""
-        return User.query.get(self.created_by)
+        return self.creator
+    
+    @staticmethod
+    def query_with_results():
+        """
+        Return an Event query that eagerly loads creators, participants and clusters
+        
+        Lists built from this query render in a fixed number of statements
+        regardless of how many events they show.
+        """
+        return Event.query.options(
+            db.joinedload(Event.creator),
+            db.selectinload(Event.participants).joinedload(Participant.cluster)
+        )
+
+
+class EventResult(db.Model):
+    """
+    Denormalized, pre-sorted results of one event, as shown on the winner list
+    
+    Rewritten whenever the event is written, so public pages read one row
+    per event instead of hydrating events, participants, clusters and
+    creators. Events without a row (imports from older versions, after a
+    recovery or an asset build) are filled in by fill_missing(), which
+    `flask init-db`, `flask build-assets` and `backup_db.py recover` run;
+    public pages only read.
+    """
+    __tablename__ = 'event_results'
+    
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), primary_key=True)
+    # Copy of events.created_at for ordering and keyset pagination
+    created_at = db.Column(db.DateTime, nullable=False)
+    data = db.Column(db.Text, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_event_results_created_at_event_id', created_at.desc(), event_id.desc()),
+    )
+    
+    @staticmethod
+    def build(event):
+        """Return the results blob for an event loaded with query_with_results()"""
+        return {
+            'id': event.id,
+            'name': event.name,
+            'date': event.created_at.strftime('%B %d, %Y'),
+            'creator': event.creator.username if event.creator else None,
+            'results': [
+                {
+                    'position': participant.position,
+                    'name': participant.name,
+                    'cluster': participant.cluster.name,
+                    'logo_url': participant.cluster.get_logo_url(),
+                    'points': participant.points
+                }
+                for participant in sorted(event.participants, key=lambda p: (p.position, p.id))
+            ]
+        }
+    
+    @staticmethod
+    def build_from_rows(event_id, name, created_at, creator, participants, clusters):
+        """
+        Return the same blob as build() from plain values, without loading the event
+        
+        Args:
+            participants: Dicts with cluster_id, name, position and points, in
+                insertion (id) order
+            clusters: Cluster id -> (name, logo URL)
+        """
+        return {
+            'id': event_id,
+            'name': name,
+            'date': created_at.strftime('%B %d, %Y'),
+            'creator': creator,
+            'results': [
+                {
+                    'position': participant['position'],
+                    'name': participant['name'],
+                    'cluster': clusters[participant['cluster_id']][0],
+                    'logo_url': clusters[participant['cluster_id']][1],
+                    'points': participant['points']
+                }
+                # sorted() is stable, so ties keep insertion (id) order as in build()
+                for participant in sorted(participants, key=lambda p: p['position'])
+            ]
+        }
+    
+    @staticmethod
+    def insert_built(results):
+        """Insert rows for new events from (event_id, created_at, blob) tuples"""
+        for start in range(0, len(results), 500):
+            db.session.execute(db.insert(EventResult), [
+                {'event_id': event_id, 'created_at': created_at, 'data': json.dumps(blob, separators=(',', ':'))}
+                for event_id, created_at, blob in results[start:start + 500]
+            ])
+    
+    @staticmethod
+    def refresh(event_ids):
+        """
+        Rewrite the results rows of the given events inside the caller's transaction
+        
+        Pending ORM changes are flushed first so the rows see them. Event ids
+        that no longer exist lose their row.
+        """
+        event_ids = list(event_ids)
+        if not event_ids:
+            return
+        db.session.flush()
+        for start in range(0, len(event_ids), 500):
+            chunk = event_ids[start:start + 500]
+            # populate_existing so events already in the session reload their
+            # participants and clusters as just flushed
+            events = Event.query_with_results().filter(Event.id.in_(chunk))\
+                .populate_existing().all()
+            db.session.execute(db.delete(EventResult).where(EventResult.event_id.in_(chunk)))
+            if events:
+                db.session.execute(db.insert(EventResult), [
+                    {
+                        'event_id': event.id,
+                        'created_at': event.created_at,
+                        'data': json.dumps(EventResult.build(event), separators=(',', ':'))
+                    }
+                    for event in events
+                ])
+    
+    @staticmethod
+    def discard(event_ids):
+        """Remove the results rows of events that are about to be deleted"""
+        db.session.execute(db.delete(EventResult).where(EventResult.event_id.in_(list(event_ids))))
+    
+    @staticmethod
+    def fill_missing():
+        """Build rows for events that have none and commit them; returns how many were built"""
+        missing = db.session.execute(
+            db.select(Event.id)
+            .outerjoin(EventResult, EventResult.event_id == Event.id)
+            .where(EventResult.event_id.is_(None))
+        ).scalars().all()
+        if missing:
+            EventResult.refresh(missing)
+            db.session.commit()
+        return len(missing)
 
 
 class Participant(db.Model):
@@ -97,15 +569,85 @@ class Participant(db.Model):
     points = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Loading an event's results and cascading its deletes
+        db.Index('ix_participants_event_id', event_id),
+        # Covers SUM(points) per cluster; also serves plain cluster_id lookups
+        db.Index('ix_participants_cluster_id_points', cluster_id, points),
+    )
+    
     def __init__(self, **kwargs):
         super(Participant, self).__init__(**kwargs)
         # Validate constraints
-        if self.points is not None and self.points < 0:
+        Participant.validate(self.position, self.points)
+    
+    @staticmethod
+    def validate(position, points):
+        """Raise ValueError if position or points break the participant constraints"""
+        if points is not None and points < 0:
             raise ValueError("Points must be >= 0")
-        if self.position is not None and self.position < 1:
+        if position is not None and position < 1:
             raise ValueError("Position must be >= 1")
 
 
+class ChangeJournal(db.Model):
+    """
+    Row images of every write to the JOURNALED_TABLES, for point-in-time recovery
+    
+    Filled by SQLite triggers (see install_journal_triggers), so ORM, Core
+    and bulk writes are all captured. backup_db.py replays it onto a backup
+    to rebuild the database as it was at a given moment, and trims entries
+    older than every kept backup (see trim_journal).
+    """
+    __tablename__ = 'change_journal'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Set by the trigger in UTC, in SQLAlchemy's SQLite datetime format
+    timestamp = db.Column(db.DateTime, nullable=False)
+    table_name = db.Column(db.String(50), nullable=False)
+    operation = db.Column(db.String(10), nullable=False)  # 'insert', 'update' or 'delete'
+    row_id = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.Text, nullable=True)  # JSON row after the write; NULL for deletes
+    
+    __table_args__ = (
+        db.Index('ix_change_journal_timestamp', timestamp),
+    )
+
+
+# Tables whose writes are recorded in change_journal
+JOURNALED_TABLES = ('users', 'events', 'participants', 'leaderboard_snapshots')
+
+# UTC now with microseconds, matching how SQLAlchemy stores DateTime on SQLite
+_JOURNAL_NOW = "strftime('%Y-%m-%d %H:%M:%S', 'now') || substr(strftime('%f', 'now'), 3) || '000'"
+
+def journal_trigger_statements():
+    """Return the CREATE TRIGGER statements that feed change_journal"""
+    statements = []
+    for table_name in JOURNALED_TABLES:
+        table = db.metadata.tables[table_name]
+        for operation, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+            if operation == 'delete':
+                data = 'NULL'
+            else:
+                pairs = ', '.join(f"'{column.name}', NEW.{column.name}" for column in table.columns)
+                data = f'json_object({pairs})'
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS journal_{table_name}_{operation} "
+                f"AFTER {operation.upper()} ON {table_name} BEGIN "
+                f"INSERT INTO change_journal (timestamp, table_name, operation, row_id, data) "
+                f"VALUES ({_JOURNAL_NOW}, '{table_name}', '{operation}', {row}.id, {data}); END"
+            )
+    return statements
+
+@event.listens_for(db.metadata, 'after_create')
+def install_journal_triggers(target, connection, **kw):
+    """Create the change journal triggers; runs on every db.create_all()"""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in journal_trigger_statements():
+        connection.exec_driver_sql(statement)
+
+
 class ActivityLog(db.Model):
     __tablename__ = 'activity_logs'
     
@@ -115,9 +657,16 @@ class ActivityLog(db.Model):
     details = db.Column(db.Text, nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Newest-first ordering and keyset pagination
+        db.Index('ix_activity_logs_timestamp_id', timestamp.desc(), id.desc()),
+        # Logs by user
+        db.Index('ix_activity_logs_user_id', user_id),
+    )
+    
     def get_user(self):
         """Return User object"""
-        return User.query.get(self.user_id)
+        return self.user
     
     def get_details_dict(self):
         """Parse JSON details to dictionary"""
@@ -1,6 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from models import User, db
+from models import Event, EventResult, User, db
 from utils.decorators import admin_required
+from utils.cache import invalidate_public_pages
+from utils.passwords import HasherBusy, get_password_service
+from concurrent.futures import TimeoutError as HashTimeout
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/manage/admin')
 
@@ -29,8 +32,12 @@ def create_manager():
         return redirect(url_for('admin.managers'))
     
     # Create new Event Manager
-    new_manager = User(username=username, role='event_manager')
-    new_manager.set_password(password)
+    try:
+        password_hash = get_password_service().hash(password)
+    except (HasherBusy, HashTimeout):
+        flash('The server is busy. Please try again in a moment.', 'error')
+        return redirect(url_for('admin.managers'))
+    new_manager = User(username=username, role='event_manager', password_hash=password_hash)
     
     db.session.add(new_manager)
     db.session.commit()
@@ -61,9 +68,24 @@ def edit_manager(id):
         flash('Username already exists', 'error')
         return redirect(url_for('admin.managers'))
     
-    manager.username = username
+    password_hash = None
     if password:  # Only update password if provided
-        manager.set_password(password)
+        try:
+            password_hash = get_password_service().hash(password)
+        except (HasherBusy, HashTimeout):
+            flash('The server is busy. Please try again in a moment.', 'error')
+            return redirect(url_for('admin.managers'))
+    
+    renamed = manager.username != username
+    manager.username = username
+    if renamed:
+        # Creator names appear on the public winner list
+        EventResult.refresh(db.session.execute(
+            db.select(Event.id).where(Event.created_by == manager.id)
+        ).scalars())
+        invalidate_public_pages()
+    if password_hash:
+        manager.password_hash = password_hash
     
     db.session.commit()
     
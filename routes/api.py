@@ -0,0 +1,110 @@
+from datetime import datetime
+from flask import Blueprint, current_app, jsonify, request
+from models import Cluster, ClusterTotal, EventResult, LeaderboardSnapshot, db
+from utils.cache import cached_page
+from utils.pagination import current_cursor, keyset_page, parse_cursor
+import json
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+LEADERBOARD_COLUMNS = ['id', 'name', 'logo_url', 'points', 'movement']
+HISTORY_COLUMNS = ['id', 'name', 'points', 'ranks']
+
+def json_dumps(data):
+    """Serialize without whitespace"""
+    return json.dumps(data, separators=(',', ':'))
+
+@api_bp.after_request
+def allow_any_origin(response):
+    # Read-only public data for display screens served from other origins
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+@api_bp.route('/leaderboard')
+def leaderboard():
+    """Cluster standings, highest total first"""
+    return cached_page('api-leaderboard', build_leaderboard, mimetype='application/json', shared=True)
+
+def build_leaderboard():
+    """Return the leaderboard as a columns header plus one row per cluster"""
+    rows = db.session.execute(
+        db.select(Cluster.id, Cluster.name, Cluster.logo_filename, ClusterTotal.total_points)
+        .outerjoin(ClusterTotal, ClusterTotal.cluster_id == Cluster.id)
+    ).all()
+    movement = LeaderboardSnapshot.movement()
+    clusters = [
+        [cluster_id, name, Cluster.logo_url_for(name, logo_filename), total_points or 0,
+         movement.get(cluster_id, 0)]
+        for cluster_id, name, logo_filename, total_points in rows
+    ]
+    clusters.sort(key=lambda row: row[3], reverse=True)
+    return json_dumps({'columns': LEADERBOARD_COLUMNS, 'clusters': clusters})
+
+@api_bp.route('/leaderboard/history')
+def leaderboard_history():
+    """
+    Points and rank of every cluster after each scoring change
+    
+    ?since= and ?until= take ISO timestamps; ?limit= keeps the newest
+    snapshots of the window, capped at LEADERBOARD_HISTORY_LIMIT.
+    """
+    try:
+        since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+        until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+        limit = int(request.args.get('limit') or current_app.config['LEADERBOARD_HISTORY_LIMIT'])
+    except ValueError:
+        return jsonify({'error': 'since and until must be ISO timestamps and limit a whole number'}), 400
+    limit = max(1, min(limit, current_app.config['LEADERBOARD_HISTORY_LIMIT']))
+    
+    query_string = request.query_string.decode()
+    return cached_page(f'api-history@{query_string}', lambda: build_history(since, until, limit),
+                       store=not query_string, mimetype='application/json', shared=True)
+
+def build_history(since, until, limit):
+    """Return the history window as shared timestamps plus one series per cluster"""
+    history = LeaderboardSnapshot.history(since, until, limit)
+    names = dict(db.session.execute(db.select(Cluster.id, Cluster.name)).all())
+    series = [
+        [cluster_id, names.get(cluster_id), values['points'], values['ranks']]
+        for cluster_id, values in history['clusters'].items()
+    ]
+    return json_dumps({
+        'times': [time.isoformat() for time in history['times']],
+        'columns': HISTORY_COLUMNS,
+        'series': series
+    })
+
+@api_bp.route('/events')
+def events():
+    """Event results, newest first, one page at a time (?after=<next>)"""
+    after = current_cursor()
+    if after is None:
+        return cached_page('api-events', build_events, mimetype='application/json', shared=True)
+    parse_cursor(after)  # Reject malformed cursors before answering
+    return cached_page(f'api-events@{after}', lambda: build_events(after),
+                       store=False, mimetype='application/json', shared=True)
+
+def build_events(after=None):
+    """
+    Return one page of events by splicing the stored result blobs together
+
+    The blobs are already JSON, so they are copied into the body as they
+    are rather than decoded and encoded again.
+    """
+    rows, next_cursor = keyset_page(
+        db.session.query(EventResult.event_id, EventResult.created_at, EventResult.data),
+        EventResult.created_at, EventResult.event_id,
+        current_app.config['EVENTS_PAGE_SIZE'], after
+    )
+    events = ','.join(row.data for row in rows)
+    return f'{{"next":{json_dumps(next_cursor)},"events":[{events}]}}'
+
+@api_bp.route('/events/<int:id>')
+def event(id):
+    """Results of a single event"""
+    data = db.session.execute(
+        db.select(EventResult.data).where(EventResult.event_id == id)
+    ).scalar()
+    if data is None:
+        return jsonify({'error': 'Event not found'}), 404
+    return cached_page(f'api-event-{id}', lambda: data, store=False, mimetype='application/json', shared=True)
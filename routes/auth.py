@@ -1,5 +1,7 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from flask import Blueprint, make_response, render_template, request, redirect, url_for, session, flash
 from models import User, db
+from utils.passwords import HasherBusy, get_password_service
+from concurrent.futures import TimeoutError as HashTimeout
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -14,9 +16,30 @@ def login():
             flash('Please provide both username and password', 'error')
             return render_template('login.html')
         
+        passwords = get_password_service()
+        retry_after = passwords.limiter.retry_after(username)
+        if retry_after:
+            flash('Too many failed login attempts. Please try again later.', 'error')
+            response = make_response(render_template('login.html'), 429)
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        
         user = User.query.filter_by(username=username).first()
         
-        if user and user.check_password(password):
+        try:
+            verified = user is not None and passwords.verify(user, password)
+        except (HasherBusy, HashTimeout):
+            flash('The server is busy. Please try again in a moment.', 'error')
+            response = make_response(render_template('login.html'), 503)
+            response.headers['Retry-After'] = '1'
+            return response
+        
+        if verified:
+            # Commits a rehash made under a newer hash-cost policy
+            if db.session.is_modified(user):
+                db.session.commit()
+            passwords.limiter.reset(username)
+            
             # Set up session
             session['user_id'] = user.id
             session['username'] = user.username
@@ -26,6 +49,7 @@ def login():
             flash(f'Welcome, {user.username}!', 'success')
             return redirect(url_for('overview.manage_overview'))
         else:
+            passwords.limiter.record_failure(username)
             flash('Invalid username or password', 'error')
             return render_template('login.html')
     
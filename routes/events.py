@@ -1,16 +1,39 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from models import Event, Participant, Cluster, db
+from datetime import datetime
+from flask import Blueprint, current_app, jsonify, render_template, request, redirect, url_for, flash, session
+from models import Event, EventResult, Cluster, ClusterTotal, LeaderboardSnapshot, Participant, db
 from utils.decorators import login_required
 from utils.logger import log_activity
+from utils.cache import invalidate_public_pages
+from utils.pagination import current_cursor, keyset_page
+from utils.participants import flush_event_edit, parse_participant_rows, sync_participants
+from utils.importer import IMPORT_FIELDS, detect_format, import_results, iter_rows
+from utils.export import export_request, export_response
 
 events_bp = Blueprint('events', __name__, url_prefix='/manage/events')
 
+# Content types a browser will POST cross-site without a CORS preflight
+SIMPLE_CONTENT_TYPES = ('application/x-www-form-urlencoded', 'multipart/form-data', 'text/plain', '')
+
+@events_bp.record_once
+def exempt_raw_import(state):
+    """import_events checks CSRF itself, so raw-body clients need no token"""
+    csrf = state.app.extensions.get('csrf')
+    if csrf is not None:
+        csrf.exempt(f'{__name__}.import_events')
+
+# Superset of IMPORT_FIELDS, so an export can be imported again
+RESULT_EXPORT_COLUMNS = ('event_id', 'event_name', 'event_created_at', 'event_updated_at',
+                         'cluster', 'participant_name', 'position', 'points')
+
 @events_bp.route('/')
 @login_required
 def list_events():
-    """Display list of all events"""
-    events = Event.query.order_by(Event.created_at.desc()).all()
-    return render_template('events/list.html', events=events)
+    """Display list of all events, one page at a time"""
+    events, next_cursor = keyset_page(
+        Event.query_with_results(), Event.created_at, Event.id,
+        current_app.config['EVENTS_PAGE_SIZE'], current_cursor()
+    )
+    return render_template('events/list.html', events=events, next_cursor=next_cursor)
 
 @events_bp.route('/create', methods=['GET', 'POST'])
 @login_required
@@ -23,47 +46,32 @@ def create_event():
             flash('Event name is required', 'error')
             return redirect(url_for('events.create_event'))
         
-        # Create event
-        event = Event(name=event_name, created_by=session['user_id'])
-        db.session.add(event)
-        db.session.flush()  # Get event ID
-        
-        # Process participants
-        participant_count = 0
-        cluster_ids = request.form.getlist('cluster_id[]')
-        participant_names = request.form.getlist('participant_name[]')
-        positions = request.form.getlist('position[]')
-        points_list = request.form.getlist('points[]')
-        
-        for i in range(len(cluster_ids)):
-            if cluster_ids[i] and participant_names[i]:
-                try:
-                    participant = Participant(
-                        event_id=event.id,
-                        cluster_id=int(cluster_ids[i]),
-                        name=participant_names[i],
-                        position=int(positions[i]),
-                        points=int(points_list[i])
-                    )
-                    db.session.add(participant)
-                    participant_count += 1
-                except (ValueError, IndexError) as e:
-                    flash(f'Invalid participant data: {str(e)}', 'error')
-                    db.session.rollback()
-                    return redirect(url_for('events.create_event'))
+        try:
+            rows = parse_participant_rows(request.form)
+        except (ValueError, IndexError) as e:
+            flash(f'Invalid participant data: {str(e)}', 'error')
+            return redirect(url_for('events.create_event'))
         
-        if participant_count == 0:
+        if not rows:
             flash('At least one participant is required', 'error')
-            db.session.rollback()
             return redirect(url_for('events.create_event'))
         
+        # Create event with its participants
+        event = Event(name=event_name, created_by=session['user_id'])
+        db.session.add(event)
+        changes = sync_participants(event, rows)
+        
+        ClusterTotal.apply_deltas(changes.points_by_cluster())
+        LeaderboardSnapshot.record('create_event', event.id)
+        EventResult.refresh([event.id])
+        invalidate_public_pages()
         db.session.commit()
         
         # Log activity
         log_activity('create_event', {
             'event_name': event_name,
             'event_id': event.id,
-            'participant_count': participant_count
+            'participant_count': len(rows)
         })
         
         flash(f'Event "{event_name}" created successfully', 'success')
@@ -73,6 +81,81 @@ def create_event():
     clusters = Cluster.query.order_by(Cluster.name).all()
     return render_template('events/create.html', clusters=clusters)
 
+@events_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_events():
+    """
+    Bulk import events and participants from CSV, NDJSON or JSON
+    
+    Browser uploads come as a form file and carry the form's CSRF token.
+    Scripts logged in with a session may instead post the raw body as
+    text/csv, application/x-ndjson or application/json without a token:
+    a browser cannot send those types cross-site without a CORS preflight,
+    which this app never answers. Raw bodies of any type a cross-site form
+    could send still need the token.
+    """
+    if request.method == 'GET':
+        return render_template('events/import.html', fields=IMPORT_FIELDS)
+    
+    upload = request.files.get('file')
+    from_form = upload is not None
+    if current_app.config['WTF_CSRF_ENABLED'] and (from_form or request.mimetype in SIMPLE_CONTENT_TYPES):
+        current_app.extensions['csrf'].protect()
+    if from_form:
+        file_format = detect_format(upload.filename, upload.mimetype, request.form.get('format'))
+        stream = upload.stream
+    else:
+        file_format = detect_format(mimetype=request.mimetype, requested=request.args.get('format'))
+        stream = request.stream
+    dry_run = bool(request.values.get('dry_run'))
+    
+    if file_format is None:
+        if from_form:
+            flash('Upload a .csv, .ndjson or .json file', 'error')
+            return redirect(url_for('events.import_events'))
+        return jsonify({'error': 'Unsupported format; use CSV, NDJSON or JSON'}), 400
+    
+    try:
+        report = import_results(iter_rows(stream, file_format), session['user_id'], dry_run=dry_run)
+    except (ValueError, UnicodeDecodeError) as e:
+        if from_form:
+            flash(f'Could not read file: {str(e)}', 'error')
+            return redirect(url_for('events.import_events'))
+        return jsonify({'error': f'Could not read file: {str(e)}'}), 400
+    
+    if not dry_run and report.events_created:
+        log_activity('import_events', {
+            'event_count': report.events_created,
+            'participant_count': report.participants_created,
+            'error_count': len(report.errors)
+        })
+    
+    if not from_form:
+        return jsonify(report.to_dict())
+    return render_template('events/import.html', fields=IMPORT_FIELDS, report=report, dry_run=dry_run)
+
+@events_bp.route('/export')
+@login_required
+def export_events():
+    """
+    Stream events and participants, one row per participant
+    
+    ?format= picks csv (default), ndjson or json. ?since= takes an ISO
+    timestamp and keeps only events created or edited at or after it, for
+    incremental pulls. Events without participants appear once with empty
+    participant columns.
+    """
+    file_format, since = export_request()
+    statement = db.select(
+        Event.id, Event.name, Event.created_at, Event.updated_at,
+        Cluster.name, Participant.name, Participant.position, Participant.points
+    ).outerjoin(Participant, Participant.event_id == Event.id)\
+        .outerjoin(Cluster, Cluster.id == Participant.cluster_id)\
+        .order_by(Event.id, Participant.position, Participant.id)
+    if since is not None:
+        statement = statement.where(Event.updated_at >= since)
+    return export_response(statement, RESULT_EXPORT_COLUMNS, file_format, 'results')
+
 @events_bp.route('/<int:id>')
 @login_required
 def view_event(id):
@@ -94,41 +177,28 @@ def edit_event(id):
             flash('Event name is required', 'error')
             return redirect(url_for('events.edit_event', id=id))
         
-        old_name = event.name
-        event.name = event_name
-        
-        # Delete existing participants
-        Participant.query.filter_by(event_id=event.id).delete()
-        
-        # Add updated participants
-        participant_count = 0
-        cluster_ids = request.form.getlist('cluster_id[]')
-        participant_names = request.form.getlist('participant_name[]')
-        positions = request.form.getlist('position[]')
-        points_list = request.form.getlist('points[]')
-        
-        for i in range(len(cluster_ids)):
-            if cluster_ids[i] and participant_names[i]:
-                try:
-                    participant = Participant(
-                        event_id=event.id,
-                        cluster_id=int(cluster_ids[i]),
-                        name=participant_names[i],
-                        position=int(positions[i]),
-                        points=int(points_list[i])
-                    )
-                    db.session.add(participant)
-                    participant_count += 1
-                except (ValueError, IndexError) as e:
-                    flash(f'Invalid participant data: {str(e)}', 'error')
-                    db.session.rollback()
-                    return redirect(url_for('events.edit_event', id=id))
+        try:
+            rows = parse_participant_rows(request.form)
+        except (ValueError, IndexError) as e:
+            flash(f'Invalid participant data: {str(e)}', 'error')
+            return redirect(url_for('events.edit_event', id=id))
         
-        if participant_count == 0:
+        if not rows:
             flash('At least one participant is required', 'error')
-            db.session.rollback()
             return redirect(url_for('events.edit_event', id=id))
         
+        old_name = event.name
+        event.name = event_name
+        
+        # Write only the participant rows that changed
+        changes = sync_participants(event, rows)
+        if changes:
+            event.updated_at = datetime.utcnow()
+            flush_event_edit(event)
+            LeaderboardSnapshot.record('edit_event', event.id)
+        if changes or old_name != event_name:
+            EventResult.refresh([event.id])
+            invalidate_public_pages()
         db.session.commit()
         
         # Log activity
@@ -136,7 +206,8 @@ def edit_event(id):
             'event_name': event_name,
             'event_id': event.id,
             'old_name': old_name,
-            'participant_count': participant_count
+            'participant_count': len(rows),
+            **changes.summary()
         })
         
         flash(f'Event "{event_name}" updated successfully', 'success')
@@ -153,7 +224,14 @@ def delete_event(id):
     event = Event.query.get_or_404(id)
     event_name = event.name
     
+    EventResult.discard([id])
+    # discard() took the write lock, so these are the points as stored now,
+    # including any edit committed since the event was loaded
+    points_delta = {cluster_id: -points for cluster_id, points in ClusterTotal.event_points(id).items()}
     db.session.delete(event)
+    ClusterTotal.apply_deltas(points_delta)
+    LeaderboardSnapshot.record('delete_event', id)
+    invalidate_public_pages()
     db.session.commit()
     
     # Log activity
@@ -1,12 +1,52 @@
-from flask import Blueprint, render_template
-from models import ActivityLog
-from utils.decorators import admin_required
+from flask import Blueprint, current_app, render_template
+from models import ActivityLog, User, db
+from utils.decorators import admin_required, metrics_access_required
+from utils.export import export_request, export_response
+from utils.metrics import get_metrics, render_prometheus, summarize
+from utils.pagination import current_cursor, keyset_page
 
 logs_bp = Blueprint('logs', __name__, url_prefix='/manage/admin')
 
+LOG_EXPORT_COLUMNS = ('id', 'timestamp', 'username', 'action', 'details')
+
 @logs_bp.route('/logs')
 @admin_required
 def view_logs():
-    """Display activity logs in chronological order"""
-    logs = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).all()
-    return render_template('admin/logs.html', logs=logs)
+    """Display activity logs in chronological order, one page at a time"""
+    logs, next_cursor = keyset_page(
+        ActivityLog.query.options(db.joinedload(ActivityLog.user)),
+        ActivityLog.timestamp, ActivityLog.id,
+        current_app.config['LOGS_PAGE_SIZE'], current_cursor()
+    )
+    return render_template('admin/logs.html', logs=logs, next_cursor=next_cursor)
+
+@logs_bp.route('/logs/export')
+@admin_required
+def export_logs():
+    """Stream activity logs oldest first as CSV, NDJSON or JSON (?format=, ?since=)"""
+    file_format, since = export_request()
+    statement = db.select(
+        ActivityLog.id, ActivityLog.timestamp, User.username, ActivityLog.action, ActivityLog.details
+    ).outerjoin(User, User.id == ActivityLog.user_id)\
+        .order_by(ActivityLog.timestamp, ActivityLog.id)
+    if since is not None:
+        statement = statement.where(ActivityLog.timestamp >= since)
+    return export_response(statement, LOG_EXPORT_COLUMNS, file_format, 'activity_logs')
+
+@logs_bp.route('/metrics')
+@admin_required
+def view_metrics():
+    """Request timings by endpoint, slowest total first"""
+    enabled = current_app.config['METRICS_ENABLED']
+    rows = summarize(get_metrics().collect()) if enabled else []
+    return render_template('admin/metrics.html', rows=rows, enabled=enabled)
+
+@logs_bp.route('/metrics/prometheus')
+@metrics_access_required
+def prometheus_metrics():
+    """Request timings in the Prometheus text format"""
+    body = render_prometheus(get_metrics().collect()) if current_app.config['METRICS_ENABLED'] else ''
+    response = current_app.response_class(body, mimetype='text/plain')
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.cache_control.no_store = True
+    return response
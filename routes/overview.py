@@ -1,35 +1,161 @@
-from flask import Blueprint, render_template
-from models import Cluster
+from flask import Blueprint, Response, current_app, render_template, request, stream_with_context
+from models import CacheGeneration, Cluster, ClusterTotal, EventResult, LeaderboardSnapshot, db
 from utils.decorators import login_required
+from utils.cache import cached_page
+from utils.live import diff_live_state, get_live_state
+from utils.pagination import current_cursor, keyset_page, parse_cursor
+import json
+import time
 
 overview_bp = Blueprint('overview', __name__)
 
 @overview_bp.route('/leaderboard')
 def public_overview():
     """Public display of cluster leaderboard with total points"""
-    clusters = Cluster.query.all()
+    return cached_page('leaderboard', render_leaderboard)
+
+def render_leaderboard():
+    """Render the leaderboard page from the materialized totals"""
+    # Read the materialized totals alongside each cluster in a single query
+    rows = db.session.query(Cluster, ClusterTotal.total_points)\
+        .outerjoin(ClusterTotal, ClusterTotal.cluster_id == Cluster.id)\
+        .all()
     
-    # Calculate total points for each cluster and create leaderboard data
     leaderboard = []
-    for cluster in clusters:
-        total_points = cluster.get_total_points()
+    for cluster, total_points in rows:
         leaderboard.append({
             'cluster': cluster,
-            'total_points': total_points
+            'total_points': total_points or 0
         })
     
     # Sort by total points in descending order
     leaderboard.sort(key=lambda x: x['total_points'], reverse=True)
     
-    return render_template('overview.html', leaderboard=leaderboard, public_view=True)
+    # Places gained or lost since the previous scoring change
+    movement = LeaderboardSnapshot.movement()
+    
+    return render_template('overview.html', leaderboard=leaderboard, movement=movement, public_view=True)
+
+@overview_bp.route('/leaderboard/history')
+def leaderboard_history():
+    """Public chart of cluster points over time"""
+    return cached_page('leaderboard-history', render_leaderboard_history)
+
+# Line colours for the history chart, assigned in cluster order
+CHART_COLORS = ('#e74c3c', '#3498db', '#f1c40f', '#2ecc71', '#9b59b6', '#e67e22', '#1abc9c', '#ecf0f1')
+
+def render_leaderboard_history():
+    """Render the history chart as inline SVG from the leaderboard snapshots"""
+    history = LeaderboardSnapshot.history(limit=current_app.config['LEADERBOARD_HISTORY_LIMIT'])
+    names = dict(db.session.query(Cluster.id, Cluster.name).all())
+    width, height, pad = 800, 320, 30
+    count = len(history['times'])
+    top = max([p for s in history['clusters'].values() for p in s['points'] if p is not None] or [0]) or 1
+    
+    lines = []
+    for index, (cluster_id, series) in enumerate(sorted(history['clusters'].items())):
+        points = []
+        for step, value in enumerate(series['points']):
+            if value is None:
+                continue
+            x = pad + (step * (width - 2 * pad) / (count - 1) if count > 1 else (width - 2 * pad) / 2)
+            y = height - pad - value * (height - 2 * pad) / top
+            points.append(f'{x:.1f},{y:.1f}')
+        lines.append({
+            'name': names.get(cluster_id, f'#{cluster_id}'),
+            'color': CHART_COLORS[index % len(CHART_COLORS)],
+            'points': ' '.join(points),
+            'latest': series['points'][-1],
+            'rank': series['ranks'][-1]
+        })
+    lines.sort(key=lambda line: line['rank'] or len(lines) + 1)
+    
+    chart = {'width': width, 'height': height, 'pad': pad, 'top': top, 'lines': lines,
+             'first': history['times'][0] if count else None,
+             'last': history['times'][-1] if count else None}
+    return render_template('leaderboard_history.html', chart=chart, public_view=True)
+
+@overview_bp.route('/leaderboard/stream')
+def live_stream():
+    """
+    Server-Sent Events stream of leaderboard and winner list deltas
+    
+    A sync worker serves one request at a time, so an open stream would hold
+    it for every other visitor. Servers that set wsgi.multithread (gevent,
+    gthread and the threaded development server) get the stream; sync
+    workers answer 204, which makes EventSource stop, and pages fall back
+    to reloading. Only the winner list asks for event results (events=1);
+    the leaderboard gets totals and movement alone.
+    """
+    if not request.environ.get('wsgi.multithread'):
+        return Response(status=204)
+    
+    client_generation = request.headers.get('Last-Event-ID') or request.args.get('generation')
+    try:
+        client_generation = int(client_generation)
+    except (TypeError, ValueError):
+        client_generation = None
+    with_events = request.args.get('events') == '1'
+    
+    poll_seconds = current_app.config['LIVE_STREAM_POLL_SECONDS']
+    heartbeat_seconds = current_app.config['LIVE_STREAM_HEARTBEAT_SECONDS']
+    max_seconds = current_app.config['LIVE_STREAM_MAX_SECONDS']
+    
+    def generate():
+        started = last_write = time.monotonic()
+        sent_generation = client_generation
+        sent_state = None
+        yield 'retry: 3000\n\n'
+        
+        while True:
+            generation = CacheGeneration.current()
+            if generation != sent_generation or sent_state is None:
+                state = get_live_state(generation)
+                if generation == sent_generation:
+                    # The client already shows this generation; use it as the diff base
+                    delta = None
+                else:
+                    delta = diff_live_state(sent_state, state, with_events)
+                sent_generation, sent_state = generation, state
+                if delta is not None:
+                    payload = json.dumps(delta, separators=(',', ':'))
+                    yield f'id: {generation}\nevent: update\ndata: {payload}\n\n'
+                    last_write = time.monotonic()
+            # Release the connection and read snapshot between polls
+            db.session.close()
+            
+            now = time.monotonic()
+            if now - started >= max_seconds:
+                return
+            if now - last_write >= heartbeat_seconds:
+                yield ': ping\n\n'
+                last_write = now
+            time.sleep(poll_seconds)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @overview_bp.route('/events')
 @overview_bp.route('/winners')
 def public_events():
     """Public display of all events - Winner List"""
-    from models import Event
-    events = Event.query.order_by(Event.created_at.desc()).all()
-    return render_template('public_events.html', events=events, public_view=True)
+    after = current_cursor()
+    if after is None:
+        return cached_page('events', render_public_events)
+    parse_cursor(after)  # Reject malformed cursors before answering
+    return cached_page(f'events@{after}', lambda: render_public_events(after), store=False)
+
+def render_public_events(after=None):
+    """Render one page of the winner list from the stored event results"""
+    rows, next_cursor = keyset_page(
+        db.session.query(EventResult.event_id, EventResult.created_at, EventResult.data),
+        EventResult.created_at, EventResult.event_id,
+        current_app.config['EVENTS_PAGE_SIZE'], after
+    )
+    events = [json.loads(row.data) for row in rows]
+    return render_template('public_events.html', events=events, next_cursor=next_cursor, public_view=True)
 
 @overview_bp.route('/manage')
 @login_required
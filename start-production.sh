@@ -5,5 +5,12 @@ echo "Starting Event Scoring System in Production Mode..."
 # Install dependencies if needed
 pip install -r requirements.txt
 
-# Start with Gunicorn
+# Create tables and default data, or add what an upgrade needs
+flask --app app init-db
+
+# Fingerprint and precompress static files
+flask --app app build-assets
+
+# Start with Gunicorn. Sync workers refuse the live leaderboard stream and
+# pages reload every 30s; set GUNICORN_WORKER_CLASS=gevent for live updates
 exec gunicorn --config gunicorn.conf.py app:app
\ No newline at end of file
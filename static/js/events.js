@@ -26,6 +26,7 @@ function addParticipant() {
   });
 
   participantRow.innerHTML = `
+        <input type="hidden" name="participant_id[]" value="">
         <select name="cluster_id[]" required>
             ${clusterOptions}
         </select>
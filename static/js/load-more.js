@@ -0,0 +1,53 @@
+/**
+ * "Load more" pagination for long lists
+ * Fetches the next page behind a .load-more link and appends its rows to
+ * the element named by the link's data-target selector. Without JavaScript
+ * the link simply navigates to the next page.
+ */
+
+(function () {
+  document.addEventListener("click", function (e) {
+    const link = e.target.closest("a.load-more");
+    if (!link) {
+      return;
+    }
+
+    const target = document.querySelector(link.dataset.target);
+    if (!target) {
+      return;
+    }
+
+    e.preventDefault();
+    link.textContent = "Loading…";
+
+    fetch(link.href, { credentials: "same-origin" })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error("HTTP " + response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        const page = new DOMParser().parseFromString(html, "text/html");
+        const rows = page.querySelector(link.dataset.target);
+        if (rows) {
+          Array.from(rows.children).forEach(function (row) {
+            target.appendChild(document.adoptNode(row));
+          });
+        }
+
+        // Swap in the next page's link, or drop it on the last page
+        const wrapper = link.closest(".load-more-wrapper") || link;
+        const next = page.querySelector(".load-more-wrapper");
+        if (next) {
+          wrapper.replaceWith(document.adoptNode(next));
+        } else {
+          wrapper.remove();
+        }
+      })
+      .catch(function () {
+        // Fall back to a normal page load
+        window.location.href = link.href;
+      });
+  });
+})();
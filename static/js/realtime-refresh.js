@@ -1,6 +1,8 @@
 /**
- * Real-time refresh for leaderboard and winner list
- * Refreshes the page every 30 seconds to show updated scores
+ * Real-time updates for leaderboard and winner list
+ * Listens to /leaderboard/stream and patches the page in place when scores
+ * change. Falls back to reloading the page every 30 seconds when the browser
+ * cannot keep a stream open or the server does not offer one (204).
  */
 
 (function () {
@@ -8,15 +10,27 @@
   const isPublicPage =
     window.location.pathname === "/leaderboard" ||
     window.location.pathname === "/events" ||
+    window.location.pathname === "/winners" ||
     window.location.pathname === "/";
 
   if (!isPublicPage) {
     return;
   }
 
-  // Refresh interval in milliseconds (30 seconds)
+  // Refresh interval for the reload fallback in milliseconds (30 seconds)
   const REFRESH_INTERVAL = 30000;
 
+  // Give up on the stream after this many failed connection attempts
+  const MAX_STREAM_FAILURES = 3;
+
+  // A stream that ends sooner than this counts as a failure, even if it
+  // opened; the server only ends healthy streams after several minutes
+  const MIN_STREAM_LIFETIME = 60000;
+
+  const leaderboard = document.getElementById("leaderboard");
+  const eventsContainer = document.getElementById("events-container");
+  const root = leaderboard || eventsContainer;
+
   // Store scroll position before refresh
   function saveScrollPosition() {
     sessionStorage.setItem("scrollPosition", window.scrollY);
@@ -34,17 +48,265 @@
   // Restore scroll position on page load
   window.addEventListener("load", restoreScrollPosition);
 
-  // Set up auto-refresh
-  setInterval(function () {
-    saveScrollPosition();
-    window.location.reload();
-  }, REFRESH_INTERVAL);
+  // ---------------------------------------------------------------------
+  // Leaderboard patching
+  // ---------------------------------------------------------------------
+
+  function applyTotals(totals) {
+    if (!leaderboard) {
+      return;
+    }
+    const tbody = leaderboard.querySelector("tbody");
+    if (!tbody) {
+      return;
+    }
+
+    Object.keys(totals).forEach(function (clusterId) {
+      const row = tbody.querySelector(`tr[data-cluster-id="${clusterId}"]`);
+      if (row) {
+        row.querySelector(".points-cell").textContent = totals[clusterId];
+      }
+    });
+
+    // Re-sort rows by points (stable, so ties keep their order) and re-rank
+    const rows = Array.from(tbody.querySelectorAll("tr[data-cluster-id]"));
+    rows
+      .map(function (row, index) {
+        return {
+          row: row,
+          index: index,
+          points: parseInt(row.querySelector(".points-cell").textContent) || 0,
+        };
+      })
+      .sort(function (a, b) {
+        return b.points - a.points || a.index - b.index;
+      })
+      .forEach(function (item, rank) {
+        const number =
+          item.row.querySelector(".rank-number") ||
+          item.row.querySelector(".rank-cell");
+        number.textContent = rank + 1;
+        tbody.appendChild(item.row);
+      });
+  }
+
+  function applyMovement(movement) {
+    if (!leaderboard) {
+      return;
+    }
+    leaderboard.querySelectorAll("tr[data-cluster-id]").forEach(function (row) {
+      const badge = row.querySelector(".rank-movement");
+      if (!badge) {
+        return;
+      }
+      const moved = movement[row.dataset.clusterId] || 0;
+      badge.textContent = moved > 0 ? "▲" + moved : moved < 0 ? "▼" + -moved : "";
+      badge.classList.toggle("up", moved > 0);
+      badge.classList.toggle("down", moved < 0);
+    });
+  }
+
+  // ---------------------------------------------------------------------
+  // Winner list patching
+  // ---------------------------------------------------------------------
+
+  function element(tag, className, text) {
+    const node = document.createElement(tag);
+    if (className) {
+      node.className = className;
+    }
+    if (text !== undefined) {
+      node.textContent = text;
+    }
+    return node;
+  }
+
+  function positionLabel(position) {
+    if (position === 1) return "🥇";
+    if (position === 2) return "🥈";
+    if (position === 3) return "🥉";
+    return String(position);
+  }
+
+  // data is [name, date, creator, [[position, name, cluster, points], ...]]
+  function buildEventCard(eventId, data) {
+    const [name, date, creator, participants] = data;
+
+    const card = element("div", "card event-card-public glass-card");
+    card.dataset.eventId = eventId;
+
+    const header = element("div", "event-header");
+    header.appendChild(element("h3", null, name));
+    header.appendChild(element("span", "event-date", date));
+    card.appendChild(header);
+
+    const details = element("div", "event-details");
+    const meta = element("p", "event-meta");
+    meta.appendChild(element("strong", null, "Created by:"));
+    meta.appendChild(document.createTextNode(" " + (creator || "") + " "));
+    meta.appendChild(element("br"));
+    meta.appendChild(element("strong", null, "Participants:"));
+    meta.appendChild(document.createTextNode(" " + participants.length));
+    details.appendChild(meta);
+
+    if (participants.length) {
+      const preview = element("div", "participants-preview");
+      preview.appendChild(element("h4", null, "Results:"));
+
+      const table = element("table", "table compact-table glass-table");
+      const headRow = table.createTHead().insertRow();
+      ["Position", "Participant", "Cluster", "Points"].forEach(function (title) {
+        headRow.appendChild(element("th", null, title));
+      });
+
+      const tbody = table.createTBody();
+      participants.forEach(function (participant) {
+        const [position, participantName, clusterName, points] = participant;
+        const row = tbody.insertRow();
+        row.appendChild(element("td", "position-cell", positionLabel(position)));
+        const nameCell = element("td");
+        nameCell.appendChild(element("strong", null, participantName));
+        row.appendChild(nameCell);
+        const clusterCell = element("td");
+        clusterCell.appendChild(element("span", "cluster-badge", clusterName));
+        row.appendChild(clusterCell);
+        row.appendChild(element("td", "points-cell", points));
+      });
+
+      preview.appendChild(table);
+      details.appendChild(preview);
+    }
+
+    card.appendChild(details);
+    return card;
+  }
+
+  function removeEvent(eventId) {
+    const card = eventsContainer.querySelector(`[data-event-id="${eventId}"]`);
+    if (card) {
+      card.remove();
+    }
+  }
+
+  function applyEvents(events, removed, full) {
+    if (!eventsContainer) {
+      return;
+    }
+
+    if (full) {
+      eventsContainer.querySelectorAll("[data-event-id]").forEach(function (card) {
+        if (!(card.dataset.eventId in events)) {
+          card.remove();
+        }
+      });
+    }
+    (removed || []).forEach(removeEvent);
+
+    Object.keys(events).forEach(function (eventId) {
+      const card = buildEventCard(eventId, events[eventId]);
+      const existing = eventsContainer.querySelector(`[data-event-id="${eventId}"]`);
+      if (existing) {
+        existing.replaceWith(card);
+        return;
+      }
+      // Newest events first: insert before the first card with a lower id
+      const cards = Array.from(eventsContainer.querySelectorAll("[data-event-id]"));
+      const next = cards.find(function (other) {
+        return parseInt(other.dataset.eventId) < parseInt(eventId);
+      });
+      if (!next && cards.length && document.querySelector("a.load-more")) {
+        // Older than everything shown; it belongs to a page not loaded yet
+        return;
+      }
+      eventsContainer.insertBefore(card, next || null);
+    });
+
+    const placeholder = document.getElementById("no-events");
+    if (placeholder) {
+      placeholder.style.display = eventsContainer.querySelector("[data-event-id]")
+        ? "none"
+        : "";
+    }
+  }
+
+  // ---------------------------------------------------------------------
+  // Connection handling
+  // ---------------------------------------------------------------------
+
+  function startReloadFallback() {
+    setIndicator("🔄 Auto-updating every 30s");
+    setInterval(function () {
+      saveScrollPosition();
+      window.location.reload();
+    }, REFRESH_INTERVAL);
+  }
+
+  function startStream() {
+    const generation = root ? root.dataset.generation : "";
+    // Only the winner list needs event results; the leaderboard skips them
+    const source = new EventSource(
+      "/leaderboard/stream?generation=" +
+        encodeURIComponent(generation || "") +
+        (eventsContainer ? "&events=1" : "")
+    );
+    let failures = 0;
+    let openedAt = 0;
+
+    source.addEventListener("open", function () {
+      openedAt = Date.now();
+      setIndicator("🟢 Live");
+    });
+
+    source.addEventListener("update", function (message) {
+      const delta = JSON.parse(message.data);
+      if (delta.totals) {
+        applyTotals(delta.totals);
+      }
+      if (delta.movement) {
+        applyMovement(delta.movement);
+      }
+      if (delta.events || delta.removed) {
+        applyEvents(delta.events || {}, delta.removed, delta.full);
+      }
+    });
+
+    source.addEventListener("error", function () {
+      // A 204 or other refusal closes the source for good
+      if (source.readyState === EventSource.CLOSED) {
+        startReloadFallback();
+        return;
+      }
+      // The server closes streams periodically; EventSource reconnects on
+      // its own and resumes from the last generation it received. Only a
+      // stream that stayed open long enough clears earlier failures.
+      if (openedAt && Date.now() - openedAt >= MIN_STREAM_LIFETIME) {
+        failures = 0;
+      }
+      openedAt = 0;
+      failures += 1;
+      if (failures >= MAX_STREAM_FAILURES) {
+        source.close();
+        startReloadFallback();
+      }
+    });
+  }
+
+  // Add visual indicator that live updates are active
+  let indicator = null;
+  let pendingIndicatorText = "🔄 Connecting…";
+
+  function setIndicator(text) {
+    if (indicator) {
+      indicator.innerHTML = text;
+    } else {
+      pendingIndicatorText = text;
+    }
+  }
 
-  // Add visual indicator that auto-refresh is active
   function addRefreshIndicator() {
-    const indicator = document.createElement("div");
+    indicator = document.createElement("div");
     indicator.id = "refresh-indicator";
-    indicator.innerHTML = "🔄 Auto-updating every 30s";
+    indicator.innerHTML = pendingIndicatorText;
     indicator.style.cssText = `
             position: fixed;
             bottom: 20px;
@@ -79,4 +341,10 @@
   window.addEventListener("load", function () {
     setTimeout(addRefreshIndicator, 1000);
   });
+
+  if (window.EventSource && root) {
+    startStream();
+  } else {
+    startReloadFallback();
+  }
 })();
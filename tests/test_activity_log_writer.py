@@ -0,0 +1,80 @@
+import time
+import pytest
+from datetime import datetime
+from models import User, ActivityLog, db
+from utils.logger import ActivityLogWriter
+
+@pytest.fixture
+def app(tmp_path):
+    """Create test application backed by a file database shared across threads"""
+    from flask import Flask
+    from config import Config
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "logs.db"}'
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='manager', role='event_manager', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        app.config['TEST_USER_ID'] = user.id
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+def make_entries(app, count):
+    return [{
+        'user_id': app.config['TEST_USER_ID'],
+        'action': 'edit_event',
+        'details': f'{{"n": {i}}}',
+        'timestamp': datetime.utcnow()
+    } for i in range(count)]
+
+def stored_count(app):
+    with app.app_context():
+        db.session.remove()
+        return ActivityLog.query.count()
+
+def test_writer_flushes_in_background(app):
+    """Test queued entries are written in batches without an explicit flush"""
+    writer = ActivityLogWriter(app, batch_size=3, flush_interval=0.05)
+    try:
+        for entry in make_entries(app, 7):
+            writer.enqueue(entry)
+
+        deadline = time.monotonic() + 5
+        while stored_count(app) < 7 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert stored_count(app) == 7
+    finally:
+        writer.stop()
+
+def test_stop_flushes_pending_entries(app):
+    """Test shutdown writes entries that are still waiting for their batch"""
+    writer = ActivityLogWriter(app, batch_size=100, flush_interval=60)
+    for entry in make_entries(app, 4):
+        writer.enqueue(entry)
+    writer.stop()
+
+    assert stored_count(app) == 4
+    with app.app_context():
+        details = [log.get_details_dict()['n'] for log in ActivityLog.query.order_by(ActivityLog.id)]
+    assert details == [0, 1, 2, 3]
+
+def test_full_queue_writes_synchronously(app):
+    """Test entries are never dropped when the queue is full"""
+    writer = ActivityLogWriter(app, max_queue=1, batch_size=100, flush_interval=60)
+    writer._stopping.set()  # keep the background thread from draining the queue
+    writer._thread.join()
+    for entry in make_entries(app, 3):
+        writer.enqueue(entry)
+
+    assert stored_count(app) == 2
+    writer.stop()
+    assert stored_count(app) == 3
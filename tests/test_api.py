@@ -0,0 +1,156 @@
+import pytest
+from models import User, Cluster, ClusterTotal, Event, EventResult, Participant, db
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['EVENTS_PAGE_SIZE'] = 2
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+    from routes.api import api_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+    app.register_blueprint(api_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka', 'Swarnika']:
+            db.session.add(Cluster(name=name))
+
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add(manager)
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def manager_client(app):
+    client = app.test_client()
+    client.post('/login', data={'username': 'manager', 'password': 'manager123'})
+    return client
+
+def create_event(client, app, name, cluster_name, points):
+    with app.app_context():
+        cluster_id = Cluster.query.filter_by(name=cluster_name).first().id
+    client.post('/manage/events/create', data={
+        'event_name': name,
+        'cluster_id[]': [cluster_id],
+        'participant_name[]': [f'{name} winner'],
+        'position[]': [1],
+        'points[]': [points]
+    })
+
+def test_leaderboard(app, manager_client):
+    """Test the leaderboard is compact, ordered and publicly cacheable"""
+    create_event(manager_client, app, 'Relay', 'Swarnika', 10)
+
+    response = app.test_client().get('/api/v1/leaderboard')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    data = response.get_json()
+    assert data['columns'] == ['id', 'name', 'logo_url', 'points', 'movement']
+    assert data['clusters'][0][1:] == ['Swarnika', '/static/images/clusters/swarnika.png', 10, 2]
+    assert response.headers['ETag']
+    assert 'public' in response.headers['Cache-Control']
+    assert 'max-age=5' in response.headers['Cache-Control']
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+    assert b', ' not in response.data and b': ' not in response.data
+
+def test_conditional_request_and_invalidation(app, manager_client):
+    """Test matching ETags get a 304 until the data changes"""
+    client = app.test_client()
+    etag = client.get('/api/v1/leaderboard').headers['ETag']
+
+    response = client.get('/api/v1/leaderboard', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    create_event(manager_client, app, 'Relay', 'Suryantra', 5)
+    response = client.get('/api/v1/leaderboard', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_logged_in_clients_share_the_cache(app, manager_client):
+    """Test logged-in requests get the same cacheable response as anonymous ones"""
+    anonymous = app.test_client().get('/api/v1/leaderboard')
+    response = manager_client.get('/api/v1/leaderboard')
+    assert response.headers['ETag'] == anonymous.headers['ETag']
+    assert response.data == anonymous.data
+
+def test_events_pages(app, manager_client):
+    """Test events are paginated newest first with a next cursor"""
+    for i, name in enumerate(['Heat 1', 'Heat 2', 'Heat 3']):
+        create_event(manager_client, app, name, 'Suryantra', i)
+
+    client = app.test_client()
+    first = client.get('/api/v1/events').get_json()
+    assert [event['name'] for event in first['events']] == ['Heat 3', 'Heat 2']
+    assert first['events'][0]['results'][0]['cluster'] == 'Suryantra'
+
+    second = client.get('/api/v1/events', query_string={'after': first['next']}).get_json()
+    assert [event['name'] for event in second['events']] == ['Heat 1']
+    assert second['next'] is None
+
+    assert client.get('/api/v1/events?after=garbage').status_code == 400
+
+def test_single_event(app, manager_client):
+    """Test one event's results, built by fill_missing() rather than on read"""
+    with app.app_context():
+        cluster = Cluster.query.first()
+        event = Event(name='Legacy', created_by=User.query.first().id)
+        db.session.add(event)
+        db.session.flush()
+        db.session.add(Participant(event_id=event.id, cluster_id=cluster.id, name='Old', position=1, points=3))
+        db.session.commit()
+        event_id = event.id
+
+    client = app.test_client()
+    assert client.get(f'/api/v1/events/{event_id}').status_code == 404
+    with app.app_context():
+        EventResult.fill_missing()
+    response = client.get(f'/api/v1/events/{event_id}')
+    assert response.status_code == 200
+    assert response.get_json()['results'][0]['name'] == 'Old'
+    assert response.headers['ETag']
+
+    response = client.get('/api/v1/events/999')
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'Event not found'}
+
+def test_payload_is_smaller_than_html(app, manager_client):
+    """Test the JSON winner list is a fraction of the HTML page"""
+    for i in range(2):
+        create_event(manager_client, app, f'Event {i}', 'Chandraloka', 4)
+
+    client = app.test_client()
+    html = client.get('/events').data
+    api = client.get('/api/v1/events').data
+    assert len(api) * 4 < len(html)
@@ -0,0 +1,135 @@
+import gzip
+import json
+import os
+import pytest
+from models import Cluster, db
+from utils.assets import ASSET_MAX_AGE, build_assets, init_assets
+
+STYLESHEET = b'body { background-image: url("/static/images/background.png"); }\n' * 20
+SCRIPT = b'console.log("refresh");\n' * 50
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+@pytest.fixture
+def static_folder(tmp_path):
+    """A small built static folder shaped like the project's"""
+    folder = tmp_path / 'static'
+    write(folder / 'css' / 'style.css', STYLESHEET)
+    write(folder / 'js' / 'events.js', SCRIPT)
+    write(folder / 'images' / 'background.png', b'\x89PNG background')
+    os.makedirs(folder / 'images' / 'clusters')
+    try:
+        from PIL import Image
+        Image.new('RGBA', (720, 720), (200, 40, 40, 255)).save(folder / 'images' / 'clusters' / 'maya.png')
+    except ImportError:
+        write(folder / 'images' / 'clusters' / 'maya.png', b'\x89PNG logo')
+    build_assets(str(folder))
+    return str(folder)
+
+@pytest.fixture
+def app(static_folder):
+    """Create test application serving a built static folder"""
+    from flask import Flask
+    from config import Config
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=static_folder)
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(app)
+
+    init_assets(app)
+    yield app
+
+def manifest(static_folder):
+    with open(os.path.join(static_folder, 'build', 'manifest.json')) as f:
+        return json.load(f)['files']
+
+def test_build_fingerprints_and_precompresses(static_folder):
+    """Test built files carry content hashes and compressed siblings"""
+    files = manifest(static_folder)
+    assert files['css/style.css'].startswith('build/css/style.')
+    assert files['css/style.css'] != 'build/css/style.css'
+
+    built_css = os.path.join(static_folder, files['css/style.css'])
+    with open(built_css, 'rb') as f:
+        css = f.read()
+    assert f'/static/{files["images/background.png"]}'.encode() in css
+    with open(built_css + '.gz', 'rb') as f:
+        assert gzip.decompress(f.read()) == css
+    assert os.path.exists(os.path.join(static_folder, files['js/events.js']) + '.gz')
+    # Images are not compressed again
+    assert not os.path.exists(os.path.join(static_folder, files['images/background.png']) + '.gz')
+
+def test_build_makes_resized_webp_logos(static_folder):
+    """Test each cluster logo gets a WebP variant no wider than needed"""
+    Image = pytest.importorskip('PIL.Image')
+    webp = manifest(static_folder)['images/clusters/maya.webp']
+    assert webp.endswith('.webp')
+    with Image.open(os.path.join(static_folder, webp)) as image:
+        assert image.format == 'WEBP'
+        assert image.size == (360, 360)
+
+def test_rebuild_keeps_previous_build_only(static_folder):
+    """Test a rebuild keeps the build before it and removes older ones"""
+    first = manifest(static_folder)['js/events.js']
+    write(os.path.join(static_folder, 'js', 'events.js'), SCRIPT + b'// v2\n')
+    second = build_assets(static_folder)['js/events.js']
+    write(os.path.join(static_folder, 'js', 'events.js'), SCRIPT + b'// v3\n')
+    third = build_assets(static_folder)['js/events.js']
+
+    assert len({first, second, third}) == 3
+    assert not os.path.exists(os.path.join(static_folder, first))
+    assert not os.path.exists(os.path.join(static_folder, first) + '.gz')
+    assert os.path.exists(os.path.join(static_folder, second))
+    assert os.path.exists(os.path.join(static_folder, third))
+
+def test_url_for_uses_fingerprinted_names(app, static_folder):
+    """Test url_for and cluster logos point at the built files"""
+    from flask import url_for
+
+    files = manifest(static_folder)
+    with app.test_request_context():
+        assert url_for('static', filename='css/style.css') == f'/static/{files["css/style.css"]}'
+        assert url_for('static', filename='images/missing.png') == '/static/images/missing.png'
+        logo = files.get('images/clusters/maya.webp', files['images/clusters/maya.png'])
+        assert Cluster.logo_url_for('Maya') == f'/static/{logo}'
+        assert Cluster.logo_url_for('Unbuilt') == '/static/images/clusters/unbuilt.png'
+    assert Cluster.logo_url_for('Maya') == '/static/images/clusters/maya.png'
+
+def test_built_files_are_immutable_and_precompressed(app, static_folder):
+    """Test built files are served with year-long caching and negotiated encodings"""
+    client = app.test_client()
+    path = '/static/' + manifest(static_folder)['css/style.css']
+
+    plain = client.get(path)
+    assert plain.status_code == 200
+    assert plain.data == client.get(path, headers={'Accept-Encoding': 'identity'}).data
+    assert 'Content-Encoding' not in plain.headers
+    assert 'immutable' in plain.headers['Cache-Control']
+    assert f'max-age={ASSET_MAX_AGE}' in plain.headers['Cache-Control']
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    zipped = client.get(path, headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert zipped.mimetype == 'text/css'
+    assert gzip.decompress(zipped.data) == plain.data
+
+    brotli = pytest.importorskip('brotli')
+    compressed = client.get(path, headers={'Accept-Encoding': 'gzip, br'})
+    assert compressed.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(compressed.data) == plain.data
+
+def test_unbuilt_paths_keep_default_serving(app):
+    """Test original static paths still work with the usual caching"""
+    response = app.test_client().get('/static/css/style.css')
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers.get('Cache-Control', '')
+    response.close()
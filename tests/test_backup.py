@@ -0,0 +1,129 @@
+import gzip
+import os
+import sqlite3
+import pytest
+import backup_db
+
+@pytest.fixture
+def database(tmp_path):
+    """Create a WAL database with some rows"""
+    path = str(tmp_path / 'event_scoring.db')
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('CREATE TABLE scores (id INTEGER PRIMARY KEY, points INTEGER)')
+    connection.executemany('INSERT INTO scores (points) VALUES (?)', [(i,) for i in range(5000)])
+    connection.commit()
+    yield path, connection
+    connection.close()
+
+def read_backup(path, tmp_path):
+    """Decompress a backup and return its row count and journal mode"""
+    plain = str(tmp_path / 'check.db')
+    with gzip.open(path, 'rb') as source, open(plain, 'wb') as dest:
+        dest.write(source.read())
+    connection = sqlite3.connect(plain)
+    try:
+        count = connection.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+        mode = connection.execute('PRAGMA journal_mode').fetchone()[0]
+    finally:
+        connection.close()
+    return count, mode
+
+def test_backup_is_compressed_verified_copy(database, tmp_path):
+    """Test a backup holds every committed row in a standalone file"""
+    path, connection = database
+    backup_dir = str(tmp_path / 'backups')
+
+    backup_path = backup_db.backup_database(path, backup_dir)
+
+    assert backup_path.endswith('.db.gz')
+    assert read_backup(backup_path, tmp_path) == (5000, 'delete')
+    # No work files are left behind, only the backup and its journal record
+    assert sorted(os.listdir(backup_dir)) == [os.path.basename(backup_path), os.path.basename(backup_path) + '.json']
+
+def test_copy_survives_concurrent_writes(database, tmp_path):
+    """Test writes during an incremental backup fall back to a single-step copy"""
+    path, connection = database
+    dest = str(tmp_path / 'copy.db')
+    steps = []
+
+    def write_between_steps(seconds):
+        steps.append(seconds)
+        connection.execute('INSERT INTO scores (points) VALUES (1)')
+        connection.commit()
+
+    original_sleep = backup_db.time.sleep
+    backup_db.time.sleep = write_between_steps
+    try:
+        backup_db.copy_database(path, dest, pages=1, step_sleep=0.001, max_restarts=2)
+    finally:
+        backup_db.time.sleep = original_sleep
+
+    assert steps
+    assert backup_db.verify_database(dest)
+    copied = sqlite3.connect(dest).execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+    assert copied >= 5000
+
+def test_retention_keeps_newest(tmp_path):
+    """Test pruning keeps the newest backups and ignores other files"""
+    backup_dir = tmp_path / 'backups'
+    backup_dir.mkdir()
+    names = [f'event_scoring_backup_2024010{day}_120000.db.gz' for day in range(1, 6)]
+    for name in names + ['notes.txt']:
+        (backup_dir / name).write_bytes(b'')
+    for name in names:
+        (backup_dir / (name + '.json')).write_text('{"journal_id": 1}')
+
+    removed = backup_db.prune_backups(str(backup_dir), keep=2, max_age_days=0)
+
+    assert removed == names[:3]
+    assert sorted(os.listdir(backup_dir)) == sorted(names[3:] + [name + '.json' for name in names[3:]] + ['notes.txt'])
+
+def test_retention_by_age_keeps_latest(tmp_path):
+    """Test age-based pruning never removes the newest backup"""
+    backup_dir = tmp_path / 'backups'
+    backup_dir.mkdir()
+    for name in ['event_scoring_backup_20240101_120000.db', 'event_scoring_backup_20240102_120000.db']:
+        (backup_dir / name).write_bytes(b'')
+        os.utime(backup_dir / name, (0, 0))
+
+    removed = backup_db.prune_backups(str(backup_dir), keep=0, max_age_days=7)
+
+    assert removed == ['event_scoring_backup_20240101_120000.db']
+
+def test_restore_round_trip(database, tmp_path):
+    """Test restoring a compressed backup brings back the saved rows"""
+    path, connection = database
+    backup_dir = str(tmp_path / 'backups')
+    backup_path = backup_db.backup_database(path, backup_dir)
+
+    connection.execute('DELETE FROM scores')
+    connection.commit()
+
+    assert backup_db.restore_backup(os.path.basename(backup_path), path, backup_dir)
+    assert connection.execute('SELECT COUNT(*) FROM scores').fetchone()[0] == 5000
+
+def test_restore_advances_cache_generation(database, tmp_path):
+    """Test a restore moves the cache generation past the live one, not back to the backup's"""
+    path, connection = database
+    backup_dir = str(tmp_path / 'backups')
+    connection.execute('CREATE TABLE cache_generation (id INTEGER PRIMARY KEY, generation INTEGER, updated_at TEXT)')
+    connection.execute('INSERT INTO cache_generation (id, generation) VALUES (1, 3)')
+    connection.commit()
+    backup_path = backup_db.backup_database(path, backup_dir)
+
+    connection.execute('UPDATE cache_generation SET generation = 9')
+    connection.commit()
+
+    assert backup_db.restore_backup(os.path.basename(backup_path), path, backup_dir)
+    assert connection.execute('SELECT generation FROM cache_generation').fetchall() == [(10,)]
+
+def test_restore_rejects_corrupt_backup(database, tmp_path):
+    """Test a backup that fails the integrity check is not restored"""
+    path, connection = database
+    backup_dir = tmp_path / 'backups'
+    backup_dir.mkdir()
+    (backup_dir / 'event_scoring_backup_20240101_120000.db').write_bytes(b'not a database' * 100)
+
+    assert not backup_db.restore_backup('event_scoring_backup_20240101_120000.db', path, str(backup_dir))
+    assert connection.execute('SELECT COUNT(*) FROM scores').fetchone()[0] == 5000
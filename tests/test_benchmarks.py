@@ -0,0 +1,105 @@
+import pytest
+from models import Cluster, Event, Participant, User, db
+from benchmarks.load import ClientTarget, Scenario, find_regressions, main, percentile, prepare_fixtures, run_scenario
+from benchmarks.seed import BENCH_PASSWORD, BENCH_USERNAME, seed_database
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka', 'Swarnika']:
+            db.session.add(Cluster(name=name))
+        db.session.commit()
+
+        seed_database(events=12, participants=4, seed=7)
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+def test_seed_is_reproducible(app):
+    """Test the generator makes the requested rows the same way every time"""
+    with app.app_context():
+        assert Event.query.count() == 12
+        assert Participant.query.count() == 48
+        assert User.query.filter_by(username=BENCH_USERNAME).first().role == 'event_manager'
+        first = [(p.cluster_id, p.points) for p in Participant.query.order_by(Participant.id)]
+
+        Participant.query.delete()
+        Event.query.delete()
+        db.session.commit()
+        seed_database(events=12, participants=4, seed=7)
+        assert [(p.cluster_id, p.points) for p in Participant.query.order_by(Participant.id)] == first
+
+@pytest.mark.parametrize('name', ['leaderboard', 'events', 'manage_events', 'create_event', 'edit_event'])
+def test_scenarios_run_cleanly(app, name):
+    """Test every scenario succeeds with CSRF enforced and counts its SQL"""
+    fixtures = prepare_fixtures(app, BENCH_USERNAME, BENCH_PASSWORD)
+    target = ClientTarget(app)
+    try:
+        result = run_scenario(target, Scenario(name, fixtures), requests=4, warmup=1)
+    finally:
+        target.close()
+
+    assert result['requests'] == 4
+    assert result['errors'] == 0
+    assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+    assert result['sql_per_request'] >= 1
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
+
+def test_find_regressions():
+    """Test SQL growth always fails while timings get the tolerance"""
+    baseline = {'client': {'events': {'p95_ms': 20.0, 'rps': 100.0, 'sql_per_request': 1.0}}}
+
+    def result(p95, rps, sql):
+        return {'client': {'events': {'p95_ms': p95, 'rps': rps, 'sql_per_request': sql}}}
+
+    assert find_regressions(result(28.0, 60.0, 1.0), baseline, 0.5) == []
+    assert len(find_regressions(result(20.0, 100.0, 2.0), baseline, 0.5)) == 1
+    assert len(find_regressions(result(32.0, 40.0, 1.0), baseline, 0.5)) == 2
+    # Small absolute growth is noise
+    fast = {'client': {'events': {'p95_ms': 2.0, 'rps': 100.0, 'sql_per_request': 1.0}}}
+    assert find_regressions(result(6.0, 100.0, 1.0), fast, 0.5) == []
+    # Scenarios missing from the baseline are not judged
+    assert find_regressions({'gunicorn': result(99, 1, None)['client']}, baseline, 0.5) == []
+
+def test_viewers_need_gunicorn():
+    """Test background stream viewers are only accepted with --gunicorn"""
+    with pytest.raises(SystemExit) as exc:
+        main(['--viewers', '10'])
+    assert exc.value.code == 2
@@ -0,0 +1,237 @@
+import pytest
+from models import User, Cluster, ClusterTotal, Event, Participant, db
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka', 'Swarnika']:
+            db.session.add(Cluster(name=name))
+
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add(manager)
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create logged-in test client"""
+    client = app.test_client()
+    client.post('/login', data={'username': 'manager', 'password': 'manager123'})
+    return client
+
+def stored_totals():
+    """Return {cluster name: stored total}"""
+    rows = db.session.query(Cluster.name, ClusterTotal.total_points)\
+        .join(ClusterTotal, ClusterTotal.cluster_id == Cluster.id).all()
+    return dict(rows)
+
+def test_totals_follow_create_edit_delete(client, app):
+    """Test totals are maintained by every event write"""
+    with app.app_context():
+        s_id = Cluster.query.filter_by(name='Suryantra').first().id
+        c_id = Cluster.query.filter_by(name='Chandraloka').first().id
+
+    client.post('/manage/events/create', data={
+        'event_name': 'Relay',
+        'cluster_id[]': [s_id, c_id, s_id],
+        'participant_name[]': ['A', 'B', 'C'],
+        'position[]': [1, 2, 3],
+        'points[]': [10, 7, 5]
+    })
+    with app.app_context():
+        assert stored_totals() == {'Suryantra': 15, 'Chandraloka': 7, 'Swarnika': 0}
+        event_id = Event.query.filter_by(name='Relay').first().id
+
+    client.post(f'/manage/events/{event_id}/edit', data={
+        'event_name': 'Relay',
+        'cluster_id[]': [c_id],
+        'participant_name[]': ['B'],
+        'position[]': [1],
+        'points[]': [12]
+    })
+    with app.app_context():
+        assert stored_totals() == {'Suryantra': 0, 'Chandraloka': 12, 'Swarnika': 0}
+
+    client.post(f'/manage/events/{event_id}/delete')
+    with app.app_context():
+        assert stored_totals() == {'Suryantra': 0, 'Chandraloka': 0, 'Swarnika': 0}
+        assert ClusterTotal.find_drift() == {}
+
+def test_invalid_create_leaves_totals_untouched(client, app):
+    """Test a rejected event does not change totals"""
+    with app.app_context():
+        s_id = Cluster.query.filter_by(name='Suryantra').first().id
+
+    client.post('/manage/events/create', data={
+        'event_name': 'Broken',
+        'cluster_id[]': [s_id, s_id],
+        'participant_name[]': ['A', 'B'],
+        'position[]': [1, 2],
+        'points[]': [10, -1]
+    })
+    with app.app_context():
+        assert stored_totals()['Suryantra'] == 0
+
+def test_rebuild_reports_and_fixes_drift(app):
+    """Test drift detection and rebuild"""
+    with app.app_context():
+        cluster = Cluster.query.filter_by(name='Swarnika').first()
+        manager = User.query.filter_by(username='manager').first()
+        event = Event(name='Manual', created_by=manager.id)
+        db.session.add(event)
+        db.session.flush()
+        db.session.add(Participant(event_id=event.id, cluster_id=cluster.id, name='P', position=1, points=9))
+        db.session.commit()
+
+        assert ClusterTotal.find_drift() == {cluster.id: (0, 9)}
+        assert ClusterTotal.rebuild() == {cluster.id: (0, 9)}
+        assert ClusterTotal.find_drift() == {}
+        assert stored_totals()['Swarnika'] == 9
+
+def test_leaderboard_reads_materialized_totals(client, app):
+    """Test leaderboard is ordered by stored totals"""
+    with app.app_context():
+        ClusterTotal.apply_deltas({Cluster.query.filter_by(name='Swarnika').first().id: 50})
+        db.session.commit()
+
+    response = client.get('/leaderboard')
+    data = response.data.decode()
+    assert response.status_code == 200
+    assert data.find('Swarnika') < data.find('Suryantra')
+    assert '50' in data
+
+def test_edit_writes_only_changed_rows(client, app):
+    """Test editing one score updates that row in place and keeps ids stable"""
+    with app.app_context():
+        s_id = Cluster.query.filter_by(name='Suryantra').first().id
+        c_id = Cluster.query.filter_by(name='Chandraloka').first().id
+
+    client.post('/manage/events/create', data={
+        'event_name': 'Heat',
+        'cluster_id[]': [s_id, c_id, s_id],
+        'participant_name[]': ['A', 'B', 'C'],
+        'position[]': [1, 2, 3],
+        'points[]': [10, 7, 5]
+    })
+    with app.app_context():
+        event = Event.query.filter_by(name='Heat').first()
+        event_id = event.id
+        before = {p.name: p.id for p in event.participants}
+
+    statements = []
+    from sqlalchemy import event as sa_event
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.strip())
+
+    with app.app_context():
+        engine = db.engine
+    sa_event.listen(engine, 'before_cursor_execute', record)
+    try:
+        # B's points change, C is dropped, D is new; A is untouched
+        client.post(f'/manage/events/{event_id}/edit', data={
+            'event_name': 'Heat',
+            'participant_id[]': [before['A'], before['B'], ''],
+            'cluster_id[]': [s_id, c_id, c_id],
+            'participant_name[]': ['A', 'B', 'D'],
+            'position[]': [1, 2, 3],
+            'points[]': [10, 9, 1]
+        })
+    finally:
+        sa_event.remove(engine, 'before_cursor_execute', record)
+
+    participant_writes = [s for s in statements if 'participants' in s and not s.startswith('SELECT')]
+    assert len([s for s in participant_writes if s.startswith('UPDATE')]) == 1
+    assert len([s for s in participant_writes if s.startswith('DELETE')]) == 1
+    assert len([s for s in participant_writes if s.startswith('INSERT')]) == 1
+
+    with app.app_context():
+        after = {p.name: p for p in Event.query.get(event_id).participants}
+        assert after['A'].id == before['A']
+        assert after['B'].id == before['B'] and after['B'].points == 9
+        assert 'C' not in after
+        assert stored_totals() == {'Suryantra': 10, 'Chandraloka': 10, 'Swarnika': 0}
+        assert ClusterTotal.find_drift() == {}
+
+def test_edit_deltas_come_from_stored_points(app):
+    """Test an edit loaded before another one committed does not subtract stale points"""
+    from utils.participants import flush_event_edit, sync_participants
+
+    cluster = Cluster.query.filter_by(name='Suryantra').first()
+    event = Event(name='Relay', created_by=User.query.first().id)
+    event.participants.append(Participant(cluster_id=cluster.id, name='A', position=1, points=10))
+    db.session.add(event)
+    db.session.commit()
+    ClusterTotal.rebuild()
+
+    participant = event.participants[0]
+    assert participant.points == 10
+    # Another edit commits 15 points behind the loaded objects' back
+    db.session.execute(db.update(Participant).where(Participant.id == participant.id).values(points=15)
+                       .execution_options(synchronize_session=False))
+    ClusterTotal.apply_deltas({cluster.id: 5})
+
+    sync_participants(event, [{'id': participant.id, 'cluster_id': cluster.id, 'name': 'A',
+                               'position': 1, 'points': 12}])
+    flush_event_edit(event)
+    db.session.commit()
+
+    assert stored_totals()['Suryantra'] == 12
+    assert ClusterTotal.find_drift() == {}
+
+def test_change_set_points_by_cluster():
+    """Test the change set reports per-cluster point deltas"""
+    from utils.participants import ParticipantChanges
+
+    changes = ParticipantChanges()
+    assert not changes
+    changes.inserted.append(Participant(cluster_id=1, name='New', position=1, points=5))
+    changes.deleted.append(Participant(cluster_id=2, name='Gone', position=2, points=3))
+    moved = Participant(cluster_id=3, name='Moved', position=3, points=4)
+    changes.updated.append((moved, {'cluster_id': 1, 'points': 6}))
+    renamed = Participant(cluster_id=2, name='Renamed', position=4, points=8)
+    changes.updated.append((renamed, {'name': 'Old'}))
+
+    assert changes
+    assert changes.points_by_cluster() == {1: -1, 2: -3, 3: 4}
+    assert changes.summary() == {
+        'participants_added': 1,
+        'participants_updated': 2,
+        'participants_removed': 1
+    }
@@ -0,0 +1,164 @@
+import gzip
+import pytest
+from models import User, Cluster, ClusterTotal, db
+import utils.compression
+
+@pytest.fixture
+def app():
+    """Create test application with response compression"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    from utils.compression import init_compression
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+    from routes.api import api_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+    app.register_blueprint(api_bp)
+    init_compression(app)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka']:
+            db.session.add(Cluster(name=name))
+
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add(manager)
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create anonymous test client"""
+    return app.test_client()
+
+@pytest.fixture
+def compress_calls(monkeypatch):
+    """Count calls to the compressor"""
+    calls = []
+    compress = utils.compression.compress
+
+    def counting_compress(data, encoding):
+        calls.append(encoding)
+        return compress(data, encoding)
+
+    monkeypatch.setattr(utils.compression, 'compress', counting_compress)
+    return calls
+
+def create_event(app, name):
+    manager = app.test_client()
+    manager.post('/login', data={'username': 'manager', 'password': 'manager123'})
+    with app.app_context():
+        cluster_id = Cluster.query.filter_by(name='Chandraloka').first().id
+    manager.post('/manage/events/create', data={
+        'event_name': name,
+        'cluster_id[]': [cluster_id],
+        'participant_name[]': ['Runner'],
+        'position[]': [1],
+        'points[]': [5]
+    })
+
+def test_pages_compressed_for_accepting_clients(client):
+    """Test gzip is negotiated and the body decompresses to the plain page"""
+    plain = client.get('/leaderboard')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    zipped = client.get('/leaderboard', headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert len(zipped.data) < len(plain.data)
+    assert gzip.decompress(zipped.data) == plain.data
+    assert zipped.headers['ETag'] == 'W/' + plain.headers['ETag']
+
+    # The weak tag still revalidates
+    again = client.get('/leaderboard', headers={'Accept-Encoding': 'gzip', 'If-None-Match': zipped.headers['ETag']})
+    assert again.status_code == 304
+
+def test_brotli_preferred_when_accepted(client):
+    """Test brotli is used when the client accepts both"""
+    brotli = pytest.importorskip('brotli')
+    plain = client.get('/events')
+    response = client.get('/events', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == plain.data
+
+def test_small_responses_left_alone(client, app):
+    """Test bodies below the threshold are sent uncompressed"""
+    app.config['COMPRESS_MIN_SIZE'] = 10 ** 6
+    response = client.get('/leaderboard', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_RESPONSES'] = False
+    response = client.get('/leaderboard', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_cached_page_compressed_once_per_generation(client, app, compress_calls):
+    """Test pollers share compressed bytes until the data changes"""
+    for _ in range(5):
+        client.get('/leaderboard', headers={'Accept-Encoding': 'gzip'})
+    assert compress_calls == ['gzip']
+
+    create_event(app, 'Sprint')
+    compress_calls.clear()
+    for _ in range(3):
+        response = client.get('/leaderboard', headers={'Accept-Encoding': 'gzip'})
+    assert compress_calls == ['gzip']
+    assert gzip.decompress(response.data) == client.get('/leaderboard').data
+
+def test_uncached_responses_compressed_per_request(client, app, compress_calls):
+    """Test responses that are not stored are compressed by the after-request hook"""
+    app.config['COMPRESS_MIN_SIZE'] = 100
+    for index in range(3):
+        create_event(app, f'Heat {index}')
+    with app.app_context():
+        app.config['EVENTS_PAGE_SIZE'] = 1
+    next_cursor = client.get('/api/v1/events').get_json()['next']
+
+    for _ in range(2):
+        response = client.get(f'/api/v1/events?after={next_cursor}', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data).startswith(b'{"next"')
+    assert compress_calls == ['gzip', 'gzip']
+
+    manager = app.test_client()
+    manager.post('/login', data={'username': 'manager', 'password': 'manager123'})
+    response = manager.get('/manage/events/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+def test_streamed_exports_not_compressed(app):
+    """Test streamed responses pass through untouched"""
+    create_event(app, 'Sprint')
+    manager = app.test_client()
+    manager.post('/login', data={'username': 'manager', 'password': 'manager123'})
+    response = manager.get('/manage/events/export?format=csv', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert b'Sprint' in response.data
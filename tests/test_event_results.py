@@ -0,0 +1,165 @@
+import json
+import pytest
+from sqlalchemy import event as sa_event
+from models import User, Cluster, ClusterTotal, Event, EventResult, Participant, db
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.admin import admin_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka']:
+            db.session.add(Cluster(name=name))
+
+        admin = User(username='admin', role='admin')
+        admin.set_password('admin123')
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add_all([admin, manager])
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+def login(app, username, password):
+    client = app.test_client()
+    client.post('/login', data={'username': username, 'password': password})
+    return client
+
+def stored_result(app, name):
+    with app.app_context():
+        event = Event.query.filter_by(name=name).first()
+        row = db.session.get(EventResult, event.id)
+        return event.id, json.loads(row.data) if row else None
+
+def create_relay(client, app):
+    with app.app_context():
+        s_id = Cluster.query.filter_by(name='Suryantra').first().id
+        c_id = Cluster.query.filter_by(name='Chandraloka').first().id
+    client.post('/manage/events/create', data={
+        'event_name': 'Relay',
+        'cluster_id[]': [c_id, s_id],
+        'participant_name[]': ['Second', 'First'],
+        'position[]': [2, 1],
+        'points[]': [7, 10]
+    })
+    return s_id, c_id
+
+def test_create_stores_sorted_results(app):
+    """Test creating an event writes its pre-sorted results"""
+    client = login(app, 'manager', 'manager123')
+    create_relay(client, app)
+
+    event_id, result = stored_result(app, 'Relay')
+    assert result['id'] == event_id
+    assert result['creator'] == 'manager'
+    assert [(r['position'], r['name'], r['cluster'], r['points']) for r in result['results']] == [
+        (1, 'First', 'Suryantra', 10),
+        (2, 'Second', 'Chandraloka', 7)
+    ]
+    assert result['results'][0]['logo_url'].endswith('suryantra.png')
+
+def test_edit_and_delete_rewrite_results(app):
+    """Test edits rewrite the stored results and deletes remove them"""
+    client = login(app, 'manager', 'manager123')
+    s_id, c_id = create_relay(client, app)
+    event_id, _ = stored_result(app, 'Relay')
+
+    client.post(f'/manage/events/{event_id}/edit', data={
+        'event_name': 'Relay Final',
+        'cluster_id[]': [c_id],
+        'participant_name[]': ['Second'],
+        'position[]': [1],
+        'points[]': [12]
+    })
+    _, result = stored_result(app, 'Relay Final')
+    assert result['name'] == 'Relay Final'
+    assert [(r['cluster'], r['points']) for r in result['results']] == [('Chandraloka', 12)]
+
+    client.post(f'/manage/events/{event_id}/delete')
+    with app.app_context():
+        assert EventResult.query.count() == 0
+
+def test_manager_rename_updates_creator(app):
+    """Test renaming a manager rewrites the creator on their events"""
+    create_relay(login(app, 'manager', 'manager123'), app)
+    with app.app_context():
+        manager_id = User.query.filter_by(username='manager').first().id
+
+    admin = login(app, 'admin', 'admin123')
+    admin.post(f'/manage/admin/managers/{manager_id}/edit', data={'username': 'coach'})
+
+    assert stored_result(app, 'Relay')[1]['creator'] == 'coach'
+
+def test_winner_list_reads_only_stored_results(app):
+    """Test /events renders without querying events or participants"""
+    create_relay(login(app, 'manager', 'manager123'), app)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    sa_event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = app.test_client().get('/events')
+    finally:
+        sa_event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    assert b'First' in response.data and b'Suryantra' in response.data
+    assert not [s for s in statements if 'participants' in s]
+    assert not [s for s in statements if 'FROM events' in s]
+
+def test_missing_results_are_filled(app):
+    """Test public reads never write missing results rows; fill_missing() builds them"""
+    with app.app_context():
+        cluster = Cluster.query.first()
+        event = Event(name='Legacy', created_by=User.query.first().id)
+        db.session.add(event)
+        db.session.flush()
+        db.session.add(Participant(event_id=event.id, cluster_id=cluster.id, name='Old', position=1, points=3))
+        db.session.commit()
+
+    response = app.test_client().get('/events')
+    assert b'Legacy' not in response.data
+    assert stored_result(app, 'Legacy')[1] is None
+
+    with app.app_context():
+        assert EventResult.fill_missing() == 1
+    assert stored_result(app, 'Legacy')[1]['results'][0]['name'] == 'Old'
@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+import pytest
+from datetime import datetime, timedelta
+from models import User, Cluster, ClusterTotal, Event, Participant, ActivityLog, db
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.logs import logs_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(logs_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka']:
+            db.session.add(Cluster(name=name))
+
+        admin = User(username='admin', role='admin')
+        admin.set_password('admin123')
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add_all([admin, manager])
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+def login(app, username, password):
+    client = app.test_client()
+    client.post('/login', data={'username': username, 'password': password})
+    return client
+
+def add_event(name, participants, created_at):
+    """Insert an event with (cluster name, participant, position, points) rows"""
+    manager = User.query.filter_by(username='manager').first()
+    event = Event(name=name, created_by=manager.id, created_at=created_at, updated_at=created_at)
+    db.session.add(event)
+    db.session.flush()
+    for cluster_name, participant, position, points in participants:
+        cluster = Cluster.query.filter_by(name=cluster_name).first()
+        db.session.add(Participant(event_id=event.id, cluster_id=cluster.id,
+                                   name=participant, position=position, points=points))
+    db.session.commit()
+
+@pytest.fixture
+def events(app):
+    with app.app_context():
+        add_event('Relay', [('Suryantra', 'A', 1, 10), ('Chandraloka', 'B', 2, 7)], datetime(2024, 1, 1))
+        add_event('Chess', [('Chandraloka', 'C', 1, 5)], datetime(2024, 2, 1))
+
+def test_results_csv_export(app, events):
+    """Test CSV export has one row per participant in import-compatible columns"""
+    client = login(app, 'manager', 'manager123')
+    response = client.get('/manage/events/export')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert 'attachment; filename=results_' in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [(r['event_name'], r['cluster'], r['participant_name'], r['points']) for r in rows] == [
+        ('Relay', 'Suryantra', 'A', '10'),
+        ('Relay', 'Chandraloka', 'B', '7'),
+        ('Chess', 'Chandraloka', 'C', '5')
+    ]
+
+def test_results_export_round_trips_through_import(app, events):
+    """Test an export can be fed back to the importer"""
+    from utils.importer import iter_rows, import_results
+
+    client = login(app, 'manager', 'manager123')
+    body = client.get('/manage/events/export?format=ndjson').data
+
+    with app.app_context():
+        report = import_results(iter_rows(io.BytesIO(body), 'ndjson'), user_id=1, dry_run=True)
+    assert report.errors == []
+    assert report.events_created == 2
+    assert report.participants_created == 3
+
+def test_results_json_since(app, events):
+    """Test ?since= keeps only events created or edited from that time"""
+    client = login(app, 'manager', 'manager123')
+    response = client.get('/manage/events/export?format=json&since=2024-01-15T00:00:00')
+
+    rows = json.loads(response.data)
+    assert [row['participant_name'] for row in rows] == ['C']
+    assert rows[0]['event_updated_at'] == '2024-02-01T00:00:00'
+
+def test_export_rejects_bad_parameters(app):
+    """Test unknown formats and malformed timestamps are a 400"""
+    client = login(app, 'manager', 'manager123')
+    assert client.get('/manage/events/export?format=xml').status_code == 400
+    assert client.get('/manage/events/export?since=yesterday').status_code == 400
+
+def test_logs_export_is_admin_only(app):
+    """Test managers cannot export activity logs"""
+    client = login(app, 'manager', 'manager123')
+    assert client.get('/manage/admin/logs/export').status_code == 403
+
+def test_logs_ndjson_export(app):
+    """Test activity logs stream oldest first with the acting username"""
+    with app.app_context():
+        admin = User.query.filter_by(username='admin').first()
+        start = datetime(2024, 3, 1)
+        for minute in range(3):
+            db.session.add(ActivityLog(user_id=admin.id, action=f'action_{minute}',
+                                       timestamp=start + timedelta(minutes=minute)))
+        db.session.commit()
+
+    client = login(app, 'admin', 'admin123')
+    response = client.get('/manage/admin/logs/export?format=ndjson&since=2024-03-01T00:01:00')
+
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    # Logging in also wrote a log entry, timestamped now
+    assert [line['action'] for line in lines][:2] == ['action_1', 'action_2']
+    assert lines[0]['username'] == 'admin'
+
+def test_serialize_rows_batches_csv():
+    """Test CSV output is emitted in several chunks rather than one string"""
+    from utils.export import EXPORT_BATCH_SIZE, serialize_rows
+
+    rows = ((i, 'x') for i in range(EXPORT_BATCH_SIZE * 2 + 1))
+    chunks = list(serialize_rows(('id', 'name'), rows, 'csv'))
+    assert len(chunks) == 3
+    assert ''.join(chunks).count('\n') == EXPORT_BATCH_SIZE * 2 + 2
@@ -0,0 +1,76 @@
+import pytest
+from flask import Flask
+from config import Config
+from models import db, ensure_indexes
+
+# Schema of databases created before the indexes existed
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(80) NOT NULL UNIQUE, "
+    "password_hash VARCHAR(255) NOT NULL, role VARCHAR(20) NOT NULL, created_at DATETIME)",
+    "CREATE TABLE clusters (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL UNIQUE, "
+    "logo_filename VARCHAR(100), created_at DATETIME)",
+    "CREATE TABLE events (id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, "
+    "created_by INTEGER NOT NULL REFERENCES users(id), created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE participants (id INTEGER PRIMARY KEY, event_id INTEGER NOT NULL REFERENCES events(id), "
+    "cluster_id INTEGER NOT NULL REFERENCES clusters(id), name VARCHAR(100) NOT NULL, "
+    "position INTEGER NOT NULL, points INTEGER NOT NULL, created_at DATETIME)",
+    "CREATE TABLE activity_logs (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id), "
+    "action VARCHAR(50) NOT NULL, details TEXT, timestamp DATETIME)",
+]
+
+EXPECTED_INDEXES = {
+    'ix_events_created_at_id',
+    'ix_events_created_by',
+    'ix_participants_event_id',
+    'ix_participants_cluster_id_points',
+    'ix_activity_logs_timestamp_id',
+    'ix_activity_logs_user_id',
+}
+
+@pytest.fixture
+def app(tmp_path):
+    """Create test application on a database with the legacy schema"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "legacy.db"}'
+    db.init_app(app)
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            for statement in LEGACY_SCHEMA:
+                connection.exec_driver_sql(statement)
+        yield app
+        db.engine.dispose()
+
+def query_plan(sql):
+    rows = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)).all()
+    return ' '.join(row[-1] for row in rows)
+
+def test_migration_adds_indexes_idempotently(app):
+    """Test existing databases gain every index exactly once"""
+    with app.app_context():
+        assert set(ensure_indexes()) == EXPECTED_INDEXES
+        assert ensure_indexes() == []
+
+        # Tables that do not exist yet are left to create_all
+        db.create_all()
+        assert ensure_indexes() == []
+
+@pytest.mark.parametrize('sql, index', [
+    ('SELECT SUM(points) FROM participants WHERE cluster_id = 1',
+     'COVERING INDEX ix_participants_cluster_id_points'),
+    ('SELECT * FROM participants WHERE event_id = 1', 'ix_participants_event_id'),
+    ('SELECT id FROM events WHERE created_by = 1', 'ix_events_created_by'),
+    ('SELECT * FROM events ORDER BY created_at DESC, id DESC LIMIT 20', 'ix_events_created_at_id'),
+    ('SELECT id FROM activity_logs WHERE user_id = 1', 'ix_activity_logs_user_id'),
+    ('SELECT * FROM activity_logs ORDER BY timestamp DESC, id DESC LIMIT 50',
+     'ix_activity_logs_timestamp_id'),
+])
+def test_hot_queries_use_indexes(app, sql, index):
+    """Test EXPLAIN QUERY PLAN shows an index for each hot lookup"""
+    with app.app_context():
+        ensure_indexes()
+        plan = query_plan(sql)
+    assert index in plan
+    assert 'SCAN participants' not in plan
+    assert 'TEMP B-TREE' not in plan
@@ -0,0 +1,171 @@
+import pytest
+from datetime import datetime, timedelta
+from models import User, Cluster, ClusterTotal, Event, LeaderboardSnapshot, db
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+    from routes.api import api_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+    app.register_blueprint(api_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka', 'Swarnika']:
+            db.session.add(Cluster(name=name))
+
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add(manager)
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create logged-in test client"""
+    client = app.test_client()
+    client.post('/login', data={'username': 'manager', 'password': 'manager123'})
+    return client
+
+def cluster_ids(app):
+    with app.app_context():
+        return {c.name: c.id for c in Cluster.query.all()}
+
+def post_event(client, url, name, entries):
+    """Post an event form with (cluster_id, points) entries"""
+    client.post(url, data={
+        'event_name': name,
+        'cluster_id[]': [cluster_id for cluster_id, _ in entries],
+        'participant_name[]': [f'P{i}' for i in range(len(entries))],
+        'position[]': list(range(1, len(entries) + 1)),
+        'points[]': [points for _, points in entries]
+    })
+
+def snapshots(app):
+    with app.app_context():
+        rows = LeaderboardSnapshot.query.order_by(LeaderboardSnapshot.id).all()
+        return [(row.action, LeaderboardSnapshot.decode(row.data)) for row in rows]
+
+def test_event_writes_append_snapshots(client, app):
+    """Test create, edit and delete each append the standings they produce"""
+    ids = cluster_ids(app)
+    post_event(client, '/manage/events/create', 'Relay', [(ids['Swarnika'], 10), (ids['Chandraloka'], 5)])
+    with app.app_context():
+        event_id = Event.query.filter_by(name='Relay').first().id
+
+    # A rename leaves the totals alone and adds nothing
+    with app.app_context():
+        participant_ids = [p.id for p in Event.query.get(event_id).participants]
+    client.post(f'/manage/events/{event_id}/edit', data={
+        'event_name': 'Relay Final',
+        'participant_id[]': participant_ids,
+        'cluster_id[]': [ids['Swarnika'], ids['Chandraloka']],
+        'participant_name[]': ['P0', 'P1'],
+        'position[]': [1, 2],
+        'points[]': [10, 5]
+    })
+    client.post(f'/manage/events/{event_id}/delete')
+
+    history = snapshots(app)
+    assert [action for action, _ in history] == ['rebuild', 'create_event', 'delete_event']
+    assert history[1][1] == [(ids['Swarnika'], 10, 1), (ids['Chandraloka'], 5, 2), (ids['Suryantra'], 0, 3)]
+    assert history[2][1] == history[0][1]
+
+def test_movement_since_last_result(client, app):
+    """Test places gained and lost between the last two snapshots"""
+    ids = cluster_ids(app)
+    post_event(client, '/manage/events/create', 'Heat 1', [(ids['Chandraloka'], 5)])
+    post_event(client, '/manage/events/create', 'Heat 2', [(ids['Swarnika'], 8)])
+
+    with app.app_context():
+        assert LeaderboardSnapshot.movement() == {
+            ids['Swarnika']: 2, ids['Chandraloka']: -1, ids['Suryantra']: -1
+        }
+
+    page = app.test_client().get('/leaderboard').get_data(as_text=True)
+    assert '▲2' in page and '▼1' in page
+
+def test_history_window(app):
+    """Test history reads only the snapshots in the window, oldest first"""
+    ids = cluster_ids(app)
+    start = datetime(2024, 3, 1)
+    with app.app_context():
+        LeaderboardSnapshot.query.delete()
+        for hour, (points, rank) in enumerate([(1, 3), (5, 1), (9, 1), (12, 1)]):
+            standings = [(ids['Swarnika'], points, rank)]
+            if hour >= 2:
+                standings.append((ids['Suryantra'], 4, 2))
+            db.session.add(LeaderboardSnapshot(action='create_event', created_at=start + timedelta(hours=hour),
+                                               data=LeaderboardSnapshot.encode(standings)))
+        db.session.commit()
+
+        history = LeaderboardSnapshot.history(since=start + timedelta(hours=1), limit=2)
+        assert history['times'] == [start + timedelta(hours=2), start + timedelta(hours=3)]
+        assert history['clusters'][ids['Swarnika']] == {'points': [9, 12], 'ranks': [1, 1]}
+
+        history = LeaderboardSnapshot.history(until=start + timedelta(hours=2))
+        assert history['clusters'][ids['Suryantra']] == {'points': [None, None, 4], 'ranks': [None, None, 2]}
+
+def test_history_api_and_chart(client, app):
+    """Test the history endpoint's compact series and the chart page"""
+    ids = cluster_ids(app)
+    post_event(client, '/manage/events/create', 'Heat 1', [(ids['Chandraloka'], 5)])
+
+    public = app.test_client()
+    data = public.get('/api/v1/leaderboard/history').get_json()
+    assert data['columns'] == ['id', 'name', 'points', 'ranks']
+    assert len(data['times']) == 2
+    series = {row[1]: row[2:] for row in data['series']}
+    assert series['Chandraloka'] == [[0, 5], [2, 1]]
+
+    assert len(public.get('/api/v1/leaderboard/history?limit=1').get_json()['times']) == 1
+    assert public.get('/api/v1/leaderboard/history?since=yesterday').status_code == 400
+
+    page = public.get('/leaderboard/history')
+    assert page.status_code == 200
+    assert b'<polyline' in page.data
+
+def test_live_state_carries_movement(client, app):
+    """Test live viewers receive movement changes"""
+    from utils.live import build_live_state, diff_live_state
+
+    ids = cluster_ids(app)
+    with app.app_context():
+        before = build_live_state()
+    post_event(client, '/manage/events/create', 'Heat 1', [(ids['Swarnika'], 5)])
+    with app.app_context():
+        after = build_live_state()
+
+    delta = diff_live_state(before, after)
+    assert delta['movement'][str(ids['Swarnika'])] == 2
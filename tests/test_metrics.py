@@ -0,0 +1,182 @@
+import json
+import os
+import pytest
+from models import User, Cluster, ClusterTotal, db
+from utils.metrics import (archive_worker_metrics, get_metrics, merge_snapshots, quantile,
+                           ARCHIVE_NAME, BUCKETS)
+
+def make_app(metrics_dir, enabled=True):
+    """Create test application with request metrics"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    from utils.metrics import init_metrics
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['METRICS_ENABLED'] = enabled
+    app.config['METRICS_DIR'] = str(metrics_dir)
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.admin import admin_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+    from routes.logs import logs_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+    app.register_blueprint(logs_bp)
+    init_metrics(app)
+    return app
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path / 'metrics')
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka']:
+            db.session.add(Cluster(name=name))
+
+        admin = User(username='admin', role='admin')
+        admin.set_password('admin123')
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add_all([admin, manager])
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+def test_server_timing_header(app):
+    """Test responses carry SQL, template and total timings"""
+    response = app.test_client().get('/leaderboard')
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('sql;dur=')
+    assert 'queries"' in timing
+    assert 'template;dur=' in timing
+    assert 'total;dur=' in timing
+
+def test_requests_recorded_by_endpoint(app):
+    """Test each request adds to its endpoint's histograms"""
+    client = app.test_client()
+    for _ in range(3):
+        client.get('/leaderboard')
+    client.get('/no-such-page')
+
+    with app.app_context():
+        snapshot = get_metrics().snapshot()
+    stats = snapshot['overview.public_overview']
+    assert stats['responses'] == {'2xx': 3}
+    assert sum(stats['duration'][:-1]) == 3
+    assert stats['queries'] >= 3
+    assert stats['phases']['template'][-1] > 0
+    assert snapshot['(unmatched)']['responses'] == {'4xx': 1}
+
+def test_password_hashing_timed(app):
+    """Test PBKDF2 time is reported separately"""
+    response = app.test_client().post('/login', data={'username': 'manager', 'password': 'manager123'})
+    assert 'hash;dur=' in response.headers['Server-Timing']
+    with app.app_context():
+        assert get_metrics().snapshot()['auth.login']['phases']['hash'][-1] > 0
+
+def test_metrics_page_admin_only(app, admin_client):
+    """Test the metrics page lists endpoints for admins only"""
+    admin_client.get('/leaderboard')
+    page = admin_client.get('/manage/admin/metrics')
+    assert page.status_code == 200
+    assert b'overview.public_overview' in page.data
+
+    manager = app.test_client()
+    manager.post('/login', data={'username': 'manager', 'password': 'manager123'})
+    assert manager.get('/manage/admin/metrics').status_code == 403
+    assert app.test_client().get('/manage/admin/metrics/prometheus').status_code == 302
+
+def test_prometheus_scrape_with_token(app):
+    """Test scrapers read the text format with the configured bearer token"""
+    client = app.test_client()
+    client.get('/leaderboard')
+
+    response = client.get('/manage/admin/metrics/prometheus', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert '# TYPE event_scoring_request_duration_seconds histogram' in text
+    assert 'event_scoring_requests_total{endpoint="overview.public_overview",status="2xx"} 1' in text
+    assert 'event_scoring_request_duration_seconds_bucket{endpoint="overview.public_overview",le="+Inf"} 1' in text
+    assert 'event_scoring_request_phase_seconds_count{endpoint="overview.public_overview",phase="sql"} 1' in text
+
+    wrong = client.get('/manage/admin/metrics/prometheus', headers={'Authorization': 'Bearer nope'})
+    assert wrong.status_code == 302
+
+def test_workers_combined_through_snapshots(app, tmp_path):
+    """Test live and exited workers' counts are added to this process's"""
+    directory = tmp_path / 'metrics'
+    client = app.test_client()
+    client.get('/leaderboard')
+    with app.app_context():
+        metrics = get_metrics()
+        own = metrics.snapshot()
+        metrics.flush()
+
+    assert (directory / f'metrics-{os.getpid()}.json').exists()
+    # A live sibling worker (the parent process stands in for one) and a dead one
+    (directory / f'metrics-{os.getppid()}.json').write_text(json.dumps(own))
+    (directory / 'metrics-999999999.json').write_text(json.dumps(own))
+
+    with app.app_context():
+        combined = get_metrics().collect()
+    assert combined['overview.public_overview']['responses'] == {'2xx': 2}
+
+    archive_worker_metrics(str(directory), os.getppid())
+    assert not (directory / f'metrics-{os.getppid()}.json').exists()
+    assert (directory / ARCHIVE_NAME).exists()
+    with app.app_context():
+        combined = get_metrics().collect()
+    assert combined['overview.public_overview']['responses'] == {'2xx': 2}
+
+def test_disabled_metrics_add_no_hooks(tmp_path):
+    """Test a disabled app records nothing and sends no Server-Timing"""
+    app = make_app(tmp_path / 'metrics', enabled=False)
+    with app.app_context():
+        db.create_all()
+        response = app.test_client().get('/leaderboard')
+        assert 'Server-Timing' not in response.headers
+        assert 'metrics' not in app.extensions
+        db.drop_all()
+
+def test_histogram_helpers():
+    histogram = [0] * (len(BUCKETS) + 1) + [0.0]
+    histogram[BUCKETS.index(0.01)] = 9
+    histogram[BUCKETS.index(0.5)] = 1
+    assert quantile(histogram, 0.5) == 0.01
+    assert quantile(histogram, 0.95) == 0.5
+
+    one = {'a': {'responses': {'2xx': 1}, 'queries': 2, 'duration': histogram, 'phases': {}}}
+    merged = merge_snapshots(merge_snapshots({}, one), one)
+    assert merged['a']['responses'] == {'2xx': 2}
+    assert merged['a']['queries'] == 4
+    assert sum(merged['a']['duration'][:-1]) == 20
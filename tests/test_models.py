@@ -1,13 +1,15 @@
 import pytest
+from config import Config
 from models import User, Cluster, Event, Participant, ActivityLog, db
 from app import create_app
 
 @pytest.fixture
-def app():
-    """Create test application"""
-    app = create_app()
+def app(tmp_path, monkeypatch):
+    """Create test application with its database and caches in a temporary folder"""
+    # The engine is built in create_app, so the URI must be set before it
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'models.db'}")
+    app = create_app(instance_path=str(tmp_path))
     app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['WTF_CSRF_ENABLED'] = False
     
     with app.app_context():
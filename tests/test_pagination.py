@@ -0,0 +1,102 @@
+import re
+import pytest
+from datetime import datetime
+from models import User, Cluster, Event, EventResult, Participant, db
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['EVENTS_PAGE_SIZE'] = 5
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        cluster = Cluster(name='Suryantra')
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add_all([cluster, manager])
+        db.session.commit()
+
+        # Several events share a timestamp so the id tie-breaker matters
+        stamps = [datetime(2025, 1, 1, 10, 0, i // 3) for i in range(12)]
+        for i, stamp in enumerate(stamps):
+            event = Event(name=f'Event {i:02d}', created_by=manager.id, created_at=stamp)
+            db.session.add(event)
+            db.session.flush()
+            db.session.add(Participant(event_id=event.id, cluster_id=cluster.id,
+                                       name='Entrant', position=1, points=i))
+        db.session.commit()
+        # As `flask init-db` does for events written without stored results
+        EventResult.fill_missing()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+def walk_pages(client, url):
+    """Follow 'Load more' links and return the event names in page order"""
+    names = []
+    pages = 0
+    while url:
+        data = client.get(url).get_data(as_text=True)
+        names += re.findall(r'<h3>(Event \d+)</h3>', data)
+        match = re.search(r'href="([^"]+)"\s+class="btn btn-secondary load-more"', data)
+        url = match.group(1).replace('&amp;', '&') if match else None
+        pages += 1
+    return names, pages
+
+@pytest.mark.parametrize('url, logged_in', [
+    ('/events', False),
+    ('/manage/events/', True),
+])
+def test_keyset_pages_cover_every_event_once(app, url, logged_in):
+    """Test cursor pages are newest-first, complete and non-overlapping"""
+    client = app.test_client()
+    if logged_in:
+        client.post('/login', data={'username': 'manager', 'password': 'manager123'})
+
+    names, pages = walk_pages(client, url)
+    assert pages == 3
+    assert names == [f'Event {i:02d}' for i in range(11, -1, -1)]
+
+def test_malformed_cursor_is_rejected(app):
+    """Test a bad cursor returns 400"""
+    assert app.test_client().get('/events?after=yesterday').status_code == 400
+
+def test_event_pages_use_index(app):
+    """Test the page query is an index range scan"""
+    with app.app_context():
+        plan = db.session.execute(db.text(
+            "EXPLAIN QUERY PLAN SELECT id FROM events "
+            "WHERE (created_at, id) < ('2025-01-01 10:00:02', 7) "
+            "ORDER BY created_at DESC, id DESC LIMIT 6"
+        )).all()
+    detail = ' '.join(row[-1] for row in plan)
+    assert 'ix_events_created_at_id' in detail
+    assert 'TEMP B-TREE' not in detail
@@ -0,0 +1,231 @@
+import threading
+import pytest
+from models import User, db
+from utils.passwords import (HasherBusy, LoginRateLimiter, PasswordHasher, VerifiedLoginCache,
+                             get_password_service, needs_rehash)
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+    # Cheap hashes keep the tests fast
+    app.config['PASSWORD_HASH_ITERATIONS'] = 1000
+    app.config['LOGIN_MAX_ATTEMPTS'] = 3
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.admin import admin_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        admin = User(username='admin', role='admin')
+        admin.set_password('admin123')
+        db.session.add_all([manager, admin])
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+def login(client, password, username='manager'):
+    return client.post('/login', data={'username': username, 'password': password})
+
+def test_set_password_follows_policy(app):
+    """Test new hashes use the configured iteration count"""
+    with app.app_context():
+        user = User.query.filter_by(username='manager').first()
+        assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+        assert not needs_rehash(user.password_hash, 'pbkdf2:sha256:1000')
+        assert needs_rehash(user.password_hash, 'pbkdf2:sha256:2000')
+
+def test_login_rehashes_outdated_hash(app):
+    """Test a successful login upgrades a hash made under an older policy"""
+    app.config['PASSWORD_HASH_ITERATIONS'] = 2000
+    client = app.test_client()
+
+    response = login(client, 'manager123')
+    assert response.status_code == 302
+
+    with app.app_context():
+        db.session.expire_all()
+        user = User.query.filter_by(username='manager').first()
+        assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+        assert user.check_password('manager123')
+
+def test_failed_logins_are_rate_limited(app):
+    """Test a username is locked out after too many failures, even with the right password"""
+    client = app.test_client()
+    for _ in range(3):
+        assert login(client, 'wrong').status_code == 200
+
+    response = login(client, 'manager123')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    assert b'Too many failed login attempts' in response.data
+
+    # Other usernames are unaffected
+    assert login(client, 'wrong', username='someone').status_code == 200
+
+def test_successful_login_resets_failures(app):
+    """Test failures are forgotten after a successful login"""
+    client = app.test_client()
+    login(client, 'wrong')
+    login(client, 'wrong')
+    assert login(client, 'manager123').status_code == 302
+    with app.app_context():
+        assert get_password_service().limiter.retry_after('manager') == 0
+
+def pooled_login(app, password, username='manager'):
+    """Log in as a gevent or gthread worker would serve the request"""
+    return app.test_client().post('/login', data={'username': username, 'password': password},
+                                  environ_overrides={'wsgi.multithread': True})
+
+def test_admin_sets_passwords_through_service(app):
+    """Test creating and editing managers hashes with the password service"""
+    with app.app_context():
+        service = get_password_service()
+    calls = []
+    original = service.hash
+    service.hash = lambda password: calls.append(password) or original(password)
+    client = app.test_client()
+    login(client, 'admin123', username='admin')
+
+    client.post('/manage/admin/managers/create', data={'username': 'coach', 'password': 'coach123'})
+    with app.app_context():
+        coach_id = User.query.filter_by(username='coach').first().id
+    client.post(f'/manage/admin/managers/{coach_id}/edit', data={'username': 'coach', 'password': 'coach456'})
+
+    assert calls == ['coach123', 'coach456']
+    with app.app_context():
+        coach = db.session.get(User, coach_id)
+        assert coach.password_hash.startswith('pbkdf2:sha256:1000$')
+        assert coach.check_password('coach456')
+
+def test_verified_login_cache_skips_hashing(app):
+    """Test a repeat login with the same password does not hash again"""
+    pooled_login(app, 'manager123')
+
+    with app.app_context():
+        hasher = get_password_service().hasher
+    calls = []
+    original = hasher.verify
+    hasher.verify = lambda *args, **kwargs: calls.append(args) or original(*args, **kwargs)
+
+    assert pooled_login(app, 'manager123').status_code == 302
+    assert calls == []
+    assert pooled_login(app, 'other').status_code == 200
+    assert len(calls) == 1
+
+def test_busy_pool_returns_503(app):
+    """Test a saturated hashing pool turns logins away instead of queueing"""
+    with app.app_context():
+        service = get_password_service()
+    service.hasher._submit = lambda *args: (_ for _ in ()).throw(HasherBusy())
+
+    response = pooled_login(app, 'manager123')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+def test_sync_workers_hash_inline(app):
+    """Test a sync worker hashes on the request thread instead of waiting on the pool"""
+    with app.app_context():
+        service = get_password_service()
+    service.hasher._submit = lambda *args: (_ for _ in ()).throw(HasherBusy())
+
+    assert login(app.test_client(), 'manager123').status_code == 302
+
+def test_hasher_bounds_pending_work():
+    """Test the pool rejects work beyond workers plus pending slots"""
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    release = threading.Event()
+    try:
+        first = hasher._submit(release.wait)
+        second = hasher._submit(release.wait)
+        with pytest.raises(HasherBusy):
+            hasher._submit(release.wait)
+        release.set()
+        first.result(5)
+        second.result(5)
+        # Slots are released as work finishes
+        assert hasher._submit(lambda: True).result(5)
+    finally:
+        release.set()
+        hasher.shutdown()
+
+def test_hasher_uses_native_threads_under_gevent(monkeypatch):
+    """Test the pool keeps OS threads when gevent has patched threading"""
+    threadpool = pytest.importorskip('gevent.threadpool')
+    monkeypatch.setattr('utils.cooperative.is_cooperative', lambda: True)
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    try:
+        assert isinstance(hasher._executor, threadpool.ThreadPoolExecutor)
+        pwhash = hasher.hash('secret', 'pbkdf2:sha256:1000', timeout=5)
+        assert hasher.verify(pwhash, 'secret', timeout=5)
+    finally:
+        hasher.shutdown()
+
+def test_limiter_window_expires(monkeypatch):
+    """Test failures older than the window no longer count"""
+    now = [1000.0]
+    monkeypatch.setattr('utils.passwords.time.monotonic', lambda: now[0])
+    limiter = LoginRateLimiter(max_attempts=2, window=60)
+
+    limiter.record_failure('Manager')
+    limiter.record_failure('manager')
+    assert limiter.retry_after('MANAGER') == 61
+
+    now[0] += 61
+    assert limiter.retry_after('manager') == 0
+
+def test_limiter_memory_is_bounded(monkeypatch):
+    """Test failures for many distinct usernames neither outlive the window nor exceed max_entries"""
+    now = [1000.0]
+    monkeypatch.setattr('utils.passwords.time.monotonic', lambda: now[0])
+    limiter = LoginRateLimiter(max_attempts=2, window=60, max_entries=100)
+
+    for i in range(1000):
+        limiter.record_failure(f'nobody-{i}')
+    assert len(limiter._failures) == 100
+    assert 'nobody-999' in limiter._failures
+    assert 'nobody-0' not in limiter._failures
+
+    # Still-recent usernames keep counting after the sweep
+    limiter.record_failure('nobody-999')
+    assert limiter.retry_after('nobody-999') == 61
+
+    now[0] += 61
+    limiter.record_failure('someone')
+    assert list(limiter._failures) == ['someone']
+
+def test_cache_is_keyed_by_hash():
+    """Test a changed password hash invalidates cached verifications"""
+    cache = VerifiedLoginCache('secret', ttl=60)
+    cache.add('hash-1', 'pw')
+    assert cache.contains('hash-1', 'pw')
+    assert not cache.contains('hash-1', 'other')
+    assert not cache.contains('hash-2', 'pw')
+    assert not VerifiedLoginCache('secret', ttl=0).contains('hash-1', 'pw')
@@ -0,0 +1,196 @@
+import json
+import pytest
+from models import User, Cluster, ClusterTotal, CacheGeneration, db
+from utils.live import diff_live_state
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka']:
+            db.session.add(Cluster(name=name))
+
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add(manager)
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create anonymous test client"""
+    return app.test_client()
+
+def login(client):
+    client.post('/login', data={'username': 'manager', 'password': 'manager123'})
+
+def create_event(client, app, name, points):
+    with app.app_context():
+        cluster_id = Cluster.query.filter_by(name='Chandraloka').first().id
+    return client.post('/manage/events/create', data={
+        'event_name': name,
+        'cluster_id[]': [cluster_id],
+        'participant_name[]': ['Runner'],
+        'position[]': [1],
+        'points[]': [points]
+    })
+
+def test_public_pages_served_from_cache(client, app):
+    """Test repeated public hits reuse the rendered page"""
+    first = client.get('/leaderboard').data
+    with app.app_context():
+        cache = app.extensions['page_cache']
+        generation, body = cache['leaderboard']
+        cache['leaderboard'] = (generation, body.replace('Cluster Leaderboard', 'From Cache'))
+
+    assert b'From Cache' in client.get('/leaderboard').data
+    assert b'Cluster Leaderboard' in first
+
+def test_event_write_bumps_generation(client, app):
+    """Test event writes invalidate cached leaderboard and winner list"""
+    assert b'Sprint' not in client.get('/events').data
+    client.get('/leaderboard')
+
+    manager = app.test_client()
+    login(manager)
+    create_event(manager, app, 'Sprint', 42)
+
+    with app.app_context():
+        assert CacheGeneration.current() == 2
+
+    assert b'Sprint' in client.get('/events').data
+    data = client.get('/leaderboard').data.decode()
+    assert data.find('Chandraloka') < data.find('Suryantra')
+    assert '42' in data
+
+def test_logged_in_requests_bypass_cache(client, app):
+    """Test management sessions never see the anonymous rendering"""
+    client.get('/leaderboard')
+    login(client)
+    client.get('/manage')  # consume the welcome flash
+    data = client.get('/leaderboard').data
+    assert b'Logout' in data
+
+def read_stream(client, query=''):
+    """Collect the 'update' messages of one short-lived stream"""
+    # As served by a worker that handles other requests meanwhile
+    response = client.get('/leaderboard/stream' + query, environ_overrides={'wsgi.multithread': True})
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    updates = []
+    for message in body.split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in message.splitlines() if ': ' in line)
+        if lines.get('event') == 'update':
+            updates.append((int(lines['id']), json.loads(lines['data'])))
+    return updates
+
+def test_stream_sends_full_snapshot_to_stale_clients(client, app):
+    """Test a client behind the current generation gets a full snapshot"""
+    app.config.update(LIVE_STREAM_POLL_SECONDS=0.01, LIVE_STREAM_MAX_SECONDS=0.05)
+    manager = app.test_client()
+    login(manager)
+    create_event(manager, app, 'Sprint', 42)
+
+    updates = read_stream(client, '?generation=0&events=1')
+    assert len(updates) == 1
+    generation, delta = updates[0]
+    assert generation == 2
+    assert delta['full'] is True
+    assert list(delta['events'].values())[0][3] == [[1, 'Runner', 'Chandraloka', 42]]
+    assert 42 in delta['totals'].values()
+
+    # Leaderboard viewers do not ask for events and get none
+    (_, delta), = read_stream(client, '?generation=0')
+    assert 42 in delta['totals'].values()
+    assert 'events' not in delta and 'removed' not in delta
+
+def test_stream_is_quiet_for_current_clients(client, app):
+    """Test nothing is pushed while the client's generation is current"""
+    app.config.update(LIVE_STREAM_POLL_SECONDS=0.01, LIVE_STREAM_MAX_SECONDS=0.05)
+    assert read_stream(client, '?generation=1') == []
+
+def test_sync_workers_refuse_streams(client):
+    """Test a server without concurrency answers 204 so pages fall back to reloading"""
+    response = client.get('/leaderboard/stream')
+    assert response.status_code == 204
+    assert response.get_data() == b''
+
+def test_diff_live_state_only_reports_changes():
+    """Test deltas contain changed totals and events only"""
+    old = {'totals': {'1': 10, '2': 5}, 'events': {'7': ['A'], '8': ['B']}}
+    new = {'totals': {'1': 10, '2': 9}, 'events': {'7': ['A'], '9': ['C']}}
+
+    assert diff_live_state(old, old) is None
+    assert diff_live_state(old, new) == {
+        'totals': {'2': 9},
+        'events': {'9': ['C']},
+        'removed': ['8']
+    }
+    assert diff_live_state(old, new, with_events=False) == {'totals': {'2': 9}}
+    assert diff_live_state(old, dict(old, events={}), with_events=False) is None
+
+def test_conditional_get_returns_304_until_data_changes(client, app):
+    """Test ETag revalidation of public pages"""
+    first = client.get('/events')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert first.headers['Last-Modified']
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    with app.app_context():
+        app.extensions['page_cache'].clear()
+    again = client.get('/events', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    with app.app_context():
+        assert 'events' not in app.extensions['page_cache']
+
+    manager = app.test_client()
+    login(manager)
+    create_event(manager, app, 'Sprint', 42)
+
+    changed = client.get('/events', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+def test_logged_in_pages_have_no_etag(client, app):
+    """Test personalised renderings are never revalidated against shared ETags"""
+    login(client)
+    client.get('/manage')
+    response = client.get('/leaderboard')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import event as sa_event
+from models import User, Cluster, Event, Participant, db
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka', 'Swarnika']:
+            db.session.add(Cluster(name=name))
+
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add(manager)
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+def add_events(count):
+    """Insert events with one participant per cluster"""
+    manager = User.query.filter_by(username='manager').first()
+    clusters = Cluster.query.all()
+    for i in range(count):
+        event = Event(name=f'Event {i}', created_by=manager.id)
+        db.session.add(event)
+        db.session.flush()
+        for position, cluster in enumerate(clusters, start=1):
+            db.session.add(Participant(event_id=event.id, cluster_id=cluster.id,
+                                       name=f'Entrant {position}', position=position, points=10 - position))
+    db.session.commit()
+
+def count_queries(app, client, url):
+    """Return the number of SQL statements executed while serving url"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    sa_event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        sa_event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return len(statements)
+
+@pytest.mark.parametrize('url, logged_in', [
+    ('/events', False),
+    ('/manage/events/', True),
+])
+def test_event_lists_use_constant_queries(app, url, logged_in):
+    """Test query count does not grow with the number of events"""
+    client = app.test_client()
+    if logged_in:
+        client.post('/login', data={'username': 'manager', 'password': 'manager123'})
+
+    with app.app_context():
+        add_events(2)
+    few = count_queries(app, client, url)
+
+    with app.app_context():
+        add_events(20)
+    app.extensions.pop('page_cache', None)
+    many = count_queries(app, client, url)
+
+    assert many == few
@@ -0,0 +1,232 @@
+import json
+import os
+import time
+import pytest
+from datetime import datetime
+from models import User, Cluster, ClusterTotal, CacheGeneration, ChangeJournal, Event, Participant, ActivityLog, db
+import backup_db
+
+@pytest.fixture
+def app(tmp_path):
+    """Create test application on a file database, as recovery works on files"""
+    from flask import Flask
+    from config import Config
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'event_scoring.db'}"
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+
+        db.session.add(Cluster(name='Suryantra'))
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add(manager)
+        db.session.commit()
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'event_scoring.db'), str(tmp_path / 'backups')
+
+def add_event(name, points):
+    cluster = Cluster.query.first()
+    event = Event(name=name, created_by=User.query.first().id)
+    db.session.add(event)
+    db.session.flush()
+    db.session.add(Participant(event_id=event.id, cluster_id=cluster.id, name=f'{name} winner', position=1, points=points))
+    ClusterTotal.apply_deltas({cluster.id: points})
+    CacheGeneration.bump()
+    db.session.commit()
+    return event.id
+
+def pause():
+    """Let the clock move past the journal's millisecond resolution"""
+    time.sleep(0.01)
+
+def test_writes_are_journaled(app):
+    """Test inserts, updates and deletes on events and participants reach the journal"""
+    event_id = add_event('Relay', 10)
+    participant = Participant.query.filter_by(event_id=event_id).first()
+    participant.points = 12
+    db.session.commit()
+    db.session.delete(db.session.get(Event, event_id))
+    db.session.commit()
+
+    entries = [(j.table_name, j.operation) for j in ChangeJournal.query.order_by(ChangeJournal.id)
+               if j.table_name in ('events', 'participants')]
+    assert entries == [
+        ('events', 'insert'), ('participants', 'insert'), ('participants', 'update'),
+        ('participants', 'delete'), ('events', 'delete')
+    ]
+    assert ChangeJournal.query.first().timestamp <= datetime.utcnow()
+
+def test_recover_to_point_in_time(app, paths):
+    """Test recovery replays changes up to the target and drops later ones"""
+    db_path, backup_dir = paths
+    add_event('Before backup', 5)
+    db.session.remove()
+    assert backup_db.backup_database(db_path, backup_dir)
+
+    add_event('After backup', 7)
+    pause()
+    target = datetime.utcnow()
+    pause()
+    # The botched edit
+    Participant.query.filter_by(name='After backup winner').first().points = 700
+    db.session.commit()
+    add_event('Too late', 1)
+    generation = CacheGeneration.current()
+    db.session.remove()
+
+    assert backup_db.recover_database(target, db_path, backup_dir) == 2
+
+    assert sorted(e.name for e in Event.query.all()) == ['After backup', 'Before backup']
+    assert Participant.query.filter_by(name='After backup winner').first().points == 7
+    assert ClusterTotal.query.first().total_points == 12
+    assert ClusterTotal.find_drift() == {}
+    assert CacheGeneration.current() > generation
+
+    # The journal continues from the recovered point and can be recovered again
+    add_event('New timeline', 3)
+    db.session.remove()
+    pause()
+    assert backup_db.recover_database(datetime.utcnow(), db_path, backup_dir) == 4
+    assert Event.query.filter_by(name='New timeline').count() == 1
+
+def test_recover_skips_backups_after_target(app, paths):
+    """Test a backup taken after the target is not used as the starting point"""
+    db_path, backup_dir = paths
+    db.session.remove()
+    assert backup_db.backup_database(db_path, backup_dir)
+    add_event('Early', 1)
+    pause()
+    target = datetime.utcnow()
+    pause()
+    add_event('Late', 2)
+    db.session.remove()
+    time.sleep(1)  # backup names have one-second resolution
+    assert backup_db.backup_database(db_path, backup_dir)
+
+    assert backup_db.recover_database(target, db_path, backup_dir) == 2
+    assert [e.name for e in Event.query.all()] == ['Early']
+
+def test_recover_keeps_users_and_their_logs(app, paths):
+    """Test users are journaled, and later users the kept logs refer to are carried over"""
+    db_path, backup_dir = paths
+    db.session.remove()
+    assert backup_db.backup_database(db_path, backup_dir)
+    early = User(username='early', role='event_manager')
+    early.set_password('early123')
+    db.session.add(early)
+    db.session.commit()
+    pause()
+    target = datetime.utcnow()
+    pause()
+    late = User(username='late', role='event_manager')
+    late.set_password('late123')
+    db.session.add(late)
+    db.session.flush()
+    db.session.add(ActivityLog(user_id=late.id, action='create_event', details='Undone'))
+    db.session.commit()
+    late_id = late.id
+    db.session.remove()
+
+    assert backup_db.recover_database(target, db_path, backup_dir) == 1
+
+    assert User.query.filter_by(username='early').count() == 1
+    assert db.session.get(User, late_id).username == 'late'
+    assert [log.details for log in ActivityLog.query.filter_by(user_id=late_id)] == ['Undone']
+
+def test_pruning_trims_journal(app, paths, monkeypatch):
+    """Test pruning drops journal entries older than every kept backup and recovery still works"""
+    db_path, backup_dir = paths
+    add_event('First', 1)
+    db.session.remove()
+    assert backup_db.backup_database(db_path, backup_dir, keep=2)
+    add_event('Second', 2)
+    db.session.remove()
+    time.sleep(1)  # backup names have one-second resolution
+    assert backup_db.backup_database(db_path, backup_dir, keep=2)
+    tail = db.session.query(db.func.max(ChangeJournal.id)).scalar()
+    add_event('Third', 3)
+    pause()
+    target = datetime.utcnow()
+    pause()
+    add_event('Fourth', 4)
+    db.session.remove()
+    time.sleep(1)
+    # Prunes the first backup, so only entries from the second one's tail on are needed
+    assert backup_db.backup_database(db_path, backup_dir, keep=2)
+
+    assert db.session.query(db.func.min(ChangeJournal.id)).scalar() == tail
+    # Tails are read from the records beside the backups, not by decompressing them
+    monkeypatch.setattr(backup_db, '_extract_backup', None)
+    assert backup_db.trim_journal(db_path, backup_dir) == 0
+    monkeypatch.undo()
+
+    assert backup_db.recover_database(target, db_path, backup_dir) == 2
+    assert sorted(e.name for e in Event.query.all()) == ['First', 'Second', 'Third']
+
+def test_trim_journal_reads_older_backups_once(app, paths):
+    """Test a backup without a journal record is read once and gets one"""
+    db_path, backup_dir = paths
+    add_event('Relay', 1)
+    db.session.remove()
+    backup_path = backup_db.backup_database(db_path, backup_dir)
+    record = backup_path + '.json'
+    with open(record) as f:
+        journal_id = json.load(f)['journal_id']
+    os.remove(record)
+
+    assert backup_db.trim_journal(db_path, backup_dir) == 0
+    with open(record) as f:
+        assert json.load(f) == {'journal_id': journal_id}
+
+def test_recover_without_usable_backup(app, paths):
+    """Test recovery refuses when no backup predates the target"""
+    db_path, backup_dir = paths
+    add_event('Only', 1)
+    db.session.remove()
+
+    assert backup_db.recover_database(datetime(2000, 1, 1), db_path, backup_dir) is None
+    assert Event.query.count() == 1
+
+def test_parse_recovery_time():
+    """Test relative and absolute recovery targets"""
+    before = datetime.utcnow()
+    two_minutes_ago = backup_db.parse_recovery_time('2m')
+    assert 119 <= (before - two_minutes_ago).total_seconds() <= 121
+    assert backup_db.parse_recovery_time('2024-03-01T14:05:00+00:00') == datetime(2024, 3, 1, 14, 5)
+
+def test_recover_clears_event_results(app, paths):
+    """Test stored winner-list results are rebuilt after a recovery"""
+    from models import EventResult
+
+    db_path, backup_dir = paths
+    db.session.remove()
+    assert backup_db.backup_database(db_path, backup_dir)
+    event_id = add_event('Relay', 4)
+    EventResult.refresh([event_id])
+    db.session.commit()
+    pause()
+    target = datetime.utcnow()
+    pause()
+    Participant.query.filter_by(event_id=event_id).first().points = 40
+    EventResult.refresh([event_id])
+    db.session.commit()
+    db.session.remove()
+
+    assert backup_db.recover_database(target, db_path, backup_dir) == 2
+    assert EventResult.query.count() == 0
+    assert EventResult.fill_missing() == 1
+    assert '"points":4}' in EventResult.query.first().data
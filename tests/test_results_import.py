@@ -0,0 +1,190 @@
+import io
+import json
+import time
+import pytest
+from models import User, Cluster, ClusterTotal, Event, Participant, db
+
+@pytest.fixture
+def app():
+    """Create test application"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+    import os
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    CSRFProtect(app)
+    db.init_app(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka', 'Swarnika']:
+            db.session.add(Cluster(name=name))
+
+        manager = User(username='manager', role='event_manager')
+        manager.set_password('manager123')
+        db.session.add(manager)
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create logged-in test client"""
+    client = app.test_client()
+    client.post('/login', data={'username': 'manager', 'password': 'manager123'})
+    return client
+
+CSV = (
+    "event_name,cluster,participant_name,position,points\n"
+    "Relay,Suryantra,Team A,1,10\n"
+    "Relay,chandraloka,Team B,2,7\n"
+    "Quiz,Swarnika,Team C,1,5\n"
+    "Quiz,Nowhere,Team D,2,3\n"
+    "Quiz,Swarnika,Team E,0,3\n"
+    "Quiz,Swarnika,Team F,3,lots\n"
+)
+
+def test_csv_upload_imports_valid_rows_and_reports_errors(client, app):
+    """Test the form upload path with a mix of valid and invalid rows"""
+    response = client.post('/manage/events/import', data={
+        'file': (io.BytesIO(CSV.encode()), 'results.csv')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    data = response.get_data(as_text=True)
+    assert 'Rows read: 6' in data
+    assert 'Unknown cluster: nowhere' in data
+    assert 'Position must be &gt;= 1' in data
+    assert 'Points must be a whole number' in data
+
+    with app.app_context():
+        assert Event.query.count() == 2
+        assert Participant.query.count() == 3
+        assert ClusterTotal.find_drift() == {}
+
+def test_json_body_returns_report(client, app):
+    """Test API clients can post nested JSON and get a JSON report"""
+    payload = [{'name': 'Dance', 'participants': [
+        {'cluster': 'Suryantra', 'name': 'Crew', 'position': 1, 'points': 20},
+        {'cluster': 2, 'name': 'Troupe', 'position': 2, 'points': 15},
+    ]}]
+    response = client.post('/manage/events/import', data=json.dumps(payload),
+                           content_type='application/json')
+
+    assert response.get_json() == {
+        'rows_read': 2, 'events_created': 1, 'participants_created': 2, 'errors': []
+    }
+    assert b'Dance' in client.get('/events').data
+
+def test_csrf_applies_only_to_browser_sendable_bodies(client, app):
+    """Test with CSRF on, raw JSON from a logged-in script imports while forms need the token"""
+    app.config['WTF_CSRF_ENABLED'] = True
+    payload = [{'name': 'Dance', 'participants': [
+        {'cluster': 'Suryantra', 'name': 'Crew', 'position': 1, 'points': 20},
+    ]}]
+
+    response = client.post('/manage/events/import', data=json.dumps(payload),
+                           content_type='application/json')
+    assert response.status_code == 200
+    assert response.get_json()['events_created'] == 1
+
+    response = client.post('/manage/events/import', data={
+        'file': (io.BytesIO(CSV.encode()), 'results.csv')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+    response = client.post('/manage/events/import?format=csv', data=CSV, content_type='text/plain')
+    assert response.status_code == 400
+
+    with app.app_context():
+        assert Event.query.count() == 1
+
+def test_dry_run_writes_nothing(client, app):
+    """Test validation-only imports"""
+    body = '{"event_name": "Chess", "cluster": "Maya", "participant_name": "X", "position": 1, "points": 1}\nnot json\n'
+    response = client.post('/manage/events/import?dry_run=1', data=body,
+                           content_type='application/x-ndjson')
+
+    report = response.get_json()
+    assert [e['row'] for e in report['errors']] == [1, 2]
+    with app.app_context():
+        assert Event.query.count() == 0
+
+def test_unknown_format_rejected(client):
+    """Test uploads in an unsupported format"""
+    response = client.post('/manage/events/import', data='x', content_type='text/plain')
+    assert response.status_code == 400
+
+def test_large_import_is_fast(app):
+    """Test 50k rows import in seconds through executemany"""
+    from utils.importer import import_results, iter_rows
+
+    lines = ["event_name,cluster,participant_name,position,points"]
+    clusters = ['Suryantra', 'Chandraloka', 'Swarnika']
+    for i in range(50000):
+        lines.append(f"Heat {i // 100},{clusters[i % 3]},Entrant {i},{i % 100 + 1},{i % 10}")
+    stream = io.BytesIO('\n'.join(lines).encode())
+
+    with app.app_context():
+        user_id = User.query.filter_by(username='manager').first().id
+        started = time.perf_counter()
+        report = import_results(iter_rows(stream, 'csv'), user_id)
+        elapsed = time.perf_counter() - started
+
+        assert report.errors == []
+        assert report.events_created == 500
+        assert Participant.query.count() == 50000
+        assert ClusterTotal.find_drift() == {}
+    assert elapsed < 10
+
+def test_import_builds_results_without_loading_participants(app):
+    """Test winner-list rows come from the imported rows, not hydrated participants"""
+    from sqlalchemy import event as sa_event
+    from models import EventResult
+    from utils.importer import import_results
+
+    rows = [(1, {'event_name': 'Relay', 'cluster': 'Swarnika', 'participant_name': 'B', 'position': 2, 'points': 5}),
+            (2, {'event_name': 'Relay', 'cluster': 'Suryantra', 'participant_name': 'A', 'position': 1, 'points': 9}),
+            (3, {'event_name': 'Relay', 'cluster': 'Chandraloka', 'participant_name': 'C', 'position': 2, 'points': 5})]
+    loaded = []
+
+    def count(target, context):
+        loaded.append(target)
+
+    with app.app_context():
+        user_id = User.query.filter_by(username='manager').first().id
+        sa_event.listen(Participant, 'load', count)
+        try:
+            import_results(rows, user_id)
+        finally:
+            sa_event.remove(Participant, 'load', count)
+        assert loaded == []
+
+        # Same blob as building from the loaded event
+        stored = db.session.get(EventResult, Event.query.filter_by(name='Relay').one().id)
+        event = Event.query_with_results().filter(Event.id == stored.event_id).one()
+        assert json.loads(stored.data) == EventResult.build(event)
+        assert [r['name'] for r in json.loads(stored.data)['results']] == ['A', 'B', 'C']
@@ -0,0 +1,67 @@
+import pytest
+from flask import Flask
+from config import Config
+from models import db, install_sqlite_pragmas, read_sqlite_pragmas
+from app import configure_engine_options
+
+@pytest.fixture
+def app(tmp_path):
+    """Create test application backed by a file database"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "pragmas.db"}'
+
+    configure_engine_options(app)
+    db.init_app(app)
+
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+        yield app
+        db.engine.dispose()
+
+def test_profile_applied_to_every_connection(app):
+    """Test pragmas are in effect on new pooled connections"""
+    with app.app_context():
+        # Check out two connections at once so both run the connect hook
+        with db.engine.connect() as first, db.engine.connect() as second:
+            for connection in (first, second):
+                assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+                assert connection.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+                assert connection.exec_driver_sql('PRAGMA busy_timeout').scalar() == 5000
+                assert connection.exec_driver_sql('PRAGMA temp_store').scalar() == 2  # MEMORY
+
+def test_report_reads_actual_values(app):
+    """Test the startup report returns the values SQLite settled on"""
+    with app.app_context():
+        actual = read_sqlite_pragmas(db.engine, ['journal_mode', 'cache_size'])
+    assert actual == {'journal_mode': 'wal', 'cache_size': -16000}
+
+def test_pool_sized_for_file_databases(app):
+    """Test file databases get the configured per-worker pool"""
+    with app.app_context():
+        assert db.engine.pool.size() == Config.SQLITE_POOL_SIZE
+
+def test_memory_databases_keep_driver_pool():
+    """Test pool options are not forced onto in-memory databases"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    configure_engine_options(app)
+    assert 'pool_size' not in app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+
+def test_gevent_workers_get_larger_overflow(tmp_path, monkeypatch):
+    """Test cooperative workers get the gevent pool overflow"""
+    monkeypatch.setattr('app.is_cooperative', lambda: True)
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "gevent.db"}'
+    configure_engine_options(app)
+    options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    assert options['pool_size'] == Config.SQLITE_POOL_SIZE
+    assert options['max_overflow'] == Config.SQLITE_GEVENT_POOL_OVERFLOW
+
+def test_invalid_pragma_name_rejected(app):
+    """Test pragma names cannot smuggle SQL"""
+    with app.app_context():
+        with pytest.raises(ValueError):
+            install_sqlite_pragmas(db.engine, {'journal_mode; DROP TABLE users': 'WAL'})
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import pytest
+from config import Config
+from models import Cluster, Event, EventResult, User, db
+from app import create_app
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def database_path(tmp_path, monkeypatch):
+    """Point new apps at an empty file database"""
+    path = tmp_path / 'startup.db'
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{path}')
+    return path
+
+def test_create_app_leaves_database_alone(database_path):
+    """Test building the app neither creates tables nor seeds data"""
+    app = create_app(instance_path=str(database_path.parent))
+    with app.app_context():
+        assert db.inspect(db.engine).get_table_names() == []
+        db.engine.dispose()
+
+def test_init_db_command_bootstraps_and_reruns(database_path):
+    """Test init-db creates the schema and default data and is safe to repeat"""
+    app = create_app(instance_path=str(database_path.parent))
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['init-db'])
+    assert result.exit_code == 0, result.output
+    assert '✓ Database ready' in result.output
+    result = runner.invoke(args=['init-db'])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        assert Cluster.query.count() == 7
+        assert User.query.filter_by(username='admin').count() == 1
+        db.engine.dispose()
+
+def test_init_db_builds_missing_event_results(database_path):
+    """Test init-db fills the stored results of events written without them"""
+    app = create_app(instance_path=str(database_path.parent))
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=['init-db']).exit_code == 0
+    with app.app_context():
+        db.session.add(Event(name='Legacy', created_by=User.query.first().id))
+        db.session.commit()
+
+    result = runner.invoke(args=['init-db'])
+    assert result.exit_code == 0, result.output
+    assert 'Built stored results for 1 events' in result.output
+    with app.app_context():
+        assert EventResult.query.count() == Event.query.count()
+        db.engine.dispose()
+
+def test_importing_app_module_builds_nothing(tmp_path):
+    """Test the module only builds the app when `app` is first accessed"""
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{tmp_path / "lazy.db"}',
+               JINJA_CACHE_DIR=str(tmp_path / 'jinja_cache'))
+    code = ("import app as module\n"
+            "assert 'app' not in vars(module)\n"
+            "assert module.app is module.application\n"
+            "assert 'app' in vars(module)\n")
+    subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, env=env, check=True)
+    assert not (tmp_path / 'lazy.db').exists()
@@ -0,0 +1,94 @@
+import os
+import pytest
+from models import Cluster, ClusterTotal, db
+from utils.warmup import init_template_cache, warm_up
+
+@pytest.fixture
+def app(tmp_path):
+    """Create test application with a template cache in tmp_path"""
+    from flask import Flask
+    from flask_wtf.csrf import CSRFProtect
+    from config import Config
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    app = Flask(__name__,
+                template_folder=os.path.join(project_root, 'templates'),
+                static_folder=os.path.join(project_root, 'static'))
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['JINJA_CACHE_DIR'] = str(tmp_path / 'jinja_cache')
+
+    CSRFProtect(app)
+    db.init_app(app)
+    init_template_cache(app)
+
+    from routes.auth import auth_bp
+    from routes.events import events_bp
+    from routes.overview import overview_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(overview_bp)
+
+    with app.app_context():
+        db.create_all()
+
+        for name in ['Suryantra', 'Chandraloka', 'Swarnika']:
+            db.session.add(Cluster(name=name))
+        db.session.commit()
+
+        ClusterTotal.rebuild()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+def test_compiled_templates_are_written_to_disk(app):
+    """Test compiled templates land in the shared cache directory"""
+    cache_dir = app.config['JINJA_CACHE_DIR']
+    assert os.listdir(cache_dir) == []
+
+    app.jinja_env.get_template('overview.html')
+    written = os.listdir(cache_dir)
+    assert written
+
+    # A fresh environment loads the same entries instead of writing new ones
+    app.jinja_env.cache.clear()
+    app.jinja_env.get_template('overview.html')
+    assert sorted(os.listdir(cache_dir)) == sorted(written)
+
+def test_empty_cache_dir_disables_cache(app):
+    """Test an empty JINJA_CACHE_DIR leaves Jinja without a bytecode cache"""
+    from flask import Flask
+    other = Flask(__name__)
+    other.config['JINJA_CACHE_DIR'] = ''
+    init_template_cache(other)
+    assert other.jinja_env.bytecode_cache is None
+
+def test_warm_up_renders_public_pages_without_request_hooks(app):
+    """Test warm-up fills the page cache and compiles every template, skipping request hooks"""
+    hooks = []
+    app.before_request(lambda: hooks.append(True))
+
+    warm_up(app)
+
+    assert 'leaderboard' in app.extensions['page_cache']
+    assert 'events' in app.extensions['page_cache']
+    assert set(app.jinja_env.list_templates()) <= {name for _, name in app.jinja_env.cache.keys()}
+    assert hooks == []
+
+    # Workers answer from the warmed cache
+    response = app.test_client().get('/leaderboard')
+    assert response.status_code == 200
+    assert b'Suryantra' in response.data
+
+def test_warm_up_survives_missing_tables(app):
+    """Test a database without tables is logged rather than stopping the server"""
+    db.drop_all()
+    warm_up(app)
+    assert 'leaderboard' not in app.extensions.get('page_cache', {})
+    db.create_all()
@@ -0,0 +1,218 @@
+from flask import current_app, has_app_context, request, send_from_directory
+from werkzeug.security import safe_join
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import mimetypes
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # .br siblings are skipped without the Brotli package
+    brotli = None
+
+# Fingerprinted copies go under static/build/, listed in its manifest
+BUILD_DIR = 'build'
+MANIFEST_NAME = 'manifest.json'
+
+# Top-level static folders that are built
+ASSET_DIRS = ('css', 'js', 'images')
+
+# Text assets worth precompressing; images are already compressed
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json')
+
+# Cluster logos get a WebP variant at twice the 180px the leaderboard draws
+LOGO_DIR = 'images/clusters'
+LOGO_WEBP_WIDTH = 360
+LOGO_WEBP_QUALITY = 85
+
+# Fingerprinted names never change content, so browsers may keep them a year
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+# url("/static/...") references inside stylesheets
+CSS_STATIC_URL = re.compile(r'''url\((['"]?)/static/([^'")?#]+)([^'")]*)\1\)''')
+
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(relative_path, data):
+    """Return relative_path with a content hash before its extension"""
+    root, extension = os.path.splitext(relative_path)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+
+
+def load_manifest(path):
+    """Return the built file map from a manifest, or {} if there is none"""
+    try:
+        with open(path) as f:
+            return json.load(f)['files']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _write_compressed(path, data):
+    """Write .gz and .br siblings of path where they are smaller than data"""
+    written = []
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            _write(path + suffix, compressed)
+            written.append(path + suffix)
+    return written
+
+
+def _webp_logo(path):
+    """Return a WebP encoding of the logo at path, no wider than LOGO_WEBP_WIDTH"""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = image.convert('RGBA')
+        if image.width > LOGO_WEBP_WIDTH:
+            height = round(image.height * LOGO_WEBP_WIDTH / image.width)
+            image = image.resize((LOGO_WEBP_WIDTH, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=LOGO_WEBP_QUALITY, method=6)
+        return buffer.getvalue()
+
+
+def build_assets(static_folder):
+    """
+    Fingerprint the static files and write them to static/build/
+
+    Each file under css/, js/ and images/ is copied to a name containing a
+    hash of its content. Stylesheet references to /static/ files are
+    rewritten to the fingerprinted names, text assets get .gz and .br
+    siblings, and each cluster logo gets a resized WebP variant listed as
+    images/clusters/<name>.webp. Files of the previous build are kept so
+    pages rendered before a restart still load; older ones are removed.
+
+    Args:
+        static_folder: The app's static folder
+
+    Returns:
+        The new manifest's file map
+    """
+    # WebP logos are skipped without Pillow
+    make_webp = importlib.util.find_spec('PIL') is not None
+
+    build_root = os.path.join(static_folder, BUILD_DIR)
+    manifest_path = os.path.join(build_root, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+
+    sources = []
+    for directory in ASSET_DIRS:
+        for root, _, names in os.walk(os.path.join(static_folder, directory)):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                sources.append(os.path.relpath(path, static_folder).replace(os.sep, '/'))
+    # Stylesheets last, so the files they reference are already built
+    sources.sort(key=lambda relative: (relative.endswith('.css'), relative))
+
+    files = {}
+    written = set()
+
+    def add(relative, data):
+        built = f'{BUILD_DIR}/{fingerprint(relative, data)}'
+        path = os.path.join(static_folder, built)
+        _write(path, data)
+        written.add(path)
+        if relative.endswith(COMPRESSIBLE_EXTENSIONS):
+            written.update(_write_compressed(path, data))
+        files[relative] = built
+
+    def rewrite_css_url(match):
+        quote, target, suffix = match.groups()
+        return f'url({quote}/static/{files.get(target, target)}{suffix}{quote})'
+
+    for relative in sources:
+        path = os.path.join(static_folder, relative)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if relative.endswith('.css'):
+            data = CSS_STATIC_URL.sub(rewrite_css_url, data.decode('utf-8')).encode('utf-8')
+        add(relative, data)
+
+        if make_webp and relative.startswith(LOGO_DIR + '/') and relative.endswith('.png'):
+            add(os.path.splitext(relative)[0] + '.webp', _webp_logo(path))
+
+    version = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()[:12]
+    _write(manifest_path, json.dumps({'version': version, 'files': files}, indent=2, sort_keys=True).encode())
+    written.add(manifest_path)
+
+    # Keep the new and the previous build, drop anything older
+    keep = written | {os.path.join(static_folder, built) for built in previous.values()}
+    for root, _, names in os.walk(build_root):
+        for name in names:
+            path = os.path.join(root, name)
+            original = path[:-3] if path.endswith(('.gz', '.br')) else path
+            if path not in keep and original not in keep:
+                os.remove(path)
+    return files
+
+
+def init_assets(app):
+    """
+    Serve fingerprinted assets when a build exists
+
+    url_for('static', filename=...) returns the fingerprinted name of any
+    built file, and built files are served with one-year immutable caching
+    and their precompressed siblings when the client accepts them.
+    """
+    files = load_manifest(os.path.join(app.static_folder, BUILD_DIR, MANIFEST_NAME))
+    app.extensions['assets'] = files
+    if not files:
+        return
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in files:
+            values['filename'] = files[values['filename']]
+
+    app.view_functions['static'] = send_static_asset
+    print(f"✓ Serving {len(files)} fingerprinted static assets")
+
+
+def asset_url(filename):
+    """Return the fingerprinted URL of a static file, or None if it was not built"""
+    if not has_app_context():
+        return None
+    built = current_app.extensions.get('assets', {}).get(filename)
+    if built is None:
+        return None
+    return f'{current_app.static_url_path}/{built}'
+
+
+def send_static_asset(filename):
+    """Static view that adds immutable caching and precompressed bodies to built files"""
+    app = current_app
+    if not filename.startswith(BUILD_DIR + '/'):
+        return app.send_static_file(filename)
+
+    path = safe_join(app.static_folder, filename)
+    siblings = [(encoding, suffix) for encoding, suffix in PRECOMPRESSED
+                if path is not None and os.path.isfile(path + suffix)]
+    for encoding, suffix in siblings:
+        if request.accept_encodings[encoding]:
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(app.static_folder, filename + suffix,
+                                           mimetype=mimetype, max_age=ASSET_MAX_AGE)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename, max_age=ASSET_MAX_AGE)
+
+    response.cache_control.immutable = True
+    if siblings:
+        response.vary.add('Accept-Encoding')
+    return response
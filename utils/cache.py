@@ -0,0 +1,77 @@
+from flask import current_app, g, request, session
+from werkzeug.http import is_resource_modified
+from models import CacheGeneration
+from utils.compression import compress_response
+
+def invalidate_public_pages():
+    """
+    Mark every worker's cached public pages as stale
+
+    Call before committing any change that affects the leaderboard or the
+    winner list, so the bump commits atomically with the data.
+    """
+    CacheGeneration.bump()
+
+def is_cacheable_request():
+    """Only anonymous requests without pending flash messages share a rendering"""
+    return 'user_id' not in session and '_flashes' not in session
+
+def cached_page(key, render, store=True, mimetype=None, shared=False):
+    """
+    Serve a rendered public page from this worker's cache
+
+    The cache lives in process memory and is keyed by the generation stored
+    in the database, so a write in any worker invalidates it everywhere at
+    the cost of one primary-key read per request. Anonymous responses carry
+    an ETag and Last-Modified derived from the generation, and conditional
+    requests that still match are answered with 304 before any rendering.
+
+    Args:
+        key: Name of the cached page (e.g. 'leaderboard')
+        render: Callable returning the rendered page body
+        store: Keep the body in the worker cache; pass False for pages with
+            unbounded keys (e.g. deep pagination cursors) to get only the
+            ETag handling
+        mimetype: Response mimetype, HTML by default
+        shared: The body never depends on the session (API responses), so
+            every request gets the cached body and public Cache-Control
+            headers that CDNs and edge caches may honour
+    """
+    # Pages embed the generation they show so live viewers can resume from it
+    generation, updated_at = CacheGeneration.current_with_timestamp()
+    g.cache_generation = generation
+    if not shared and not is_cacheable_request():
+        return render()
+
+    etag = f'{key}-{generation}'
+    compressed = None
+    if not is_resource_modified(request.environ, etag=etag, last_modified=updated_at):
+        response = current_app.response_class(status=304, mimetype=mimetype)
+    elif not store:
+        response = current_app.response_class(render(), mimetype=mimetype)
+    else:
+        cache = current_app.extensions.setdefault('page_cache', {})
+        entry = cache.get(key)
+        if entry is None or entry[0] != generation:
+            entry = (generation, render())
+            cache[key] = entry
+        response = current_app.response_class(entry[1], mimetype=mimetype)
+        # Compressed bodies of the same generation, added per encoding on first use
+        variants = current_app.extensions.setdefault('compressed_pages', {})
+        if key not in variants or variants[key][0] != generation:
+            variants[key] = (generation, {})
+        compressed = variants[key][1]
+
+    response.set_etag(etag)
+    response.last_modified = updated_at
+    if shared:
+        # A few seconds of staleness is fine for scoreboards and takes
+        # polling load off the app
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['API_CACHE_MAX_AGE']
+    else:
+        # Let browsers and proxies keep the page but revalidate on every poll
+        response.cache_control.no_cache = True
+    if compressed is not None:
+        compress_response(response, compressed)
+    return response
@@ -0,0 +1,87 @@
+from flask import current_app, request
+import gzip
+
+try:
+    import brotli
+except ImportError:  # Only gzip is offered without the Brotli package
+    brotli = None
+
+# Text responses worth compressing; images and streams are left alone
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'text/html', 'text/css', 'text/csv', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson', 'image/svg+xml'
+))
+
+
+def choose_encoding():
+    """Return 'br', 'gzip' or None for the current request's Accept-Encoding"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    """Compress data with the configured level for encoding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=current_app.config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=current_app.config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def is_compressible(response):
+    """Return True for complete, uncompressed text responses"""
+    return (response.status_code == 200
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and 'Content-Encoding' not in response.headers
+            and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and not response.cache_control.no_transform)
+
+
+def compress_response(response, cache=None):
+    """
+    Compress a response body for the encoding the client accepts
+
+    Bodies under COMPRESS_MIN_SIZE are sent as they are. A strong ETag is
+    made weak, since the compressed bytes differ from the identity body
+    but mean the same thing, so revalidation still matches either one.
+
+    Args:
+        response: Response to compress in place
+        cache: Optional dict of encoding -> compressed body for a body that
+            is shared between requests; filled on first use so the same
+            page is compressed once rather than once per request
+
+    Returns:
+        The response
+    """
+    if not current_app.config['COMPRESS_RESPONSES'] or not is_compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if cache is None:
+        body = compress(data, encoding)
+    else:
+        body = cache.get(encoding)
+        if body is None:
+            body = cache[encoding] = compress(data, encoding)
+
+    response.set_data(body)
+    response.content_encoding = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Compress eligible responses that are not already compressed"""
+    app.after_request(compress_response)
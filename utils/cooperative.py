@@ -0,0 +1,33 @@
+import sys
+
+
+def is_cooperative():
+    """
+    Return True when gevent has monkey-patched threading in this process
+
+    gunicorn.conf.py patches before preloading the app when
+    GUNICORN_WORKER_CLASS=gevent, so threads, locks and queues created by
+    the app are greenlets and cooperative primitives. Code that must still
+    run on a real OS thread (CPU-bound work such as password hashing) or
+    that sizes resources per concurrent request checks this.
+    """
+    # Patching imports gevent.monkey first; checking sys.modules keeps gevent
+    # from being imported at all in sync workers
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def native_thread_pool(max_workers, thread_name_prefix=''):
+    """
+    Return an executor whose workers are real OS threads
+
+    Under gevent a plain ThreadPoolExecutor would run its tasks as
+    greenlets on the hub, so CPU-bound work would stall every other request
+    in the worker. gevent's executor keeps native threads, and waiting on
+    its futures yields to other greenlets.
+    """
+    if is_cooperative():
+        from gevent.threadpool import ThreadPoolExecutor
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
@@ -1,5 +1,6 @@
 from functools import wraps
-from flask import session, redirect, url_for, flash, abort
+from flask import current_app, request, session, redirect, url_for, flash, abort
+import hmac
 
 def login_required(f):
     """Decorator to protect routes requiring authentication"""
@@ -22,3 +23,14 @@ def admin_required(f):
             abort(403)
         return f(*args, **kwargs)
     return decorated_function
+
+def metrics_access_required(f):
+    """Decorator allowing admins, or scrapers presenting METRICS_TOKEN as a bearer token"""
+    admin_view = admin_required(f)
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return f(*args, **kwargs)
+        return admin_view(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,103 @@
+from flask import Response, abort, request, stream_with_context
+from models import db
+from datetime import datetime
+import csv
+import io
+import json
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json'
+}
+
+# Rows fetched from the database cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def serialize_rows(columns, rows, file_format):
+    """
+    Yield an export body chunk by chunk
+
+    Args:
+        columns: Column names, in output order
+        rows: Iterable of row tuples matching columns, consumed lazily
+        file_format: 'csv', 'ndjson' or 'json'
+    """
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for count, row in enumerate(rows, start=1):
+            writer.writerow([_plain(value) for value in row])
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    elif file_format == 'ndjson':
+        for row in rows:
+            yield json.dumps({name: _plain(value) for name, value in zip(columns, row)}) + '\n'
+    elif file_format == 'json':
+        yield '['
+        separator = ''
+        for row in rows:
+            yield separator + json.dumps({name: _plain(value) for name, value in zip(columns, row)})
+            separator = ','
+        yield ']\n'
+    else:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+
+def parse_since(value):
+    """Parse a ?since= ISO timestamp, returning None when absent"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+
+def export_request():
+    """Return the (format, since) asked for by the request, aborting with 400 when invalid"""
+    file_format = request.args.get('format', 'csv').lower()
+    if file_format not in EXPORT_FORMATS:
+        abort(400)
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError:
+        abort(400)
+    return file_format, since
+
+
+def export_response(statement, columns, file_format, filename):
+    """
+    Stream the rows of a Core select as a download
+
+    Rows are fetched EXPORT_BATCH_SIZE at a time and written out as they
+    arrive, so memory stays flat however large the table is.
+
+    Args:
+        statement: Select whose columns match columns
+        columns: Column names for the header / object keys
+        file_format: 'csv', 'ndjson' or 'json'
+        filename: Download name without timestamp or extension
+    """
+    def rows():
+        result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        try:
+            for row in result:
+                yield tuple(row)
+        finally:
+            result.close()
+            db.session.close()
+
+    body = serialize_rows(columns, rows(), file_format)
+    response = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[file_format])
+    stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}_{stamp}.{file_format}'
+    return response
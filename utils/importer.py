@@ -0,0 +1,198 @@
+from models import Cluster, ClusterTotal, Event, EventResult, LeaderboardSnapshot, Participant, User, db
+from utils.cache import invalidate_public_pages
+import csv
+import io
+import json
+
+# Columns of a flat results file, one participant per row
+IMPORT_FIELDS = ('event_name', 'cluster', 'participant_name', 'position', 'points')
+
+# Participants are inserted in chunks to bound the size of each executemany
+INSERT_CHUNK_SIZE = 5000
+
+
+class ImportReport:
+    """Outcome of a results import"""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.events_created = 0
+        self.participants_created = 0
+        self.errors = []  # (row number, message) pairs
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, message))
+
+    def to_dict(self):
+        return {
+            'rows_read': self.rows_read,
+            'events_created': self.events_created,
+            'participants_created': self.participants_created,
+            'errors': [{'row': row, 'error': message} for row, message in self.errors]
+        }
+
+
+def detect_format(filename=None, mimetype=None, requested=None):
+    """Return 'csv', 'ndjson' or 'json' for an upload, or None if unknown"""
+    if requested:
+        return requested.lower() if requested.lower() in ('csv', 'ndjson', 'json') else None
+    if filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension in ('csv', 'ndjson', 'json'):
+            return extension
+        if extension == 'jsonl':
+            return 'ndjson'
+    if mimetype:
+        if mimetype in ('text/csv', 'application/csv'):
+            return 'csv'
+        if mimetype in ('application/x-ndjson', 'application/jsonl'):
+            return 'ndjson'
+        if mimetype == 'application/json':
+            return 'json'
+    return None
+
+
+def iter_rows(stream, file_format):
+    """
+    Yield (row number, row dict) from a binary results stream
+
+    CSV and NDJSON are read one line at a time. JSON accepts either a list of
+    flat rows or a list of events with nested participants.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        # Row 1 is the header
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            yield row_number, row
+    elif file_format == 'ndjson':
+        for row_number, line in enumerate(text, start=1):
+            if line.strip():
+                yield row_number, _loads_row(line)
+    elif file_format == 'json':
+        row_number = 0
+        for item in json.load(text):
+            if isinstance(item, dict) and 'participants' in item:
+                for participant in item.get('participants') or []:
+                    row_number += 1
+                    yield row_number, dict(participant, event_name=item.get('name'))
+            else:
+                row_number += 1
+                yield row_number, item
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def _loads_row(line):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return {'_error': f'Invalid JSON: {e.msg}'}
+
+
+def _int_field(row, field):
+    value = row.get(field)
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValueError(f'{field.capitalize()} must be a whole number')
+
+
+def import_results(rows, user_id, dry_run=False):
+    """
+    Validate and insert results in a single transaction
+
+    Each distinct event_name becomes a new event. Rows are checked with the
+    same rules as the Participant model; invalid rows are reported and
+    skipped. Inserts use Core executemany, and the winner-list rows are
+    built from the validated rows, so no ORM objects are built per row.
+
+    Args:
+        rows: Iterable of (row number, row dict) from iter_rows()
+        user_id: ID of the user recorded as creator of the new events
+        dry_run: Validate only, write nothing
+
+    Returns:
+        ImportReport
+    """
+    report = ImportReport()
+    clusters = {}
+    cluster_info = {}  # id -> (name, logo URL) for the winner-list rows
+    for cluster_id, name, logo_filename in db.session.query(Cluster.id, Cluster.name, Cluster.logo_filename):
+        clusters[name.lower()] = cluster_id
+        clusters[str(cluster_id)] = cluster_id
+        cluster_info[cluster_id] = (name, Cluster.logo_url_for(name, logo_filename))
+
+    events = {}  # event name -> list of participant parameter dicts
+    for row_number, row in rows:
+        report.rows_read += 1
+        if not isinstance(row, dict):
+            report.add_error(row_number, 'Row must be an object')
+            continue
+        if '_error' in row:
+            report.add_error(row_number, row['_error'])
+            continue
+        try:
+            event_name = str(row.get('event_name') or '').strip()
+            cluster_key = str(row.get('cluster') or row.get('cluster_id') or '').strip().lower()
+            name = str(row.get('participant_name') or row.get('name') or '').strip()
+            if not event_name:
+                raise ValueError('Event name is required')
+            if cluster_key not in clusters:
+                raise ValueError(f'Unknown cluster: {cluster_key or "(blank)"}')
+            if not name:
+                raise ValueError('Participant name is required')
+            position = _int_field(row, 'position')
+            points = _int_field(row, 'points')
+            Participant.validate(position, points)
+        except ValueError as e:
+            report.add_error(row_number, str(e))
+            continue
+
+        events.setdefault(event_name, []).append({
+            'cluster_id': clusters[cluster_key],
+            'name': name,
+            'position': position,
+            'points': points
+        })
+
+    report.events_created = len(events)
+    report.participants_created = sum(len(participants) for participants in events.values())
+    if dry_run or not events:
+        return report
+
+    try:
+        event_names = list(events)
+        created = db.session.execute(
+            db.insert(Event).returning(Event.id, Event.created_at, sort_by_parameter_order=True),
+            [{'name': name, 'created_by': user_id} for name in event_names]
+        ).all()
+        event_ids = [event_id for event_id, _ in created]
+
+        points_delta = {}
+        chunk = []
+        for event_id, name in zip(event_ids, event_names):
+            for participant in events[name]:
+                participant['event_id'] = event_id
+                points_delta[participant['cluster_id']] = points_delta.get(participant['cluster_id'], 0) + participant['points']
+                chunk.append(participant)
+                if len(chunk) >= INSERT_CHUNK_SIZE:
+                    db.session.execute(db.insert(Participant), chunk)
+                    chunk = []
+        if chunk:
+            db.session.execute(db.insert(Participant), chunk)
+
+        ClusterTotal.apply_deltas(points_delta)
+        LeaderboardSnapshot.record('import_events')
+        creator = db.session.execute(db.select(User.username).where(User.id == user_id)).scalar()
+        EventResult.insert_built([
+            (event_id, created_at,
+             EventResult.build_from_rows(event_id, name, created_at, creator, events[name], cluster_info))
+            for (event_id, created_at), name in zip(created, event_names)
+        ])
+        invalidate_public_pages()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return report
@@ -0,0 +1,85 @@
+from flask import current_app
+from models import Cluster, ClusterTotal, EventResult, LeaderboardSnapshot, db
+import json
+
+def build_live_state():
+    """
+    Return the compact public state pushed to live viewers
+    
+    Returns:
+        Dictionary with 'totals' ({cluster_id: points}), 'movement'
+        ({cluster_id: places gained since the previous result}) and 'events'
+        ({event_id: [name, date, creator, participants]}), where participants
+        is a list of [position, name, cluster_name, points] sorted by position
+    """
+    totals = {}
+    rows = db.session.query(Cluster.id, ClusterTotal.total_points)\
+        .outerjoin(ClusterTotal, ClusterTotal.cluster_id == Cluster.id)\
+        .all()
+    for cluster_id, total_points in rows:
+        totals[str(cluster_id)] = total_points or 0
+    
+    movement = {str(cluster_id): moved for cluster_id, moved in LeaderboardSnapshot.movement().items()}
+    
+    events = {}
+    rows = db.session.query(EventResult.event_id, EventResult.data)\
+        .order_by(EventResult.created_at.desc(), EventResult.event_id.desc())
+    for event_id, data in rows:
+        result = json.loads(data)
+        events[str(event_id)] = [
+            result['name'],
+            result['date'],
+            result['creator'],
+            [[r['position'], r['name'], r['cluster'], r['points']] for r in result['results']]
+        ]
+    
+    return {'totals': totals, 'movement': movement, 'events': events}
+
+def get_live_state(generation):
+    """Return the live state for a generation, built once per worker and shared by its streams"""
+    cache = current_app.extensions.setdefault('live_state', {})
+    if cache.get('generation') != generation:
+        cache['state'] = build_live_state()
+        cache['generation'] = generation
+    return cache['state']
+
+def diff_live_state(old, new, with_events=True):
+    """
+    Return the delta that turns one live state into another
+    
+    Args:
+        old: Previously sent state, or None to produce a full snapshot
+        new: Current state
+        with_events: Include the winner list; leaderboard-only viewers
+            never use it, so they get totals and movement alone
+    
+    Returns:
+        Dictionary with only the changed parts, or None when nothing changed
+    """
+    if old is None:
+        delta = {'full': True, 'totals': new['totals'], 'movement': new.get('movement', {})}
+        if with_events:
+            delta.update(events=new['events'], removed=[])
+        return delta
+    
+    totals = {cid: points for cid, points in new['totals'].items() if old['totals'].get(cid) != points}
+    movement_changed = old.get('movement') != new.get('movement')
+    events, removed = {}, []
+    if with_events:
+        events = {eid: data for eid, data in new['events'].items() if old['events'].get(eid) != data}
+        removed = [eid for eid in old['events'] if eid not in new['events']]
+    
+    if not totals and not movement_changed and not events and not removed:
+        return None
+    
+    delta = {}
+    if totals:
+        delta['totals'] = totals
+    if movement_changed:
+        # Small enough to always send whole
+        delta['movement'] = new['movement']
+    if events:
+        delta['events'] = events
+    if removed:
+        delta['removed'] = removed
+    return delta
@@ -1,27 +1,152 @@
 from models import ActivityLog, db
-from flask import session
+from flask import current_app, session
+from datetime import datetime
+import atexit
 import json
+import os
+import queue
+import threading
+import time
 
 def log_activity(action, details=None):
     """
     Create ActivityLog entry for user actions
-    
+
+    Entries are handed to the background ActivityLogWriter when
+    ACTIVITY_LOG_ASYNC is enabled, so the request does not pay for a second
+    commit. In testing, or with the setting off, they are written
+    synchronously.
+
     Args:
         action: String describing the action (e.g., 'create_event', 'edit_event', 'delete_event')
         details: Dictionary with additional information about the action
     """
     if 'user_id' not in session:
         return
-    
+
     details_json = None
     if details:
         details_json = json.dumps(details)
-    
-    log_entry = ActivityLog(
-        user_id=session['user_id'],
-        action=action,
-        details=details_json
-    )
-    
-    db.session.add(log_entry)
-    db.session.commit()
+
+    entry = {
+        'user_id': session['user_id'],
+        'action': action,
+        'details': details_json,
+        'timestamp': datetime.utcnow()
+    }
+
+    app = current_app._get_current_object()
+    if app.config.get('ACTIVITY_LOG_ASYNC') and not app.testing:
+        get_writer(app).enqueue(entry)
+    else:
+        db.session.add(ActivityLog(**entry))
+        db.session.commit()
+
+
+class ActivityLogWriter:
+    """
+    Background writer that batches ActivityLog inserts
+
+    Entries wait in a bounded queue and are inserted in one transaction per
+    batch, either when batch_size entries are waiting or flush_interval
+    seconds after the first one arrived. When the queue is full the caller
+    writes its entry synchronously instead of dropping it.
+    """
+
+    def __init__(self, app, max_queue=1000, batch_size=50, flush_interval=0.2):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+        self._thread.start()
+
+    def enqueue(self, entry):
+        """Queue an entry, writing it immediately if the queue is full"""
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self._write([entry])
+
+    def flush(self):
+        """Write every queued entry now"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def stop(self, timeout=5):
+        """Stop the background thread and flush what is left"""
+        self._stopping.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                batch = [self.queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=min(remaining, 0.5)))
+                except queue.Empty:
+                    continue
+            self._write(batch)
+
+    def _write(self, batch):
+        # One writer at a time keeps batches in order and off each other's locks
+        with self._lock, self.app.app_context():
+            try:
+                db.session.execute(db.insert(ActivityLog), batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception('Failed to write %d activity log entries', len(batch))
+            finally:
+                db.session.remove()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer(app):
+    """Return this process's ActivityLogWriter, starting it on first use"""
+    global _writer
+    # Threads do not survive fork, so each gunicorn worker starts its own
+    if _writer is None or _writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                _writer = ActivityLogWriter(
+                    app,
+                    max_queue=app.config.get('ACTIVITY_LOG_QUEUE_SIZE', 1000),
+                    batch_size=app.config.get('ACTIVITY_LOG_BATCH_SIZE', 50),
+                    flush_interval=app.config.get('ACTIVITY_LOG_FLUSH_MS', 200) / 1000
+                )
+    return _writer
+
+def flush_activity_log():
+    """Stop this process's writer and write out queued entries (shutdown hook)"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None and writer.pid == os.getpid():
+        writer.stop()
+
+atexit.register(flush_activity_log)
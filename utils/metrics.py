@@ -0,0 +1,418 @@
+from flask import before_render_template, current_app, g, request, template_rendered
+from contextvars import ContextVar
+from sqlalchemy import event as sa_event
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+# Upper bounds, in seconds, of the histogram buckets; one more bucket holds the rest
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Parts of a request timed separately; they may overlap (SQL run while rendering)
+PHASES = ('sql', 'template', 'hash')
+
+METRIC_PREFIX = 'event_scoring'
+SNAPSHOT_NAME = re.compile(r'metrics-(\d+)\.json')
+ARCHIVE_NAME = 'metrics-exited.json'
+
+logger = logging.getLogger(__name__)
+
+# Timer of the request being served in this thread (or greenlet)
+_current_timer = ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    """Query count and time spent in each phase of one request"""
+
+    __slots__ = ('started', 'queries', 'phases', '_depth', '_entered')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self._depth = dict.fromkeys(PHASES, 0)
+        self._entered = {}
+
+    def start(self, phase):
+        # Nested starts of the same phase are counted once, from the outermost
+        if self._depth[phase] == 0:
+            self._entered[phase] = time.perf_counter()
+        self._depth[phase] += 1
+
+    def stop(self, phase):
+        if self._depth[phase] == 0:
+            return
+        self._depth[phase] -= 1
+        if self._depth[phase] == 0:
+            self.phases[phase] += time.perf_counter() - self._entered[phase]
+
+    def server_timing(self, total):
+        """Return a Server-Timing header value for this request"""
+        parts = [f'sql;dur={self.phases["sql"] * 1000:.2f};desc="{self.queries} queries"']
+        for phase in PHASES[1:]:
+            if self.phases[phase]:
+                parts.append(f'{phase};dur={self.phases[phase] * 1000:.2f}')
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+
+class timed:
+    """Context manager adding the enclosed time to a phase of the current request, if timed"""
+
+    __slots__ = ('phase', 'timer')
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.timer = _current_timer.get()
+        if self.timer is not None:
+            self.timer.start(self.phase)
+
+    def __exit__(self, *exc_info):
+        if self.timer is not None:
+            self.timer.stop(self.phase)
+
+
+def _empty_histogram():
+    # Bucket counts followed by the sum of observed values
+    return [0] * (len(BUCKETS) + 1) + [0.0]
+
+
+def _observe(histogram, value):
+    histogram[bisect.bisect_left(BUCKETS, value)] += 1
+    histogram[-1] += value
+
+
+def _empty_endpoint():
+    return {
+        'responses': {},  # status class ('2xx') -> count
+        'queries': 0,
+        'duration': _empty_histogram(),
+        'phases': {phase: _empty_histogram() for phase in PHASES}
+    }
+
+
+def merge_snapshots(target, source):
+    """Add the counts of one snapshot into another, in place"""
+    for endpoint, stats in source.items():
+        into = target.setdefault(endpoint, _empty_endpoint())
+        for status, count in stats['responses'].items():
+            into['responses'][status] = into['responses'].get(status, 0) + count
+        into['queries'] += stats['queries']
+        into['duration'] = [a + b for a, b in zip(into['duration'], stats['duration'])]
+        for phase, histogram in stats['phases'].items():
+            into['phases'][phase] = [a + b for a, b in zip(into['phases'].get(phase, _empty_histogram()), histogram)]
+    return target
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_snapshot(path, snapshot):
+    # Write then rename, so readers never see a half-written file
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+class RequestMetrics:
+    """
+    Per-process histograms of request timings, by endpoint
+
+    Each gunicorn worker keeps its own counts and writes them to a snapshot
+    file in `directory` at most every `flush_interval` seconds, so whichever
+    worker serves the metrics page can add up every worker's counts.
+    """
+
+    def __init__(self, directory=None, flush_interval=2.0):
+        self.pid = os.getpid()
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._next_flush = time.monotonic() + flush_interval
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f'metrics-{self.pid}.json')
+
+    def observe(self, endpoint, status_code, timer, total):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _empty_endpoint()
+            status = f'{status_code // 100}xx'
+            stats['responses'][status] = stats['responses'].get(status, 0) + 1
+            stats['queries'] += timer.queries
+            _observe(stats['duration'], total)
+            for phase, seconds in timer.phases.items():
+                _observe(stats['phases'][phase], seconds)
+        if self.directory and time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def snapshot(self):
+        """Return a copy of this process's counts"""
+        with self._lock:
+            return merge_snapshots({}, self._endpoints)
+
+    def flush(self):
+        """Write this process's counts to its snapshot file"""
+        if not self.directory:
+            return
+        self._next_flush = time.monotonic() + self.flush_interval
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_snapshot(self.path, self.snapshot())
+        except OSError:
+            logger.exception('Could not write request metrics to %s', self.directory)
+
+    def collect(self):
+        """Return the counts of this process plus every other worker's snapshot"""
+        combined = self.snapshot()
+        if not self.directory or not os.path.isdir(self.directory):
+            return combined
+        for name in os.listdir(self.directory):
+            if name == ARCHIVE_NAME:
+                merge_snapshots(combined, _read_snapshot(os.path.join(self.directory, name)))
+                continue
+            match = SNAPSHOT_NAME.fullmatch(name)
+            # Files of exited processes that were never archived (e.g. an
+            # earlier development server) are ignored
+            if match and int(match.group(1)) != self.pid and _pid_alive(int(match.group(1))):
+                merge_snapshots(combined, _read_snapshot(os.path.join(self.directory, name)))
+        return combined
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_metrics_lock = threading.Lock()
+_process_metrics = None  # The latest RequestMetrics of this process, for flush_metrics()
+
+def get_metrics(app=None):
+    """Return the app's RequestMetrics for this process, creating it on first use"""
+    global _process_metrics
+    app = app or current_app._get_current_object()
+    metrics = app.extensions.get('metrics')
+    # Counts are per process; a forked worker starts its own
+    if metrics is None or metrics.pid != os.getpid():
+        with _metrics_lock:
+            metrics = app.extensions.get('metrics')
+            if metrics is None or metrics.pid != os.getpid():
+                metrics = app.extensions['metrics'] = RequestMetrics(
+                    app.config['METRICS_DIR'] or None, app.config['METRICS_FLUSH_SECONDS'])
+                _process_metrics = metrics
+    return metrics
+
+
+def flush_metrics():
+    """Write out this process's counts (worker shutdown hook)"""
+    metrics = _process_metrics
+    if metrics is not None and metrics.pid == os.getpid():
+        metrics.flush()
+
+
+def archive_worker_metrics(directory, pid):
+    """
+    Fold an exited worker's snapshot into the archive file (master hook)
+
+    Keeps the totals from decreasing when gunicorn replaces a worker, while
+    the number of snapshot files stays at one per live worker.
+    """
+    path = os.path.join(directory, f'metrics-{pid}.json')
+    if not os.path.exists(path):
+        return
+    archive_path = os.path.join(directory, ARCHIVE_NAME)
+    archive = merge_snapshots(_read_snapshot(archive_path), _read_snapshot(path))
+    _write_snapshot(archive_path, archive)
+    os.remove(path)
+
+
+def clear_metrics(directory):
+    """Remove snapshot files left by a previous server (master startup hook)"""
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith('metrics-'):
+            os.remove(os.path.join(directory, name))
+
+
+def _start_request():
+    g.request_timer_token = _current_timer.set(RequestTimer())
+
+
+def _finish_request(response):
+    timer = _current_timer.get()
+    if timer is None:
+        return response
+    total = time.perf_counter() - timer.started
+    get_metrics().observe(request.endpoint or '(unmatched)', response.status_code, timer, total)
+    if current_app.config['METRICS_SERVER_TIMING']:
+        response.headers['Server-Timing'] = timer.server_timing(total)
+    return response
+
+
+def _end_request(exc):
+    token = g.pop('request_timer_token', None)
+    if token is not None:
+        _current_timer.reset(token)
+
+
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.queries += 1
+        timer.start('sql')
+
+
+def _query_finished(*args):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.stop('sql')
+
+
+def _template_started(sender, **extra):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.start('template')
+
+
+def _template_finished(sender, **extra):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.stop('template')
+
+
+def init_metrics(app):
+    """
+    Time SQL, template rendering and password hashing for every request
+
+    Does nothing unless METRICS_ENABLED is set, so a disabled app pays for
+    no hooks at all. Register before other after-request hooks so the
+    total includes their work.
+    """
+    if not app.config['METRICS_ENABLED']:
+        return
+    from models import db
+
+    with app.app_context():
+        engine = db.engine
+    sa_event.listen(engine, 'before_cursor_execute', _query_started)
+    sa_event.listen(engine, 'after_cursor_execute', _query_finished)
+    sa_event.listen(engine, 'handle_error', _query_finished)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
+
+
+def quantile(histogram, fraction):
+    """Return the upper bound of the bucket holding the given quantile, or None"""
+    count = sum(histogram[:-1])
+    if not count:
+        return None
+    rank = fraction * count
+    seen = 0
+    for bound, bucket in zip(BUCKETS + (float('inf'),), histogram[:-1]):
+        seen += bucket
+        if seen >= rank:
+            return bound
+    return float('inf')
+
+
+def summarize(snapshot):
+    """
+    Return one row per endpoint for the metrics page, slowest total first
+
+    Times are in milliseconds; p50 and p95 are bucket upper bounds.
+    """
+    rows = []
+    for endpoint, stats in snapshot.items():
+        count = sum(stats['duration'][:-1])
+        if not count:
+            continue
+        row = {
+            'endpoint': endpoint,
+            'requests': count,
+            'errors': stats['responses'].get('5xx', 0),
+            'total_ms': stats['duration'][-1] * 1000,
+            'mean_ms': stats['duration'][-1] * 1000 / count,
+            'p50_ms': quantile(stats['duration'], 0.50) * 1000,
+            'p95_ms': quantile(stats['duration'], 0.95) * 1000,
+            'queries': stats['queries'] / count
+        }
+        for phase in PHASES:
+            row[f'{phase}_ms'] = stats['phases'][phase][-1] * 1000 / count
+        rows.append(row)
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return rows
+
+
+def _labels(**labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped))
+
+
+def _histogram_lines(name, labels, histogram):
+    lines = []
+    cumulative = 0
+    for bound, bucket in zip(BUCKETS + (float('inf'),), histogram[:-1]):
+        cumulative += bucket
+        le = '+Inf' if bound == float('inf') else repr(bound)
+        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f'{name}_sum{{{labels}}} {histogram[-1]}')
+    lines.append(f'{name}_count{{{labels}}} {cumulative}')
+    return lines
+
+
+def render_prometheus(snapshot):
+    """Return a snapshot in the Prometheus text exposition format"""
+    requests_total = f'{METRIC_PREFIX}_requests_total'
+    queries_total = f'{METRIC_PREFIX}_sql_queries_total'
+    duration = f'{METRIC_PREFIX}_request_duration_seconds'
+    phase_duration = f'{METRIC_PREFIX}_request_phase_seconds'
+
+    lines = [f'# HELP {requests_total} Requests served, by endpoint and status class',
+             f'# TYPE {requests_total} counter']
+    for endpoint, stats in sorted(snapshot.items()):
+        for status, count in sorted(stats['responses'].items()):
+            lines.append(f'{requests_total}{{{_labels(endpoint=endpoint, status=status)}}} {count}')
+
+    lines += [f'# HELP {queries_total} SQL statements executed while serving requests',
+              f'# TYPE {queries_total} counter']
+    for endpoint, stats in sorted(snapshot.items()):
+        lines.append(f'{queries_total}{{{_labels(endpoint=endpoint)}}} {stats["queries"]}')
+
+    lines += [f'# HELP {duration} Time to serve a request',
+              f'# TYPE {duration} histogram']
+    for endpoint, stats in sorted(snapshot.items()):
+        lines += _histogram_lines(duration, _labels(endpoint=endpoint), stats['duration'])
+
+    lines += [f'# HELP {phase_duration} Time per request spent in SQL, template rendering or password hashing',
+              f'# TYPE {phase_duration} histogram']
+    for endpoint, stats in sorted(snapshot.items()):
+        for phase in PHASES:
+            lines += _histogram_lines(phase_duration, _labels(endpoint=endpoint, phase=phase),
+                                      stats['phases'][phase])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,58 @@
+from datetime import datetime
+from flask import abort, request
+from models import db
+
+def parse_cursor(value):
+    """
+    Parse an '<created_at>,<id>' keyset cursor
+    
+    Returns:
+        Tuple of (datetime, id), or None when no cursor was given
+    """
+    if not value:
+        return None
+    try:
+        timestamp, row_id = value.rsplit(',', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        abort(400)
+
+def format_cursor(timestamp, row_id):
+    """Return the cursor string pointing just after a row"""
+    return f'{timestamp.isoformat()},{row_id}'
+
+def keyset_page(query, timestamp_column, id_column, page_size, after=None):
+    """
+    Fetch one newest-first page of a query using keyset pagination
+    
+    Rows are ordered by (timestamp, id) descending and the page starts
+    strictly after the cursor, so each page is a range scan of the
+    (timestamp DESC, id DESC) index no matter how deep the reader goes.
+    
+    Args:
+        query: Base query selecting the model
+        timestamp_column: Ordering column (e.g. Event.created_at)
+        id_column: Primary key column used as tie-breaker
+        page_size: Maximum number of rows to return
+        after: Cursor string from a previous page, or None for the first page
+    
+    Returns:
+        Tuple of (rows, next_cursor) where next_cursor is None on the last page
+    """
+    cursor = parse_cursor(after)
+    if cursor is not None:
+        query = query.filter(db.tuple_(timestamp_column, id_column) < cursor)
+    
+    rows = query.order_by(timestamp_column.desc(), id_column.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = format_cursor(
+            getattr(last, timestamp_column.key), getattr(last, id_column.key)
+        )
+    return rows, next_cursor
+
+def current_cursor():
+    """Return the ?after= cursor of the current request"""
+    return request.args.get('after') or None
@@ -0,0 +1,151 @@
+from models import ClusterTotal, Event, Participant, db
+
+def parse_participant_rows(form):
+    """
+    Read the participant rows submitted by the event create/edit forms
+    
+    Rows without a cluster or name are skipped. Values are validated with
+    the same rules as the Participant model.
+    
+    Returns:
+        List of dictionaries with id (None for new rows), cluster_id, name,
+        position and points
+    
+    Raises:
+        ValueError, IndexError: If a row is incomplete or invalid
+    """
+    cluster_ids = form.getlist('cluster_id[]')
+    participant_names = form.getlist('participant_name[]')
+    positions = form.getlist('position[]')
+    points_list = form.getlist('points[]')
+    participant_ids = form.getlist('participant_id[]')
+    
+    rows = []
+    for i in range(len(cluster_ids)):
+        if cluster_ids[i] and participant_names[i]:
+            participant_id = participant_ids[i] if i < len(participant_ids) else ''
+            row = {
+                'id': int(participant_id) if participant_id else None,
+                'cluster_id': int(cluster_ids[i]),
+                'name': participant_names[i],
+                'position': int(positions[i]),
+                'points': int(points_list[i])
+            }
+            Participant.validate(row['position'], row['points'])
+            rows.append(row)
+    return rows
+
+
+class ParticipantChanges:
+    """Minimal set of participant writes produced by sync_participants"""
+    
+    FIELDS = ('cluster_id', 'name', 'position', 'points')
+    
+    def __init__(self):
+        self.inserted = []  # Participant objects
+        self.updated = []   # (Participant, {field: old value}) pairs
+        self.deleted = []   # Participant objects
+    
+    def __bool__(self):
+        return bool(self.inserted or self.updated or self.deleted)
+    
+    def points_by_cluster(self):
+        """Return {cluster_id: signed points delta} caused by these changes"""
+        deltas = {}
+        
+        def add(cluster_id, points):
+            deltas[cluster_id] = deltas.get(cluster_id, 0) + points
+        
+        for participant in self.inserted:
+            add(participant.cluster_id, participant.points)
+        for participant in self.deleted:
+            add(participant.cluster_id, -participant.points)
+        for participant, old in self.updated:
+            if 'cluster_id' in old or 'points' in old:
+                add(old.get('cluster_id', participant.cluster_id), -old.get('points', participant.points))
+                add(participant.cluster_id, participant.points)
+        return {cluster_id: delta for cluster_id, delta in deltas.items() if delta}
+    
+    def summary(self):
+        """Return change counts for activity log details"""
+        return {
+            'participants_added': len(self.inserted),
+            'participants_updated': len(self.updated),
+            'participants_removed': len(self.deleted)
+        }
+
+
+def sync_participants(event, rows):
+    """
+    Bring an event's participants in line with submitted rows
+    
+    Rows are matched to stored participants by id, falling back to the same
+    cluster and name, so only the rows that actually changed are inserted,
+    updated or deleted when the session flushes.
+    
+    Args:
+        event: Event whose participants are edited (may be new)
+        rows: Rows from parse_participant_rows()
+    
+    Returns:
+        ParticipantChanges describing the writes
+    """
+    changes = ParticipantChanges()
+    unmatched = {participant.id: participant for participant in event.participants}
+    
+    for row in rows:
+        participant = unmatched.pop(row['id'], None) if row['id'] is not None else None
+        if participant is None:
+            for candidate in unmatched.values():
+                if candidate.cluster_id == row['cluster_id'] and candidate.name == row['name']:
+                    participant = unmatched.pop(candidate.id)
+                    break
+        
+        if participant is None:
+            participant = Participant(
+                cluster_id=row['cluster_id'],
+                name=row['name'],
+                position=row['position'],
+                points=row['points']
+            )
+            event.participants.append(participant)
+            changes.inserted.append(participant)
+            continue
+        
+        old = {}
+        for field in ParticipantChanges.FIELDS:
+            if getattr(participant, field) != row[field]:
+                old[field] = getattr(participant, field)
+                setattr(participant, field, row[field])
+        if old:
+            changes.updated.append((participant, old))
+    
+    for participant in unmatched.values():
+        event.participants.remove(participant)
+        changes.deleted.append(participant)
+    
+    return changes
+
+
+def flush_event_edit(event):
+    """
+    Write an edited event and its participants, moving the point changes into the cluster totals
+    
+    The event row is updated first, which takes SQLite's write lock for the
+    transaction, and the event's stored points are read before and after
+    the participant rows are flushed. The deltas are the difference, so they
+    reflect what the database held under the lock rather than the rows
+    loaded when the edit began, and two concurrent edits of the same event
+    never both subtract the same old points.
+    """
+    with db.session.no_autoflush:
+        db.session.execute(
+            db.update(Event).where(Event.id == event.id).values(updated_at=event.updated_at)
+        )
+        before = ClusterTotal.event_points(event.id)
+    db.session.flush()
+    after = ClusterTotal.event_points(event.id)
+    ClusterTotal.apply_deltas({
+        cluster_id: after.get(cluster_id, 0) - before.get(cluster_id, 0)
+        for cluster_id in before.keys() | after.keys()
+    })
@@ -0,0 +1,247 @@
+from flask import current_app, has_request_context, request
+from werkzeug.security import check_password_hash, generate_password_hash
+from utils.cooperative import native_thread_pool
+from utils.metrics import timed
+from collections import OrderedDict, deque
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool already has as much work as it may queue"""
+
+
+def password_hash_method(config):
+    """Return the werkzeug method string for the configured hash-cost policy"""
+    return f"pbkdf2:sha256:{config['PASSWORD_HASH_ITERATIONS']}"
+
+
+def needs_rehash(pwhash, method):
+    """Return True if a stored hash was made with different parameters than method"""
+    stored_method = pwhash.split('$', 1)[0]
+    return stored_method != method
+
+
+class PasswordHasher:
+    """
+    Bounded pool that runs password hashing off the request thread
+
+    hashlib's PBKDF2 releases the GIL, so hashes run in parallel with the
+    rest of the worker. Only worth it where the worker serves other requests
+    while one waits (gevent or gthread workers, see PasswordService). At most max_workers hashes run at once and at most
+    max_pending wait; beyond that callers get HasherBusy rather than piling
+    up behind a login burst. Under gevent the pool still uses OS threads,
+    so a hash never blocks the worker's other greenlets.
+    """
+
+    def __init__(self, max_workers=2, max_pending=8):
+        self.pid = os.getpid()
+        self._executor = native_thread_pool(max_workers, thread_name_prefix='password-hasher')
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def verify(self, pwhash, password, timeout=None):
+        """Check password against pwhash in the pool"""
+        return self._submit(check_password_hash, pwhash, password).result(timeout)
+
+    def hash(self, password, method, timeout=None):
+        """Hash password with method in the pool"""
+        return self._submit(generate_password_hash, password, method).result(timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class LoginRateLimiter:
+    """
+    Sliding-window limit on failed logins per username
+
+    Counts live in the worker's memory, so with several workers the
+    effective limit is up to max_attempts per worker. Usernames are kept in
+    order of their latest failure: recording a failure drops those whose
+    failures have all expired, and beyond max_entries the least recently
+    failed usernames are forgotten, so guessing many names cannot grow
+    memory without bound.
+    """
+
+    def __init__(self, max_attempts=5, window=300, max_entries=10000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_entries = max_entries
+        self._failures = OrderedDict()  # username -> deque of failure times
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def retry_after(self, username):
+        """Return seconds until username may try again, or 0 if allowed now"""
+        if self.max_attempts <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            failures = self._recent(username.lower(), now)
+            if failures is None or len(failures) < self.max_attempts:
+                return 0
+            return max(1, int(failures[0] + self.window - now) + 1)
+
+    def record_failure(self, username):
+        now = time.monotonic()
+        with self._lock:
+            key = username.lower()
+            failures = self._recent(key, now)
+            if failures is None:
+                failures = self._failures[key] = deque()
+            failures.append(now)
+            self._failures.move_to_end(key)
+            # The oldest entries come first; stop at the first still in the window
+            while self._failures:
+                oldest = next(iter(self._failures.values()))
+                if oldest[-1] > now - self.window and len(self._failures) <= self.max_entries:
+                    break
+                self._failures.popitem(last=False)
+
+    def reset(self, username):
+        with self._lock:
+            self._failures.pop(username.lower(), None)
+
+
+class VerifiedLoginCache:
+    """
+    Short-lived memory of passwords that recently verified
+
+    Entries are keyed by an HMAC of the stored hash and the password under
+    the app's secret key, so plaintext is never kept and changing the
+    password (which changes the hash) makes old entries unreachable.
+    """
+
+    def __init__(self, secret_key, ttl=300, max_entries=256):
+        self._key = hashlib.sha256(secret_key.encode()).digest()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # digest -> expiry
+        self._lock = threading.Lock()
+
+    def _digest(self, pwhash, password):
+        message = pwhash.encode() + b'\0' + password.encode()
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def contains(self, pwhash, password):
+        if self.ttl <= 0:
+            return False
+        digest = self._digest(pwhash, password)
+        with self._lock:
+            expiry = self._entries.get(digest)
+            if expiry is None:
+                return False
+            if expiry < time.monotonic():
+                del self._entries[digest]
+                return False
+            return True
+
+    def add(self, pwhash, password):
+        if self.ttl <= 0:
+            return
+        digest = self._digest(pwhash, password)
+        with self._lock:
+            self._entries[digest] = time.monotonic() + self.ttl
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class PasswordService:
+    """Per-process bundle of the hashing pool, login limiter and verified cache"""
+
+    def __init__(self, config):
+        self.pid = os.getpid()
+        self.method = password_hash_method(config)
+        self.timeout = config['PASSWORD_HASH_TIMEOUT']
+        self.hasher = PasswordHasher(config['PASSWORD_HASH_WORKERS'], config['PASSWORD_HASH_MAX_PENDING'])
+        self.limiter = LoginRateLimiter(config['LOGIN_MAX_ATTEMPTS'], config['LOGIN_ATTEMPT_WINDOW'])
+        self.cache = VerifiedLoginCache(config['SECRET_KEY'], config['LOGIN_CACHE_TTL'])
+
+    @staticmethod
+    def _pooled():
+        """
+        Return True when the current request's worker serves other requests meanwhile
+
+        gevent and gthread workers (and the threaded dev server) set
+        wsgi.multithread, so waiting on the pool lets their other requests
+        run. A sync worker serves one request per process: the request would
+        just block on the pool's result, so hashes run inline there and the
+        busy limit never applies.
+        """
+        return has_request_context() and bool(request.environ.get('wsgi.multithread'))
+
+    def verify(self, user, password):
+        """
+        Check a user's password, rehashing it when the policy has changed
+
+        Returns:
+            True if the password is correct. A rehash is left on the session
+            for the caller to commit.
+
+        Raises:
+            HasherBusy: The pool is saturated (pooled workers only)
+            concurrent.futures.TimeoutError: Hashing took longer than allowed
+        """
+        pwhash = user.password_hash
+        if self.cache.contains(pwhash, password):
+            verified = True
+        else:
+            with timed('hash'):
+                if self._pooled():
+                    verified = self.hasher.verify(pwhash, password, self.timeout)
+                else:
+                    verified = check_password_hash(pwhash, password)
+        if not verified:
+            return False
+
+        if needs_rehash(pwhash, self.method):
+            user.password_hash = self.hash(password)
+        self.cache.add(user.password_hash, password)
+        return True
+
+    def hash(self, password):
+        """Hash a new password with the current policy"""
+        with timed('hash'):
+            if self._pooled():
+                return self.hasher.hash(password, self.method, self.timeout)
+            return generate_password_hash(password, self.method)
+
+
+_service_lock = threading.Lock()
+
+def get_password_service(app=None):
+    """Return the app's PasswordService for this process, creating it on first use"""
+    app = app or current_app._get_current_object()
+    service = app.extensions.get('passwords')
+    # Pool threads do not survive fork, so each gunicorn worker builds its own
+    if service is None or service.pid != os.getpid():
+        with _service_lock:
+            service = app.extensions.get('passwords')
+            if service is None or service.pid != os.getpid():
+                service = app.extensions['passwords'] = PasswordService(app.config)
+    return service
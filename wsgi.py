@@ -3,7 +3,10 @@
 WSGI entry point for production deployment
 """
 
-from app import app
+from app import app, bootstrap_database
 
 if __name__ == "__main__":
+    # Running directly sets up its own database, like `python app.py`
+    with app.app_context():
+        bootstrap_database()
     app.run()
\ No newline at end of file